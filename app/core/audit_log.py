@@ -0,0 +1,209 @@
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.models.audit_event import AuditEvent
+
+logger = logging.getLogger(__name__)
+
+# Columnas de AuditEvent (id y timestamp incluidos). Se encolan dicts y no
+# instancias del modelo: construir una instancia ORM cuesta ~100 µs
+AuditRecord = Dict[str, Any]
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} no es serializable")
+
+
+class FileSink:
+    """
+    Archivo JSON lines de solo agregado. Al superar `max_bytes` se rota como
+    RotatingFileHandler: `path` pasa a `path.1`, `path.1` a `path.2`... y se
+    conservan `backups` archivos.
+    """
+
+    path: str
+    max_bytes: int
+    backups: int
+
+    def __init__(self, *, path: str, max_bytes: int, backups: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._file = None
+        self._size = 0
+
+    def write(self, lines: List[str]):
+        """Agrega las líneas (bloqueante: se llama desde un hilo)."""
+        data = "".join(lines).encode()
+        if self._file is None:
+            self._open()
+        if self._size and self._size + len(data) > self.max_bytes:
+            self._rotate()
+        self._file.write(data)
+        self._file.flush()
+        self._size += len(data)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _open(self):
+        self._file = open(self.path, "ab")
+        self._size = self._file.tell()
+
+    def _rotate(self):
+        self.close()
+        for i in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{i}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{i + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._open()
+
+
+class AuditLog:
+    """
+    Registro de auditoría asíncrono.
+
+    `emit` solo agrega el registro a un buffer en memoria: no hace I/O ni
+    espera. Una tarea en segundo plano lo vacía cada `flush_interval`
+    segundos (o al juntar `max_batch` eventos) e inserta el lote con un único
+    INSERT en una transacción y/o lo agrega al archivo JSON lines. Si el buffer llega a
+    `buffer_size` los eventos nuevos se descartan y se cuentan en `dropped`.
+    """
+
+    enabled: bool
+    buffer_size: int
+    max_batch: int
+    flush_interval: float
+    dropped: int
+    written: int
+    failed: int
+
+    def __init__(self):
+        self.enabled = False
+        self.buffer_size = 10000
+        self.max_batch = 500
+        self.flush_interval = 1.0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self._buffer: List[AuditRecord] = []
+        self._engine: Optional[AsyncEngine] = None
+        self._file: Optional[FileSink] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+
+    def emit(self, record: AuditRecord):
+        """Encola el registro; si el buffer está lleno lo descarta."""
+        if not self.enabled:
+            return
+        if len(self._buffer) >= self.buffer_size:
+            self.dropped += 1
+            return
+        self._buffer.append(record)
+        if len(self._buffer) >= self.max_batch:
+            self._wake.set()
+
+    async def start(
+        self,
+        *,
+        engine: Optional[AsyncEngine],
+        file: Optional[FileSink],
+        buffer_size: int,
+        max_batch: int,
+        flush_interval: float,
+    ):
+        """Inicia el vaciado en segundo plano hacia la base y/o el archivo."""
+        self._engine = engine
+        self._file = file
+        self.buffer_size = buffer_size
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self._wake = asyncio.Event()
+        self.enabled = True
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Deja de aceptar eventos y escribe los que estén en el buffer."""
+        if not self.enabled:
+            return
+        self.enabled = False
+        self._wake.set()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        await self.flush()
+        if self._file is not None:
+            self._file.close()
+
+    async def flush(self):
+        """Escribe lo que haya en el buffer, en lotes de hasta `max_batch`."""
+        while self._buffer:
+            batch = self._buffer[: self.max_batch]
+            del self._buffer[: self.max_batch]
+            await self._write(batch)
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._buffer),
+            "dropped": self.dropped,
+            "written": self.written,
+            "failed": self.failed,
+        }
+
+    async def _write(self, batch: List[AuditRecord]):
+        ok = True
+
+        if self._engine is not None:
+            try:
+                async with self._engine.begin() as conn:
+                    await conn.execute(insert(AuditEvent), batch)
+            except Exception:
+                logger.exception("Error al guardar %d eventos de auditoría", len(batch))
+                ok = False
+
+        if self._file is not None:
+            try:
+                lines = [
+                    json.dumps(record, default=_json_default, ensure_ascii=False) + "\n"
+                    for record in batch
+                ]
+                await asyncio.to_thread(self._file.write, lines)
+            except Exception:
+                logger.exception(
+                    "Error al escribir %d eventos de auditoría", len(batch)
+                )
+                ok = False
+
+        if ok:
+            self.written += len(batch)
+        else:
+            self.failed += len(batch)
+
+    async def _run(self):
+        while self.enabled:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+
+audit_log = AuditLog()
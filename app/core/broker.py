@@ -0,0 +1,237 @@
+import asyncio
+import fcntl
+import logging
+import os
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, Optional, Set, Union
+from uuid import UUID
+
+from app.enums.broker_backend import BrokerBackend
+
+logger = logging.getLogger(__name__)
+
+# handler(session_id, frame, message_count) entrega un frame a los sockets locales
+FrameHandler = Callable[[UUID, str, int], Union[None, Awaitable[None]]]
+
+
+class Broker(ABC):
+    """
+    Distribuye los frames de una sesión a los demás procesos que tienen
+    suscriptores en ella. La entrega a los sockets del propio proceso la hace
+    ConnectionManager; el broker solo se ocupa del resto.
+
+    Un broker en red (Redis, NATS...) implementa esta misma interfaz.
+    """
+
+    # True si todos los suscriptores viven en este proceso
+    local: bool = False
+
+    @abstractmethod
+    async def start(self, handler: FrameHandler): ...
+
+    @abstractmethod
+    async def stop(self): ...
+
+    @abstractmethod
+    def subscribe(self, session_id: UUID):
+        """El proceso tiene su primer socket en la sesión."""
+
+    @abstractmethod
+    def unsubscribe(self, session_id: UUID):
+        """El proceso ya no tiene sockets en la sesión."""
+
+    @abstractmethod
+    async def publish(self, session_id: UUID, frame: str, message_count: int = 1):
+        """Envía el frame a los otros procesos suscritos a la sesión."""
+
+
+class InProcessBroker(Broker):
+    """Un único worker: no hay otros procesos a los que publicar."""
+
+    local = True
+
+    async def start(self, handler: FrameHandler): ...
+
+    async def stop(self): ...
+
+    def subscribe(self, session_id: UUID): ...
+
+    def unsubscribe(self, session_id: UUID): ...
+
+    async def publish(self, session_id: UUID, frame: str, message_count: int = 1): ...
+
+
+class UnixSocketBroker(Broker):
+    """
+    Broker para varios workers en un mismo host sobre un socket Unix.
+
+    El worker que obtiene el lock `<path>.lock` actúa además como hub: acepta
+    las conexiones de todos los workers (incluido él mismo) y reenvía cada
+    publicación solo a los workers suscritos a esa sesión. Si el hub muere el
+    sistema libera el lock y otro worker toma su lugar.
+
+    Protocolo por líneas: `S <sid>`, `U <sid>`, `P <sid> <n> <frame>`.
+    """
+
+    local = False
+
+    # Bytes pendientes por cliente antes de que el hub lo desconecte
+    MAX_CLIENT_BUFFER = 8 * 1024 * 1024
+    LINE_LIMIT = 4 * 1024 * 1024
+
+    def __init__(self, *, path: str, reconnect_delay: float = 0.2):
+        self.path = path
+        self.reconnect_delay = reconnect_delay
+        self._handler: Optional[FrameHandler] = None
+        self._subscriptions: Set[str] = set()
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._connected = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._lock_fd: Optional[int] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._hub_clients: Dict[asyncio.StreamWriter, Set[str]] = {}
+
+    @property
+    def is_hub(self) -> bool:
+        return self._server is not None
+
+    async def start(self, handler: FrameHandler):
+        self._handler = handler
+        self._task = asyncio.create_task(self._run())
+        try:
+            await asyncio.wait_for(self._connected.wait(), timeout=5)
+        except asyncio.TimeoutError:
+            logger.warning("Broker sin conexión con el hub en %s", self.path)
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        if self._writer:
+            self._writer.close()
+        if self._server:
+            self._server.close()
+            for client in list(self._hub_clients):
+                client.close()
+            self._hub_clients.clear()
+            self._server = None
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def subscribe(self, session_id: UUID):
+        self._subscriptions.add(str(session_id))
+        self._send(f"S {session_id}\n")
+
+    def unsubscribe(self, session_id: UUID):
+        self._subscriptions.discard(str(session_id))
+        self._send(f"U {session_id}\n")
+
+    async def publish(self, session_id: UUID, frame: str, message_count: int = 1):
+        # Publicación sin garantía: si el hub se está reeligiendo se pierde
+        if self._send(f"P {session_id} {message_count} {frame}\n"):
+            await self._writer.drain()
+
+    def _send(self, line: str) -> bool:
+        if self._writer is None or self._writer.is_closing():
+            return False
+        self._writer.write(line.encode())
+        return True
+
+    async def _run(self):
+        while True:
+            await self._elect()
+            try:
+                reader, writer = await asyncio.open_unix_connection(
+                    self.path, limit=self.LINE_LIMIT
+                )
+            except OSError:
+                await asyncio.sleep(self.reconnect_delay)
+                continue
+
+            self._writer = writer
+            for session_id in self._subscriptions:
+                self._send(f"S {session_id}\n")
+            self._connected.set()
+
+            try:
+                await self._read_frames(reader)
+            finally:
+                self._writer = None
+                self._connected.clear()
+                writer.close()
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def _read_frames(self, reader: asyncio.StreamReader):
+        while line := await reader.readline():
+            try:
+                kind, session_id, count, frame = (
+                    line.decode().rstrip("\n").split(" ", 3)
+                )
+                if kind != "P":
+                    continue
+                result = self._handler(UUID(session_id), frame, int(count))
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception:
+                logger.exception("Broker: frame inválido o error al entregarlo")
+
+    async def _elect(self):
+        """Intenta tomar el lock del hub; quien lo obtiene levanta el servidor."""
+        if self.is_hub:
+            return
+
+        if self._lock_fd is None:
+            self._lock_fd = os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return
+
+        # El socket de un hub anterior que murió queda huérfano
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(
+            self._serve_client, path=self.path, limit=self.LINE_LIMIT
+        )
+        logger.info("Broker hub escuchando en %s", self.path)
+
+    async def _serve_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        subscriptions: Set[str] = set()
+        self._hub_clients[writer] = subscriptions
+        try:
+            while line := await reader.readline():
+                kind, rest = line.decode().split(" ", 1)
+                if kind == "S":
+                    subscriptions.add(rest.strip())
+                elif kind == "U":
+                    subscriptions.discard(rest.strip())
+                elif kind == "P":
+                    self._forward(writer, rest.split(" ", 1)[0], line)
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            self._hub_clients.pop(writer, None)
+            writer.close()
+
+    def _forward(self, source: asyncio.StreamWriter, session_id: str, line: bytes):
+        for client, subscriptions in list(self._hub_clients.items()):
+            if client is source or session_id not in subscriptions:
+                continue
+            if client.transport.get_write_buffer_size() > self.MAX_CLIENT_BUFFER:
+                # Un worker que no consume no puede hacer crecer la memoria del hub
+                logger.warning("Broker hub descarta un worker lento")
+                self._hub_clients.pop(client, None)
+                client.close()
+                continue
+            client.write(line)
+
+
+def create_broker(backend: BrokerBackend, *, socket_path: str) -> Broker:
+    if backend == BrokerBackend.unix:
+        return UnixSocketBroker(path=socket_path)
+    return InProcessBroker()
@@ -1,52 +1,439 @@
-import asyncio
-from typing import Any, Dict, List
+import itertools
+import json
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from itertools import islice
+from typing import Any, Dict, List, Optional, Tuple, Union
 from uuid import UUID
 from fastapi import WebSocket
 
+from app.core.broker import Broker, InProcessBroker
+from app.core.connection_writer import ConnectionWriter
+from app.core.metrics import BROADCAST_DURATION, BROADCAST_RECIPIENTS, metrics
+from app.enums.overflow_policy import OverflowPolicy
 from app.models.message import Message
 from app.models.session import Session
 
 
+# Tiempo máximo para entregar un frame a un socket (segundos)
+BROADCAST_SEND_TIMEOUT = 5.0
+
+# Frames pendientes por conexión antes de aplicar la política de desborde
+SEND_QUEUE_SIZE = 256
+
+# Sesiones registradas sin sockets antes de desalojar las menos usadas
+REGISTRY_CAPACITY = 10000
+# Segundos sin uso tras los cuales una sesión sin sockets se desaloja
+REGISTRY_IDLE_TTL = 3600.0
+
+# Últimos mensajes por sesión que se guardan para reproducir al reconectar
+REPLAY_BUFFER_SIZE = 100
+
+
 class ConnectionManager:
-    active_connections: Dict[str, Dict[str, Any | List[Any]]]
+    active_connections: Dict[str, Dict[str, Any | Dict[WebSocket, ConnectionWriter]]]
+    send_timeout: float
+    queue_size: int
+    overflow_policy: OverflowPolicy
+    registry_capacity: int
+    registry_idle_ttl: float
+    replay_buffer_size: int
+    broker: Broker
+
+    def __init__(
+        self,
+        *,
+        send_timeout: float = BROADCAST_SEND_TIMEOUT,
+        queue_size: int = SEND_QUEUE_SIZE,
+        overflow_policy: OverflowPolicy = OverflowPolicy.drop_oldest,
+    ):
+        # Registro de sesiones en orden LRU: session_id -> datos, sockets
+        # ({websocket: writer}), contador de mensajes y su generación, últimos
+        # mensajes (timestamp, id, frame) y último uso
+        self.active_connections = OrderedDict()
+        # Generaciones del contador: cambian con cada inserción o reinicio
+        self._count_generations = itertools.count(1)
+        self.broker = InProcessBroker()
+        self.replay_buffer_size = REPLAY_BUFFER_SIZE
+        self.configure(
+            send_timeout=send_timeout,
+            queue_size=queue_size,
+            overflow_policy=overflow_policy,
+        )
+        self.configure_registry(capacity=REGISTRY_CAPACITY, idle_ttl=REGISTRY_IDLE_TTL)
 
-    def __init__(self):
-        # Diccionario: session_id -> lista de conexiones WebSocket
-        self.active_connections = {}
+    def configure(
+        self,
+        *,
+        send_timeout: float,
+        queue_size: int,
+        overflow_policy: OverflowPolicy,
+    ):
+        """Parámetros de las colas de salida para las conexiones nuevas."""
+        self.send_timeout = send_timeout
+        self.queue_size = queue_size
+        self.overflow_policy = overflow_policy
+
+    def configure_registry(self, *, capacity: int, idle_ttl: float):
+        """Tamaño y TTL del registro de sesiones sin sockets."""
+        self.registry_capacity = capacity
+        self.registry_idle_ttl = idle_ttl
+        self._evict()
+
+    def configure_replay(self, *, buffer_size: int):
+        """Mensajes recientes por sesión guardados para las reconexiones."""
+        self.replay_buffer_size = buffer_size
+        for entry in self.active_connections.values():
+            entry["recent"] = deque(entry["recent"], maxlen=buffer_size)
+
+    async def start_broker(self, broker: Broker):
+        """Reemplaza el broker y se suscribe a las sesiones con sockets locales."""
+        await self.broker.stop()
+        self.broker = broker
+        await broker.start(self._deliver)
+        for session_id, entry in self.active_connections.items():
+            if entry["connections"]:
+                broker.subscribe(session_id)
+
+    async def stop_broker(self):
+        await self.broker.stop()
+        self.broker = InProcessBroker()
 
     async def connect(
         self,
         *,
         websocket: WebSocket,
         session: Session,
-    ):
+        hold: bool = False,
+    ) -> ConnectionWriter:
+        """
+        Acepta y registra el socket. Con `hold` los mensajes en vivo se
+        retienen hasta `writer.release` (reproducción del historial).
+        """
         await websocket.accept()
-        if session.id not in self.active_connections:
-            self.active_connections[session.id] = {"data": session, "connections": []}
-        self.active_connections[session.id]["connections"].append(websocket)
+        if self.get_session(session.id) is None:
+            self.create_session(session=session)
+
+        writer = ConnectionWriter(
+            websocket,
+            max_queue=self.queue_size,
+            policy=self.overflow_policy,
+            send_timeout=self.send_timeout,
+            on_close=lambda w: self._discard(w.websocket, session.id),
+            hold=hold,
+        )
+        connections = self.active_connections[session.id]["connections"]
+        if not connections:
+            self.broker.subscribe(session.id)
+        connections[websocket] = writer
+        writer.start()
+        return writer
 
     def disconnect(self, websocket: WebSocket, session_id: UUID):
-        if session_id in self.active_connections:
-            self.active_connections[session_id]["connections"].remove(websocket)
+        """Quita el socket y detiene su writer; no falla si ya no estaba."""
+        writer = self._discard(websocket, session_id)
+        if writer:
+            writer.stop()
+
+    def _discard(
+        self, websocket: WebSocket, session_id: UUID
+    ) -> Optional[ConnectionWriter]:
+        if session_id not in self.active_connections:
+            return None
+
+        entry = self.active_connections[session_id]
+        writer = entry["connections"].pop(websocket, None)
+        if writer and not entry["connections"]:
+            self.broker.unsubscribe(session_id)
+            if not self.broker.local:
+                # Sin suscripción dejan de llegar los mensajes de otros workers
+                entry["message_count"] = None
+                entry["count_generation"] = next(self._count_generations)
+                entry["recent"].clear()
+            # El TTL de inactividad empieza a contar al quedar sin sockets
+            self._touch(session_id)
+        return writer
+
+    def send(self, session_id: UUID, websocket: WebSocket, frame: str) -> bool:
+        """Encola un frame solo para un socket (por ejemplo un ack)."""
+        entry = self.active_connections.get(session_id)
+        writer = entry["connections"].get(websocket) if entry else None
+        return writer.enqueue(frame) if writer else False
 
     async def send_personal_message(self, message: dict, websocket: WebSocket):
         await websocket.send_json(message)
 
     async def load_sessions(self): ...
 
-    def create_session(self, *, session: Session):
-        self.active_connections[session.id] = {"data": session, "connections": []}
+    def create_session(self, *, session: Session, message_count: Optional[int] = None):
+        # message_count: total de mensajes de la sesión (None si aún no se conoce)
+        entry = self.active_connections.get(session.id)
+        if entry:
+            # Ya registrada (por ejemplo por una carga concurrente): se
+            # conservan sus sockets
+            entry["data"] = session
+            if message_count is not None:
+                entry["message_count"] = message_count
+                entry["count_generation"] = next(self._count_generations)
+        else:
+            self.active_connections[session.id] = {
+                "data": session,
+                "connections": {},
+                "message_count": message_count,
+                "count_generation": next(self._count_generations),
+                "recent": deque(maxlen=self.replay_buffer_size),
+            }
+        self._touch(session.id)
+        self._evict()
+
+    def get_session(self, session_id: UUID) -> Optional[Session]:
+        """Sesión registrada o None si hay que cargarla de la base de datos."""
+        entry = self.active_connections.get(session_id)
+        if entry is None:
+            return None
+        if self._expired(entry):
+            del self.active_connections[session_id]
+            return None
+        self._touch(session_id)
+        return entry["data"]
+
+    def _touch(self, session_id: UUID):
+        self.active_connections[session_id]["last_used"] = time.monotonic()
+        self.active_connections.move_to_end(session_id)
+
+    def _expired(self, entry: dict) -> bool:
+        return (
+            not entry["connections"]
+            and time.monotonic() - entry["last_used"] > self.registry_idle_ttl
+        )
+
+    def _evict(self):
+        """
+        Desaloja, de la menos a la más usada, las sesiones sin sockets que
+        vencieron su TTL o que exceden la capacidad. Las sesiones con sockets
+        nunca se desalojan.
+        """
+        excess = len(self.active_connections) - self.registry_capacity
+        evicted = []
+        for session_id, entry in self.active_connections.items():
+            if entry["connections"]:
+                continue
+            if excess <= 0 and not self._expired(entry):
+                # Orden LRU: las siguientes se usaron más recientemente
+                break
+            evicted.append(session_id)
+            excess -= 1
+
+        for session_id in evicted:
+            del self.active_connections[session_id]
+
+    def get_message_count(self, session_id: UUID) -> Optional[int]:
+        if self._tracks_count(session_id):
+            return self.active_connections[session_id].get("message_count")
+        return None
+
+    def recent_after(
+        self, session_id: UUID, last_seen: Union[UUID, datetime]
+    ) -> Optional[List[Tuple[datetime, str, str]]]:
+        """
+        Mensajes (timestamp, id, frame) posteriores a `last_seen` (id o timestamp) desde el
+        búfer en memoria, o None si el búfer no alcanza a cubrirlos.
+        """
+        entry = self.active_connections.get(session_id)
+        recent = entry["recent"] if entry else None
+        if not recent:
+            return None
+
+        if isinstance(last_seen, UUID):
+            key = str(last_seen)
+            for position, (_, message_id, _) in enumerate(recent):
+                if message_id == key:
+                    return list(islice(recent, position + 1, None))
+            return None
+
+        if last_seen < recent[0][0]:
+            # Puede haber mensajes anteriores al más antiguo del búfer
+            return None
+        return [item for item in recent if item[0] > last_seen]
+
+    def message_count_generation(self, session_id: UUID) -> Optional[int]:
+        """Generación actual del contador, para pasarla a set_message_count."""
+        entry = self.active_connections.get(session_id)
+        return entry["count_generation"] if entry else None
+
+    def set_message_count(
+        self, session_id: UUID, count: int, *, generation: Optional[int] = None
+    ):
+        """
+        Guarda el total contado en la base. Con `generation` (leída antes de
+        la consulta) no se guarda si entretanto hubo inserciones: el COUNT
+        podría no incluirlas y el contador quedaría desfasado para siempre.
+        """
+        if not self._tracks_count(session_id):
+            return
+        entry = self.active_connections[session_id]
+        if generation is not None and entry["count_generation"] != generation:
+            return
+        entry["message_count"] = count
+
+    def _tracks_count(self, session_id: UUID) -> bool:
+        """
+        Con varios workers el contador y los mensajes recientes solo son
+        fiables mientras el proceso está suscrito a la sesión y recibe los
+        mensajes insertados por los demás.
+        """
+        if session_id not in self.active_connections:
+            return False
+        return self.broker.local or bool(
+            self.active_connections[session_id]["connections"]
+        )
+
+    def increment_message_count(self, session_id: UUID, amount: int = 1):
+        """Actualiza el contador al insertar; si aún no se conoce se deja sin valor."""
+        entry = self.active_connections.get(session_id)
+        if entry is None:
+            return
+        # Invalida los COUNT en curso aunque el contador aún no tenga valor
+        entry["count_generation"] = next(self._count_generations)
+        count = self.get_message_count(session_id)
+        if count is not None:
+            entry["message_count"] = count + amount
+
+    def connection_stats(self) -> List[dict]:
+        """Profundidad de cola, envíos y descartes de cada conexión."""
+        return [
+            {"session_id": session_id, **writer.stats()}
+            for session_id, entry in self.active_connections.items()
+            for writer in entry["connections"].values()
+        ]
+
+    def connection_counts(self) -> List[Tuple[Tuple[()], int]]:
+        """Sockets abiertos, para la métrica ws_connections."""
+        return [
+            (
+                (),
+                sum(len(e["connections"]) for e in self.active_connections.values()),
+            )
+        ]
+
+    def queue_depths(self) -> List[Tuple[Tuple[str], int]]:
+        """Frames en las colas de salida (total y la más larga), para ws_send_queue."""
+        depths = [stats["queue_depth"] for stats in self.connection_stats()]
+        return [(("total",), sum(depths)), (("max",), max(depths, default=0))]
+
+    def session_counts(self) -> List[Tuple[Tuple[()], int]]:
+        """Sesiones con algún socket abierto, para la métrica ws_sessions."""
+        return [
+            ((), sum(1 for e in self.active_connections.values() if e["connections"]))
+        ]
 
     async def broadcast(self, *, message: Message):
         """Enviar a todos los sockets en una sesión."""
-        # await asyncio.sleep(5) -> Simular servidor lento
-        if self.active_connections[message.session_id]:
-            for connection in self.active_connections[message.session_id][
-                "connections"
-            ]:
-                await connection.send_json(
-                    message.model_dump_json(exclude=["session_id"])
+        if not self._has_audience(message.session_id):
+            return
+
+        start = time.perf_counter()
+        # Se serializa una sola vez y el mismo frame se encola en cada conexión
+        # local; el broker lo lleva a los demás workers suscritos a la sesión
+        frame = message.model_dump_json(exclude={"session_id"})
+        recipients = self._enqueue(
+            message.session_id, [(message.timestamp, str(message.id), frame)], frame
+        )
+        await self.broker.publish(message.session_id, frame)
+        BROADCAST_DURATION.observe(time.perf_counter() - start)
+        BROADCAST_RECIPIENTS.observe(recipients)
+
+    async def broadcast_many(self, *, session_id: UUID, messages: List[Message]):
+        """Envía varios mensajes de una sesión en un solo frame (arreglo JSON)."""
+        if not self._has_audience(session_id):
+            return
+
+        start = time.perf_counter()
+        items = [
+            (
+                message.timestamp,
+                str(message.id),
+                message.model_dump_json(exclude={"session_id"}),
+            )
+            for message in messages
+        ]
+        frame = f"[{','.join(item for _, _, item in items)}]"
+        recipients = self._enqueue(session_id, items, frame)
+        await self.broker.publish(session_id, frame, len(items))
+        BROADCAST_DURATION.observe(time.perf_counter() - start)
+        BROADCAST_RECIPIENTS.observe(recipients)
+
+    def _has_audience(self, session_id: UUID) -> bool:
+        """Hay que serializar: sockets locales, otros workers o recientes."""
+        entry = self.active_connections.get(session_id)
+        return (
+            not self.broker.local
+            or bool(entry and entry["connections"])
+            or (self.replay_buffer_size > 0 and self._tracks_count(session_id))
+        )
+
+    def _deliver(self, session_id: UUID, frame: str, message_count: int):
+        """Frame publicado por otro worker (un mensaje o un arreglo de ellos)."""
+        self.increment_message_count(session_id, message_count)
+        try:
+            data = json.loads(frame)
+            records = data if isinstance(data, list) else [data]
+            items = [
+                (
+                    datetime.fromisoformat(record["timestamp"]),
+                    record["id"],
+                    frame
+                    if record is data
+                    else json.dumps(record, separators=(",", ":")),
                 )
+                for record in records
+            ]
+        except (KeyError, TypeError, ValueError):
+            # Frame que no es un mensaje: se entrega tal cual
+            items = []
+        self._enqueue(session_id, items, frame)
+
+    def _enqueue(
+        self, session_id: UUID, items: List[Tuple[datetime, str, str]], frame: str
+    ) -> int:
+        """
+        Guarda los mensajes (timestamp, id, frame) entre los recientes y encola
+        `frame`, que los contiene a todos, en cada socket de la sesión.
+        Devuelve la cantidad de sockets.
+        """
+        entry = self.active_connections.get(session_id)
+        if not entry:
+            return 0
+        if items and self.replay_buffer_size > 0 and self._tracks_count(session_id):
+            entry["recent"].extend(items)
+
+        keyed = [(key, item) for _, key, item in items]
+        # Cada writer lo envía a su ritmo sin bloquear al resto
+        for writer in list(entry["connections"].values()):
+            if len(keyed) > 1:
+                writer.enqueue_many(keyed, frame)
+            else:
+                writer.enqueue(frame, key=keyed[0][0] if keyed else None)
+        return len(entry["connections"])
 
 
 manager = ConnectionManager()
+# Sin el id de la sesión como etiqueta: /metrics no debe exponer sesiones
+# vivas a las que conectarse
+metrics.gauge(
+    "ws_connections",
+    "WebSockets abiertos en este worker.",
+    collect=manager.connection_counts,
+)
+metrics.gauge(
+    "ws_send_queue_frames",
+    "Frames pendientes en las colas de salida: total y de la cola más larga.",
+    ("stat",),
+    collect=manager.queue_depths,
+)
+metrics.gauge(
+    "ws_sessions",
+    "Sesiones con algún WebSocket abierto en este worker.",
+    collect=manager.session_counts,
+)
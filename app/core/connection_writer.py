@@ -0,0 +1,242 @@
+import asyncio
+from collections import deque
+from typing import Callable, Deque, List, Optional, Set, Tuple, Union
+
+from fastapi import WebSocket
+
+from app.core.metrics import (
+    WS_COALESCED_MESSAGES,
+    WS_DROPPED_MESSAGES,
+    WS_SLOW_CONSUMER_CLOSES,
+)
+from app.enums.overflow_policy import OverflowPolicy
+
+# Código de cierre para clientes que no consumen a tiempo ("Try Again Later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+class ConnectionWriter:
+    """
+    Cola de salida acotada de un WebSocket con su propia tarea de escritura.
+
+    Encolar nunca bloquea: cuando la cola está llena se aplica la política de
+    desborde. Con `coalesce` los mensajes en vivo pendientes se fusionan en un
+    único frame con un arreglo JSON de a lo sumo `max_queue` mensajes (los
+    más antiguos se descartan); acks y frames de la reproducción no se tocan.
+
+    Con `hold` los mensajes en vivo (frames con `key`) se retienen hasta
+    `release`, mientras se reproduce el historial que el cliente no recibió.
+    """
+
+    websocket: WebSocket
+    # Un str se envía tal cual; una lista es un lote de mensajes en vivo que
+    # se puede fusionar con otros (se envía como arreglo JSON)
+    queue: Deque[Union[str, List[str]]]
+    max_queue: int
+    policy: OverflowPolicy
+    send_timeout: float
+    sent: int
+    dropped: int
+    coalesced: int
+    closed: bool
+    holding: bool
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        *,
+        max_queue: int,
+        policy: OverflowPolicy,
+        send_timeout: float,
+        on_close: Optional[Callable[["ConnectionWriter"], None]] = None,
+        hold: bool = False,
+    ):
+        self.websocket = websocket
+        self.queue = deque()
+        self.max_queue = max_queue
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.closed = False
+        self.holding = hold
+        # (key, frame) en vivo recibidos durante la reproducción
+        self._held: List[Tuple[str, str]] = []
+        # Keys ya reproducidos que aún pueden llegar en vivo
+        self._skip: Set[str] = set()
+        self._on_close = on_close
+        self._ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    def enqueue(self, frame: str, *, key: Optional[str] = None) -> bool:
+        """
+        Encola un frame; devuelve False si la conexión se descartó. `key`
+        identifica el mensaje para no enviarlo dos veces tras una reproducción.
+        """
+        if self.closed:
+            return False
+
+        if key is not None:
+            if key in self._skip:
+                return True
+            if self.holding:
+                if len(self._held) >= self.max_queue:
+                    # No se puede retener sin perder mensajes: el cliente se
+                    # reconecta con su último mensaje visto
+                    WS_SLOW_CONSUMER_CLOSES.inc("hold_full")
+                    self.close()
+                    return False
+                self._held.append((key, frame))
+                return True
+
+        return self._push([frame] if key is not None and self._coalesce else frame)
+
+    def enqueue_many(self, items: List[Tuple[str, str]], frame: str) -> bool:
+        """
+        Encola varios mensajes (key, frame) como un único `frame` con su
+        arreglo JSON, salvo que haya que retenerlos o descartarlos por separado.
+        """
+        if self.holding or any(key in self._skip for key, _ in items):
+            results = [self.enqueue(item, key=key) for key, item in items]
+            return all(results)
+        return self._push([item for _, item in items] if self._coalesce else frame)
+
+    def release(self, *, replayed: Set[str], skip: Set[str]):
+        """
+        Termina la reproducción: encola los mensajes retenidos que no estaban
+        en `replayed` y descarta en adelante los de `skip`.
+        """
+        held, self._held = self._held, []
+        self.holding = False
+        self._skip = skip
+        for key, frame in held:
+            if key not in replayed:
+                self._push([frame] if self._coalesce else frame)
+
+    @property
+    def _coalesce(self) -> bool:
+        return self.policy == OverflowPolicy.coalesce
+
+    def _push(self, item: Union[str, List[str]]) -> bool:
+        if self.closed:
+            return False
+
+        if len(self.queue) >= self.max_queue:
+            if self.policy == OverflowPolicy.disconnect:
+                WS_SLOW_CONSUMER_CLOSES.inc("queue_full")
+                self.close()
+                return False
+            if self.policy == OverflowPolicy.coalesce and self._merge(item):
+                self._ready.set()
+                return True
+            # Sin mensajes que fusionar (acks, reproducción) se descarta
+            # el frame más antiguo
+            if len(self.queue) >= self.max_queue:
+                dropped = self.queue.popleft()
+                self._drop(1 if isinstance(dropped, str) else len(dropped))
+
+        self.queue.append(item)
+        self._ready.set()
+        return True
+
+    def _merge(self, item: Union[str, List[str]]) -> bool:
+        """
+        Fusiona los lotes de mensajes pendientes en uno solo, en el lugar del
+        primero. Si la cola sigue llena y `item` es un lote, también se suma
+        a él; devuelve True en ese caso. El lote conserva los `max_queue`
+        mensajes más recientes.
+        """
+        merged: List[str] = []
+        rest: List[Union[str, List[str]]] = []
+        for queued in self.queue:
+            if isinstance(queued, str):
+                rest.append(queued)
+                continue
+            if not merged:
+                rest.append(merged)
+            merged.extend(queued)
+        if not merged:
+            return False
+
+        absorbed = len(rest) >= self.max_queue and isinstance(item, list)
+        if absorbed:
+            merged.extend(item)
+        excess = len(merged) - self.max_queue
+        if excess > 0:
+            del merged[:excess]
+            self._drop(excess)
+        self.coalesced += len(merged)
+        WS_COALESCED_MESSAGES.inc(amount=len(merged))
+        self.queue = deque(rest)
+        return absorbed
+
+    def _drop(self, count: int):
+        self.dropped += count
+        WS_DROPPED_MESSAGES.inc(self.policy.value, amount=count)
+
+    def stop(self):
+        """Detiene la tarea de escritura (el socket ya se cerró)."""
+        self.closed = True
+        self.queue.clear()
+        self._held.clear()
+        if self._task and self._task is not asyncio.current_task():
+            self._task.cancel()
+
+    def close(self, *, code: int = SLOW_CONSUMER_CLOSE_CODE):
+        """Descarta la conexión y cierra el socket con `code`."""
+        if self.closed:
+            return
+        self.stop()
+        if self._on_close:
+            self._on_close(self)
+        asyncio.create_task(self._close_socket(code))
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": len(self.queue),
+            "held": len(self._held),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+        }
+
+    async def _run(self):
+        while not self.closed:
+            if not self.queue:
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+
+            item = self.queue.popleft()
+            if isinstance(item, str):
+                frame = item
+            elif len(item) == 1:
+                frame = item[0]
+            else:
+                frame = f"[{','.join(item)}]"
+            try:
+                await asyncio.wait_for(
+                    self.websocket.send_text(frame), self.send_timeout
+                )
+            except asyncio.CancelledError:
+                raise
+            except asyncio.TimeoutError:
+                # Cliente que no lee dentro del plazo
+                WS_SLOW_CONSUMER_CLOSES.inc("send_timeout")
+                self.close()
+                return
+            except Exception:
+                # Socket caído
+                self.close()
+                return
+            self.sent += 1
+
+    async def _close_socket(self, code: int):
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
@@ -1,19 +1,35 @@
+import asyncio
+import fcntl
+import logging
+import os
+from contextlib import asynccontextmanager
 from typing import AsyncGenerator
-from sqlalchemy.ext.asyncio.engine import create_async_engine
+from sqlalchemy import inspect, text
+from sqlalchemy.sql.sqltypes import SchemaType
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine
 from sqlalchemy.orm import sessionmaker
 from sqlmodel import SQLModel
 from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.engine import create_db_engine
+from app.core.search import message_search
 from app.settings import get_settings
 
+logger = logging.getLogger(__name__)
+
+# Clave del advisory lock de PostgreSQL que serializa la creación del esquema
+SCHEMA_LOCK_KEY = 0x6D736772
+
 settings = get_settings()
 
-connect_args = {"check_same_thread": False}
-engine = create_async_engine(settings.database_url, connect_args=connect_args)
+engine = create_db_engine(settings)
 
 async_session_maker = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 
-# Dependency for FastAPI routes
+# Dependency for FastAPI routes: una sola sesión (unit of work) por petición,
+# compartida por todos los servicios. La conexión se toma del pool recién en
+# la primera consulta, así que una petición resuelta desde caché no la usa.
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     async with async_session_maker() as session:
         yield session
@@ -21,5 +37,78 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
 
 # Create tables at startup
 async def init_db():
+    await create_schema(engine)
+
+
+async def create_schema(engine: AsyncEngine):
+    """
+    Crea tablas, columnas, índices y la búsqueda. Con varios workers todos
+    arrancan a la vez: la creación se serializa entre procesos (lock de
+    archivo junto a la base SQLite o advisory lock en PostgreSQL).
+    """
+    async with _schema_file_lock(engine):
+        try:
+            await _create_schema(engine)
+        except DBAPIError as e:
+            if "already exists" not in str(e):
+                raise
+            # Otro proceso lo creó sin pasar por el lock (por ejemplo con otro
+            # archivo de lock): con el esquema ya creado se reintenta una vez
+            logger.warning("Esquema creado por otro proceso, se reintenta: %s", e)
+            await _create_schema(engine)
+
+
+async def _create_schema(engine: AsyncEngine):
     async with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            # Se libera al terminar la transacción
+            await conn.execute(
+                text("SELECT pg_advisory_xact_lock(:key)"), {"key": SCHEMA_LOCK_KEY}
+            )
         await conn.run_sync(SQLModel.metadata.create_all)
+        await conn.run_sync(create_missing_columns)
+        await conn.run_sync(create_missing_indexes)
+        await conn.run_sync(message_search.setup)
+
+
+@asynccontextmanager
+async def _schema_file_lock(engine: AsyncEngine):
+    """Lock exclusivo `<base>.init.lock` para bases SQLite en archivo."""
+    database = engine.url.database
+    if engine.url.get_backend_name() != "sqlite" or database in (None, "", ":memory:"):
+        yield
+        return
+
+    fd = os.open(f"{database}.init.lock", os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        # flock bloquea: se espera en un hilo para no detener el event loop
+        await asyncio.to_thread(fcntl.flock, fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        # Cerrar el descriptor libera el lock
+        os.close(fd)
+
+
+def create_missing_columns(conn):
+    """create_all tampoco agrega columnas nuevas (nullables) a tablas existentes."""
+    inspector = inspect(conn)
+    for table in SQLModel.metadata.sorted_tables:
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable:
+                continue
+            if isinstance(column.type, SchemaType):
+                # Tipos con objeto propio (enum nativo de PostgreSQL): create_all
+                # solo los crea junto con su tabla
+                column.type.create(conn, checkfirst=True)
+            column_type = column.type.compile(dialect=conn.dialect)
+            conn.execute(
+                text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}")
+            )
+
+
+def create_missing_indexes(conn):
+    """create_all no agrega índices nuevos a tablas que ya existen."""
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
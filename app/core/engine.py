@@ -0,0 +1,76 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from app.settings import Settings
+
+
+def create_db_engine(settings: Settings) -> AsyncEngine:
+    """
+    Crea el motor según el backend de `database_url`: SQLite (aiosqlite) con
+    WAL y pragmas aplicados en cada conexión, o PostgreSQL (asyncpg) con pool
+    configurable. Cambiar de backend solo requiere cambiar la URL.
+    """
+    url = make_url(settings.database_url)
+
+    if url.get_backend_name() == "sqlite":
+        return _create_sqlite_engine(settings, url)
+
+    connect_args = {}
+    if url.get_driver_name() == "asyncpg":
+        # Caché de sentencias preparadas de asyncpg y de SQLAlchemy; con
+        # pgbouncer en modo transacción debe ser 0
+        connect_args["statement_cache_size"] = settings.DB_STATEMENT_CACHE_SIZE
+        url = url.update_query_dict(
+            {"prepared_statement_cache_size": str(settings.DB_STATEMENT_CACHE_SIZE)}
+        )
+
+    return create_async_engine(
+        url,
+        connect_args=connect_args,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+
+
+def _create_sqlite_engine(settings: Settings, url) -> AsyncEngine:
+    in_memory = url.database in (None, "", ":memory:")
+    options = {}
+    if not in_memory:
+        # SQLite en memoria usa un pool de una sola conexión
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
+
+    engine = create_async_engine(
+        url,
+        connect_args={
+            "check_same_thread": False,
+            "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000,
+        },
+        **options,
+    )
+
+    pragmas = [
+        f"PRAGMA synchronous = {settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA cache_size = {settings.SQLITE_CACHE_SIZE}",
+        f"PRAGMA mmap_size = {settings.SQLITE_MMAP_SIZE}",
+        f"PRAGMA busy_timeout = {settings.SQLITE_BUSY_TIMEOUT_MS}",
+    ]
+    if not in_memory:
+        # WAL: las lecturas no se bloquean mientras hay una escritura en curso
+        pragmas.insert(0, f"PRAGMA journal_mode = {settings.SQLITE_JOURNAL_MODE}")
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+    return engine
@@ -10,7 +10,12 @@ def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=settings.jwt_expiration)
     to_encode.update(
-        {"exp": expire, "jti": str(uuid.uuid4())}  # identificador único del token
+        {
+            "exp": expire,
+            # emisión: hasta JWT_CLAIMS_MAX_AGE se confía en los claims
+            "iat": datetime.utcnow(),
+            "jti": str(uuid.uuid4()),  # identificador único del token
+        }
     )
     encoded_jwt = jwt.encode(
         to_encode, settings.jwt_secret, algorithm=settings.jwt_algorithm
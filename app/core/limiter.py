@@ -1,4 +1,245 @@
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+import fcntl
+import math
+import mmap
+import os
+import re
+import struct
+import time
+import zlib
+from typing import Callable, Dict, NamedTuple, Optional, Tuple, Union
 
-limiter = Limiter(key_func=get_remote_address, default_limits=["100/minute"])
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+RATE_PATTERN = re.compile(r"^\s*(\d+)\s*/\s*(\d*)\s*(second|minute|hour|day)s?\s*$")
+
+# Código de cierre de WebSocket al superar el límite ("Try Again Later")
+RATE_LIMITED_CLOSE_CODE = 1013
+
+
+class Rate(NamedTuple):
+    """`count` peticiones por `period` segundos, con ráfagas de hasta `count`."""
+
+    count: int
+    period: float
+
+    @property
+    def interval(self) -> float:
+        return self.period / self.count
+
+    @property
+    def tolerance(self) -> float:
+        return self.period - self.interval
+
+
+def parse_rate(value: str) -> Rate:
+    """Convierte "100/minute", "10/second" o "5/10minutes" en un Rate."""
+    match = RATE_PATTERN.match(value)
+    if not match or int(match.group(1)) <= 0:
+        raise ValueError(f"Límite inválido: {value!r}")
+    count, multiplier, unit = match.groups()
+    return Rate(int(count), int(multiplier or 1) * PERIODS[unit])
+
+
+def gcra(tat: float, now: float, rate: Rate) -> Tuple[float, float]:
+    """
+    Generic Cell Rate Algorithm: a partir del instante teórico de llegada
+    (TAT) guardado para la clave devuelve (nuevo TAT, espera). La petición se
+    admite si la espera es 0; si no, el TAT no cambia.
+    """
+    if tat < now or tat > now + rate.period:
+        # Clave inactiva (o TAT de otro reloj): empieza con la ráfaga completa
+        tat = now
+    wait = tat - rate.tolerance - now
+    if wait > 0:
+        return tat, wait
+    return tat + rate.interval, 0.0
+
+
+class MemoryStore:
+    """
+    TAT por clave en un dict del proceso. Las claves cuyo TAT ya pasó están
+    en reposo (equivalen a no tener estado) y se barren cada `sweep_interval`.
+    """
+
+    sweep_interval: float
+
+    def __init__(self, *, sweep_interval: float = 60.0):
+        self.sweep_interval = sweep_interval
+        self._tat: Dict[str, float] = {}
+        self._next_sweep = time.monotonic() + sweep_interval
+
+    def __len__(self) -> int:
+        return len(self._tat)
+
+    def acquire(self, key: str, rate: Rate, now: float) -> float:
+        tat, wait = gcra(self._tat.get(key, now), now, rate)
+        if not wait:
+            self._tat[key] = tat
+        if now >= self._next_sweep:
+            self._sweep(now)
+        return wait
+
+    def close(self): ...
+
+    def _sweep(self, now: float):
+        self._tat = {key: tat for key, tat in self._tat.items() if tat > now}
+        self._next_sweep = now + self.sweep_interval
+
+
+class SharedStore:
+    """
+    Estado compartido por los workers de un host: una tabla de `slots` TAT
+    en un archivo mapeado en memoria (por ejemplo en /dev/shm). Cada clave
+    ocupa un slot según su hash; dos claves que colisionan comparten límite,
+    así que nunca se admite de más. Cada actualización bloquea solo su slot.
+
+    Usa time.monotonic(), que en Linux es el mismo reloj para todos los
+    procesos.
+    """
+
+    SLOT = struct.Struct("d")
+
+    path: str
+    slots: int
+
+    def __init__(self, *, path: str, slots: int):
+        self.path = path
+        self.slots = slots
+        size = slots * self.SLOT.size
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._fd).st_size < size:
+            os.ftruncate(self._fd, size)
+        self._map = mmap.mmap(self._fd, size)
+
+    def acquire(self, key: str, rate: Rate, now: float) -> float:
+        offset = zlib.crc32(key.encode()) % self.slots * self.SLOT.size
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, self.SLOT.size, offset)
+        try:
+            (tat,) = self.SLOT.unpack_from(self._map, offset)
+            tat, wait = gcra(tat, now, rate)
+            if not wait:
+                self.SLOT.pack_into(self._map, offset, tat)
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, self.SLOT.size, offset)
+        return wait
+
+    def close(self):
+        self._map.close()
+        os.close(self._fd)
+
+
+Store = Union[MemoryStore, SharedStore]
+
+
+class Throttle:
+    """Límite GCRA de un único emisor (por ejemplo un socket), sin almacén."""
+
+    rate: Rate
+
+    def __init__(self, rate: Rate):
+        self.rate = rate
+        self._tat = 0.0
+
+    def acquire(self) -> float:
+        """Segundos a esperar; 0 si se admite."""
+        tat, wait = gcra(self._tat, time.monotonic(), self.rate)
+        if not wait:
+            self._tat = tat
+        return wait
+
+
+def client_ip(scope: Scope) -> str:
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+async def by_ip(request: Request) -> str:
+    """Clave de límite por dirección IP."""
+    return f"ip:{client_ip(request.scope)}"
+
+
+class RateLimiter:
+    """
+    Limitador GCRA en proceso: un float por clave, O(1) por petición.
+
+    `default` se aplica por IP a todas las peticiones HTTP y handshakes de
+    WebSocket (RateLimitMiddleware). `limit` crea dependencias para límites
+    propios de una ruta, por IP, usuario o sesión.
+    """
+
+    enabled: bool
+    default: Optional[Rate]
+    store: Store
+
+    def __init__(self):
+        self.enabled = True
+        self.default = parse_rate("100/minute")
+        self.store = MemoryStore()
+
+    def configure(self, *, enabled: bool, default: Optional[str], store: Store):
+        self.store.close()
+        self.enabled = enabled
+        self.default = parse_rate(default) if default else None
+        self.store = store
+
+    def hit(self, key: str, rate: Rate) -> float:
+        """Registra una petición; devuelve los segundos a esperar (0 si se admite)."""
+        if not self.enabled:
+            return 0.0
+        return self.store.acquire(key, rate, time.monotonic())
+
+    def limit(
+        self,
+        rate: str,
+        *,
+        scope: str,
+        key: Callable[..., str] = by_ip,
+    ) -> Callable:
+        """Dependencia que aplica `rate` a la clave devuelta por `key`."""
+        parsed = parse_rate(rate)
+
+        async def dependency(identity: str = Depends(key)):
+            wait = self.hit(f"{scope}:{identity}", parsed)
+            if wait:
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="rate_limit_exceeded",
+                    headers={"Retry-After": str(math.ceil(wait))},
+                )
+
+        return dependency
+
+
+class RateLimitMiddleware:
+    """Middleware ASGI que aplica el límite por defecto del limitador."""
+
+    def __init__(self, app: ASGIApp, *, limiter: RateLimiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        limiter = self.limiter
+        if scope["type"] not in ("http", "websocket") or limiter.default is None:
+            return await self.app(scope, receive, send)
+
+        wait = limiter.hit(f"default:ip:{client_ip(scope)}", limiter.default)
+        if not wait:
+            return await self.app(scope, receive, send)
+
+        if scope["type"] == "websocket":
+            await send({"type": "websocket.close", "code": RATE_LIMITED_CLOSE_CODE})
+            return
+
+        response = JSONResponse(
+            {"detail": "rate_limit_exceeded"},
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
+        await response(scope, receive, send)
+
+
+limiter = RateLimiter()
@@ -0,0 +1,218 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.login_attempt import LoginAttempt
+
+logger = logging.getLogger(__name__)
+
+# (usuario, IP)
+Key = Tuple[str, str]
+
+
+class LoginThrottle:
+    """
+    Bloqueo de logins por fallos consecutivos de un usuario desde una IP.
+
+    Por clave solo se guardan en memoria los fallos consecutivos y el
+    instante del último, así que consultar y registrar un intento es O(1).
+    Desde `max_failures` fallos la clave queda bloqueada 1, 2, 4... minutos
+    (hasta `max_block` segundos); los intentos bloqueados no se registran y
+    un login correcto borra la clave.
+
+    Los intentos se escriben en la tabla por lotes desde una tarea en segundo
+    plano, que además purga las filas y claves más antiguas que `retention`.
+    Al arrancar, los contadores se reconstruyen desde la tabla.
+
+    El usuario de la clave lo elige quien intenta entrar: se guardan a lo
+    sumo `max_keys` claves y al superarlas se descartan las de fallos más
+    antiguos.
+    """
+
+    enabled: bool
+    max_failures: int
+    max_block: float
+    retention: float
+    flush_interval: float
+    prune_interval: float
+    max_pending: int
+    max_keys: int
+
+    def __init__(self):
+        self.enabled = False
+        self.max_failures = 5
+        self.max_block = 86400.0
+        self.retention = 86400.0
+        self.flush_interval = 1.0
+        self.prune_interval = 300.0
+        self.max_pending = 10000
+        self.max_keys = 100000
+        # clave -> (fallos consecutivos, último fallo en segundos epoch), de la
+        # del fallo más antiguo a la del más reciente
+        self._failures: OrderedDict[Key, Tuple[int, float]] = OrderedDict()
+        self._pending: List[LoginAttempt] = []
+        self._engine: Optional[AsyncEngine] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+
+    def __len__(self) -> int:
+        return len(self._failures)
+
+    def blocked_for(self, username: str, ip: str) -> float:
+        """Segundos que faltan para poder volver a intentar; 0 si no hay bloqueo."""
+        entry = self._failures.get((username, ip))
+        if not self.enabled or entry is None:
+            return 0.0
+        failures, last_failure = entry
+        if failures < self.max_failures:
+            return 0.0
+        exponent = min(failures - self.max_failures, 32)
+        block = min(60 * 2**exponent, self.max_block)
+        return max(last_failure + block - time.time(), 0.0)
+
+    def record(self, username: str, ip: str, *, success: bool):
+        """Actualiza el contador de la clave y encola el intento para la tabla."""
+        if not self.enabled:
+            return
+
+        key = (username, ip)
+        now = time.time()
+        if success:
+            self._failures.pop(key, None)
+        else:
+            failures, last_failure = self._failures.get(key, (0, now))
+            if now - last_failure > self.retention:
+                failures = 0
+            self._set_failures(key, failures + 1, now)
+
+        self._pending.append(
+            LoginAttempt(username=username, ip_address=ip, success=success)
+        )
+        if len(self._pending) >= self.max_pending:
+            self._wake.set()
+
+    async def start(
+        self,
+        engine: AsyncEngine,
+        *,
+        max_failures: int,
+        max_block: float,
+        retention: float,
+        flush_interval: float,
+        prune_interval: float,
+        max_keys: int,
+    ):
+        """Purga, reconstruye los contadores e inicia la escritura por lotes."""
+        self._engine = engine
+        self.max_failures = max_failures
+        self.max_block = max_block
+        self.retention = retention
+        self.flush_interval = flush_interval
+        self.prune_interval = prune_interval
+        self.max_keys = max_keys
+        self._pending = []
+        await self.prune()
+        await self.load()
+        self._wake = asyncio.Event()
+        self.enabled = True
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Deja de registrar intentos y escribe los pendientes."""
+        if not self.enabled:
+            return
+        self.enabled = False
+        self._wake.set()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        await self.flush()
+
+    async def load(self):
+        """Reconstruye los fallos consecutivos desde los intentos retenidos."""
+        stmt = (
+            select(
+                LoginAttempt.username,
+                LoginAttempt.ip_address,
+                LoginAttempt.success,
+                LoginAttempt.timestamp,
+            )
+            .where(LoginAttempt.timestamp >= self._cutoff())
+            .order_by(LoginAttempt.timestamp)
+        )
+        async with AsyncSession(self._engine) as session:
+            rows = (await session.exec(stmt)).all()
+
+        self._failures.clear()
+        for username, ip, success, timestamp in rows:
+            key = (username, ip)
+            if success:
+                self._failures.pop(key, None)
+                continue
+            failures, _ = self._failures.get(key, (0, 0.0))
+            # Los timestamps de la tabla son UTC sin zona
+            epoch = timestamp.replace(tzinfo=timezone.utc).timestamp()
+            self._set_failures(key, failures + 1, epoch)
+
+    async def flush(self):
+        """Inserta en una sola transacción los intentos pendientes."""
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        try:
+            async with AsyncSession(self._engine) as session:
+                session.add_all(batch)
+                await session.commit()
+        except Exception:
+            logger.exception("Error al guardar %d intentos de login", len(batch))
+            # Se reintentan en el próximo lote, sin superar max_pending
+            self._pending = (batch + self._pending)[-self.max_pending :]
+
+    async def prune(self):
+        """Elimina las filas y contadores más antiguos que `retention`."""
+        async with AsyncSession(self._engine) as session:
+            await session.exec(
+                delete(LoginAttempt).where(LoginAttempt.timestamp < self._cutoff())
+            )
+            await session.commit()
+
+        oldest = time.time() - self.retention
+        self._failures = OrderedDict(
+            (key, entry) for key, entry in self._failures.items() if entry[1] >= oldest
+        )
+
+    def _set_failures(self, key: Key, failures: int, last_failure: float):
+        self._failures[key] = (failures, last_failure)
+        self._failures.move_to_end(key)
+        while len(self._failures) > self.max_keys:
+            self._failures.popitem(last=False)
+
+    def _cutoff(self) -> datetime:
+        return datetime.utcnow() - timedelta(seconds=self.retention)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_prune = loop.time() + self.prune_interval
+        while self.enabled:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+            if loop.time() >= next_prune:
+                try:
+                    await self.prune()
+                except Exception:
+                    logger.exception("Error al purgar los intentos de login")
+                next_prune = loop.time() + self.prune_interval
+
+
+login_throttle = LoginThrottle()
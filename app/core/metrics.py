@@ -0,0 +1,339 @@
+import asyncio
+import logging
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+Labels = Tuple[str, ...]
+
+# Segundos: de 0,5 ms a 10 s
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+STATEMENT_TYPES = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Labels) -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """Contador monótono por combinación de etiquetas."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in list(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Gauge:
+    """
+    Valor instantáneo. Con `collect` los valores se leen al exportar: la
+    función devuelve pares (etiquetas, valor) y no hay costo en el camino
+    caliente.
+    """
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        *,
+        collect: Optional[Callable[[], Iterable[Tuple[Labels, float]]]] = None,
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+        self._values: Dict[Labels, float] = {}
+
+    def set(self, value: float, *labels: str):
+        self._values[labels] = value
+
+    def samples(self) -> Iterable[str]:
+        values = self.collect() if self.collect else self._values.items()
+        for labels, value in values:
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Histogram:
+    """
+    Histograma de buckets fijos. `observe` hace una búsqueda binaria e
+    incrementa un solo contador; los acumulados se calculan al exportar.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        *,
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # etiquetas -> [conteo por bucket (+Inf al final), suma]
+        self._series: Dict[Labels, list] = {}
+
+    def observe(self, value: float, *labels: str):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def samples(self) -> Iterable[str]:
+        bounds = [f'le="{bound}"' for bound in self.buckets] + ['le="+Inf"']
+        for labels, (counts, total) in list(self._series.items()):
+            plain = _format_labels(self.labelnames, labels)
+            prefix = (
+                f"{self.name}_bucket{plain[:-1]}," if plain else f"{self.name}_bucket{{"
+            )
+            cumulative = 0
+            for le, count in zip(bounds, counts):
+                cumulative += count
+                yield f"{prefix}{le}}} {cumulative}"
+            yield f"{self.name}_sum{plain} {_format_value(total)}"
+            yield f"{self.name}_count{plain} {cumulative}"
+
+
+class Registry:
+    """Métricas del proceso, exportadas en el formato de texto de Prometheus."""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Métrica duplicada: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(
+        self, name: str, help: str, labelnames: Sequence[str] = (), **kw
+    ) -> Gauge:
+        return self.register(Gauge(name, help, labelnames, **kw))
+
+    def histogram(
+        self, name: str, help: str, labelnames: Sequence[str] = (), **kw
+    ) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, **kw))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            try:
+                lines.extend(metric.samples())
+            except Exception:
+                logger.exception("Error al exportar la métrica %s", metric.name)
+        return "\n".join(lines) + "\n"
+
+
+metrics = Registry()
+
+HTTP_REQUEST_DURATION = metrics.histogram(
+    "http_request_duration_seconds",
+    "Duración de las peticiones HTTP por ruta y estado.",
+    ("method", "route", "status"),
+)
+DB_QUERY_DURATION = metrics.histogram(
+    "db_query_duration_seconds",
+    "Duración de las sentencias SQL por tipo.",
+    ("statement",),
+)
+DB_QUERIES_PER_REQUEST = metrics.histogram(
+    "http_request_db_queries",
+    "Sentencias SQL ejecutadas por petición HTTP.",
+    ("method", "route"),
+    buckets=COUNT_BUCKETS,
+)
+DB_SLOW_QUERIES = metrics.counter(
+    "db_slow_queries_total",
+    "Sentencias SQL que superaron SQL_SLOW_QUERY_MS.",
+    ("statement",),
+)
+BROADCAST_DURATION = metrics.histogram(
+    "ws_broadcast_duration_seconds",
+    "Duración de un broadcast: serialización, encolado local y publicación.",
+)
+BROADCAST_RECIPIENTS = metrics.histogram(
+    "ws_broadcast_recipients",
+    "Sockets locales que reciben cada broadcast.",
+    buckets=COUNT_BUCKETS,
+)
+CENSORSHIP_DURATION = metrics.histogram(
+    "censorship_duration_seconds",
+    "Duración del filtro de groserías por nivel de censura.",
+    ("level",),
+)
+EVENT_LOOP_LAG = metrics.histogram(
+    "event_loop_lag_seconds",
+    "Retraso del event loop al despertar un sleep.",
+)
+WS_DROPPED_MESSAGES = metrics.counter(
+    "ws_dropped_messages_total",
+    "Frames descartados por la política de desborde de las colas de salida.",
+    ("policy",),
+)
+WS_COALESCED_MESSAGES = metrics.counter(
+    "ws_coalesced_messages_total",
+    "Mensajes fusionados en un frame con la política coalesce.",
+)
+WS_SLOW_CONSUMER_CLOSES = metrics.counter(
+    "ws_slow_consumer_closes_total",
+    "WebSockets cerrados con 1013 por no consumir a tiempo.",
+    ("reason",),
+)
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mide cada petición HTTP hasta enviar el último byte.
+    La ruta es la plantilla (/messages/{session_id}); las peticiones que no
+    coinciden con ninguna ruta se agrupan como "unmatched".
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = "500"
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - start,
+                scope["method"],
+                route.path if route is not None else "unmatched",
+                status,
+            )
+
+
+QueryCallback = Callable[[str, Any, bool, float], None]
+
+
+def instrument_engine(engine: AsyncEngine, *, on_query: Optional[QueryCallback] = None):
+    """
+    Mide cada sentencia del motor por tipo (SELECT, INSERT, UPDATE, DELETE u
+    OTHER). Tener listeners de cursor hace que SQLAlchemy tome un camino más
+    lento: unos 8 µs más por consulta. `on_query(statement, parameters,
+    executemany, duration)` recibe además cada sentencia ya medida.
+    """
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        context._query_start = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - context._query_start
+        DB_QUERY_DURATION.observe(duration, statement_type(statement))
+        if on_query is not None:
+            on_query(statement, parameters, executemany, duration)
+
+
+def statement_type(statement: str) -> str:
+    keyword = statement.lstrip()[:6].upper()
+    return keyword if keyword in STATEMENT_TYPES else "OTHER"
+
+
+class LoopLagMonitor:
+    """Duerme `interval` segundos en bucle y registra cuánto tarda de más en despertar."""
+
+    interval: float
+
+    def __init__(self):
+        self.interval = 0.5
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, *, interval: float):
+        self.interval = interval
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            EVENT_LOOP_LAG.observe(max(loop.time() - start - self.interval, 0.0))
+
+
+loop_lag_monitor = LoopLagMonitor()
@@ -0,0 +1,29 @@
+import base64
+import json
+from datetime import datetime
+from typing import Literal, Tuple
+from uuid import UUID
+
+CursorDirection = Literal["next", "prev"]
+
+
+def encode_cursor(*, timestamp: datetime, id: UUID, direction: CursorDirection) -> str:
+    """Codifica la posición (timestamp, id) como un cursor opaco."""
+    raw = json.dumps(
+        {"t": timestamp.isoformat(), "i": str(id), "d": direction},
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID, CursorDirection]:
+    """Decodifica un cursor. Lanza ValueError si el cursor no es válido."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        direction = data["d"]
+        if direction not in ("next", "prev"):
+            raise ValueError(direction)
+        return datetime.fromisoformat(data["t"]), UUID(data["i"]), direction
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError("invalid_cursor") from e
@@ -0,0 +1,240 @@
+import re
+import sys
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Sustituciones que se aceptan por cada letra de la lista (leetspeak)
+CHARS_MAPPING = {
+    "a": ("a", "@", "*", "4"),
+    "i": ("i", "*", "l", "1"),
+    "o": ("o", "*", "0", "@"),
+    "u": ("u", "*", "v"),
+    "v": ("v", "*", "u"),
+    "l": ("l", "1"),
+    "e": ("e", "*", "3"),
+    "s": ("s", "$", "5"),
+    "t": ("t", "7"),
+}
+
+# Caracteres que forman parte de una palabra además de letras y marcas
+EXTRA_WORD_CHARACTERS = "0123456789@$*\"'"
+WORD_CATEGORIES = ("Ll", "Lu", "Mn", "Mc")
+
+DEAD_STATE = 0
+
+
+@lru_cache
+def _word_pattern() -> re.Pattern:
+    """Expresión que reconoce palabras: letras, marcas, dígitos y @$*\"'."""
+    codes = [ord(c) for c in EXTRA_WORD_CHARACTERS]
+    codes.extend(
+        i
+        for i in range(sys.maxunicode + 1)
+        if unicodedata.category(chr(i)) in WORD_CATEGORIES
+    )
+    codes = sorted(set(codes))
+
+    ranges = []
+    start = prev = codes[0]
+    for code in codes[1:]:
+        if code != prev + 1:
+            ranges.append((start, prev))
+            start = code
+        prev = code
+    ranges.append((start, prev))
+
+    char_class = "".join(
+        f"\\U{a:08x}" if a == b else f"\\U{a:08x}-\\U{b:08x}" for a, b in ranges
+    )
+    return re.compile(f"[{char_class}]+")
+
+
+def _non_word_characters(word: str) -> int:
+    return len(word) - sum(len(m) for m in _word_pattern().findall(word))
+
+
+class ProfanityFilter:
+    """
+    Filtro de palabras ofensivas compilado una sola vez.
+
+    Las palabras se compilan en un trie cuyas transiciones aceptan las
+    sustituciones de CHARS_MAPPING y que se determiniza bajo demanda, de modo
+    que cada carácter del texto cuesta una búsqueda en un diccionario.
+    Reproduce la semántica de better_profanity: coincidencia por palabra
+    completa, frases de varias palabras (con o sin separadores) y reemplazo
+    por cuatro caracteres de censura.
+    """
+
+    censor_char: str
+    max_number_combinations: int
+
+    def __init__(self, words: Optional[Iterable[str]] = None, censor_char: str = "*"):
+        self.censor_char = censor_char
+        self.load_censor_words(words=words or [])
+
+    def load_censor_words_from_file(self, filename: str):
+        """Carga (reemplazando) la lista de palabras desde un archivo."""
+        with open(filename, encoding="utf-8") as wordlist_file:
+            words = [row.strip() for row in wordlist_file if row.strip()]
+        self.load_censor_words(words=words)
+
+    def load_censor_words(self, *, words: Iterable[str]):
+        """Compila el autómata para la lista de palabras."""
+        # Trie no determinista: nodo -> {letra de la lista: nodo hijo}
+        children: List[Dict[str, int]] = [{}]
+        terminal = [False]
+        self.max_number_combinations = 1
+
+        for word in {w.lower() for w in words}:
+            self.max_number_combinations = max(
+                self.max_number_combinations, _non_word_characters(word)
+            )
+            node = 0
+            for char in word:
+                if char not in children[node]:
+                    children.append({})
+                    terminal.append(False)
+                    children[node][char] = len(children) - 1
+                node = children[node][char]
+            terminal[node] = True
+
+        # Carácter del texto -> letras de la lista que puede representar
+        aliases: Dict[str, Tuple[str, ...]] = {}
+        for letter, substitutes in CHARS_MAPPING.items():
+            for substitute in substitutes:
+                aliases.setdefault(substitute, (substitute,))
+                if letter not in aliases[substitute]:
+                    aliases[substitute] += (letter,)
+
+        self._children = children
+        self._terminal = terminal
+        self._aliases = aliases
+        # Caracteres que pueden avanzar el autómata; el resto lleva siempre al
+        # estado muerto y no se guarda como transición (así el caché no crece
+        # con cada carácter Unicode distinto que llegue en un mensaje)
+        letters = {letter for node in children for letter in node}
+        self._alphabet = letters | {
+            char for char, targets in aliases.items() if letters.intersection(targets)
+        }
+
+        # Autómata determinista construido de forma perezosa
+        self._state_ids: Dict[frozenset, int] = {frozenset(): DEAD_STATE}
+        self._states: List[frozenset] = [frozenset()]
+        self._transitions: List[Dict[str, int]] = [{}]
+        self._accepting: List[bool] = [False]
+        self._start = self._state_for(frozenset({0}))
+
+    def censor(self, text: str) -> str:
+        """Reemplaza las palabras ofensivas por caracteres de censura."""
+        if not isinstance(text, str):
+            text = str(text)
+
+        replacement = self.censor_char * 4
+        parts = []
+        last = 0
+        for start, end in self._matches(text):
+            parts.append(text[last:start])
+            parts.append(replacement)
+            last = end
+
+        if not parts:
+            return text
+
+        parts.append(text[last:])
+        return "".join(parts)
+
+    def contains_profanity(self, text: str) -> bool:
+        """Indica si el texto contiene alguna palabra ofensiva."""
+        if not isinstance(text, str):
+            text = str(text)
+
+        replacement = self.censor_char * 4
+        for start, end in self._matches(text):
+            if text[start:end] != replacement:
+                return True
+        return False
+
+    def _matches(self, text: str):
+        """Genera los rangos (inicio, fin) a censurar en una sola pasada."""
+        spans = [m.span() for m in _word_pattern().finditer(text)]
+
+        # Sin palabras (o con una sola letra final) el texto no se procesa
+        if not spans or spans[0][0] >= len(text) - 1:
+            return
+
+        # Una palabra de un carácter al final no participa en frases
+        visible = len(spans)
+        if spans[-1][0] >= len(text) - 1:
+            visible -= 1
+
+        step = self._step
+        accepting = self._accepting
+        index = 0
+        while index < len(spans):
+            start, end = spans[index]
+
+            phrase = sep_phrase = self._start
+            for char in text[start:end].lower():
+                phrase = step(phrase, char)
+                if phrase == DEAD_STATE:
+                    break
+            sep_phrase = phrase
+            single = accepting[phrase]
+
+            # Frases de varias palabras, la más corta primero
+            matched = None
+            last_end = end
+            limit = min(visible, index + 1 + self.max_number_combinations)
+            for following in range(index + 1, limit):
+                if phrase == DEAD_STATE and sep_phrase == DEAD_STATE:
+                    break
+                next_start, next_end = spans[following]
+
+                for char in text[last_end:next_start].lower():
+                    sep_phrase = step(sep_phrase, char)
+                for char in text[next_start:next_end].lower():
+                    phrase = step(phrase, char)
+                    sep_phrase = step(sep_phrase, char)
+
+                if accepting[phrase] or accepting[sep_phrase]:
+                    matched = following
+                    break
+                last_end = next_end
+
+            if matched is not None:
+                yield start, spans[matched][1]
+                index = matched + 1
+                continue
+
+            if single:
+                yield start, end
+            index += 1
+
+    def _step(self, state: int, char: str) -> int:
+        next_state = self._transitions[state].get(char)
+        if next_state is None:
+            if char not in self._alphabet:
+                return DEAD_STATE
+            nodes = frozenset(
+                child
+                for node in self._states[state]
+                for letter in self._aliases.get(char, (char,))
+                if (child := self._children[node].get(letter)) is not None
+            )
+            next_state = self._state_for(nodes)
+            self._transitions[state][char] = next_state
+        return next_state
+
+    def _state_for(self, nodes: frozenset) -> int:
+        state = self._state_ids.get(nodes)
+        if state is None:
+            state = len(self._states)
+            self._state_ids[nodes] = state
+            self._states.append(nodes)
+            self._transitions.append({})
+            self._accepting.append(any(self._terminal[n] for n in nodes))
+        return state
+
+
+profanity = ProfanityFilter()
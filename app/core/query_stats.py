@@ -0,0 +1,157 @@
+import logging
+import re
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import DB_QUERIES_PER_REQUEST, DB_SLOW_QUERIES, statement_type
+
+logger = logging.getLogger(__name__)
+
+# Listas de marcadores (IN (?, ?, ?), VALUES ($1, $2)) colapsadas: la misma
+# consulta con otra cantidad de elementos tiene la misma forma
+_PLACEHOLDER_LIST = re.compile(
+    r"\(\s*(?:\?|\$\d+|%s|:\w+)(?:\s*,\s*(?:\?|\$\d+|%s|:\w+))+\s*\)"
+)
+_MAX_STATEMENT_LOG = 500
+
+
+class RequestQueries:
+    """Consultas de una petición: cantidad, tiempo total y repeticiones por sentencia."""
+
+    __slots__ = ("count", "duration", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Dict[str, int] = {}
+
+    def shapes(self) -> Dict[str, int]:
+        """Repeticiones por forma de la sentencia (se normaliza recién aquí)."""
+        shapes: Dict[str, int] = {}
+        for statement, count in self.statements.items():
+            shape = statement_shape(statement)
+            shapes[shape] = shapes.get(shape, 0) + count
+        return shapes
+
+
+_current: ContextVar[Optional[RequestQueries]] = ContextVar(
+    "request_queries", default=None
+)
+
+
+def statement_shape(statement: str) -> str:
+    return _PLACEHOLDER_LIST.sub("(?, ...)", " ".join(statement.split()))
+
+
+def redact(parameters: Any, executemany: bool = False) -> Any:
+    """Parámetros sin sus valores: solo el tipo de cada uno."""
+    if executemany:
+        rows = list(parameters or ())
+        return f"{len(rows)} x {redact(rows[0]) if rows else ()}"
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+class QueryMonitor:
+    """
+    Recibe cada sentencia de instrument_engine: registra las lentas (sin los
+    valores de los parámetros) y las suma a la petición en curso, si la hay.
+    Las consultas de tareas de fondo (p. ej. el group commit) no se atribuyen
+    a ninguna petición.
+    """
+
+    slow_threshold: float
+    n_plus_one_threshold: int
+
+    def __init__(self):
+        self.slow_threshold = 0.1
+        self.n_plus_one_threshold = 5
+
+    def configure(self, *, slow_threshold: float, n_plus_one_threshold: int):
+        self.slow_threshold = slow_threshold
+        self.n_plus_one_threshold = n_plus_one_threshold
+
+    def record(
+        self, statement: str, parameters: Any, executemany: bool, duration: float
+    ):
+        if duration >= self.slow_threshold:
+            DB_SLOW_QUERIES.inc(statement_type(statement))
+            logger.warning(
+                "Consulta lenta (%.1f ms): %s parámetros=%s",
+                duration * 1e3,
+                " ".join(statement.split())[:_MAX_STATEMENT_LOG],
+                redact(parameters, executemany),
+            )
+        queries = _current.get()
+        if queries is not None:
+            queries.count += 1
+            queries.duration += duration
+            queries.statements[statement] = queries.statements.get(statement, 0) + 1
+
+    def finish(self, queries: RequestQueries, method: str, route: str):
+        DB_QUERIES_PER_REQUEST.observe(queries.count, method, route)
+        if queries.count < self.n_plus_one_threshold:
+            return
+        for shape, count in queries.shapes().items():
+            if count >= self.n_plus_one_threshold:
+                logger.warning(
+                    "Posible N+1 en %s %s: %d ejecuciones de %s",
+                    method,
+                    route,
+                    count,
+                    shape[:_MAX_STATEMENT_LOG],
+                )
+
+
+query_monitor = QueryMonitor()
+
+
+class QueryStatsMiddleware:
+    """
+    Cuenta las consultas y el tiempo de base de cada petición HTTP. Con
+    `server_timing` los agrega a la respuesta como `Server-Timing: db;dur=<ms>;
+    desc="<n> queries"` (lo ejecutado hasta enviar las cabeceras).
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        monitor: QueryMonitor = query_monitor,
+        server_timing: bool = True,
+    ):
+        self.app = app
+        self.monitor = monitor
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        queries = RequestQueries()
+        token = _current.set(queries)
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start" and self.server_timing:
+                MutableHeaders(scope=message).append(
+                    "Server-Timing",
+                    f'db;dur={queries.duration * 1e3:.2f};desc="{queries.count} queries"',
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            self.monitor.finish(
+                queries,
+                scope["method"],
+                route.path if route is not None else "unmatched",
+            )
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import and_, delete, or_
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.revoked_token import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+# Margen al releer revocaciones de otros workers: cubre filas cuyo
+# revoked_at es anterior al momento en que su commit se hizo visible
+SYNC_OVERLAP = timedelta(seconds=60)
+
+
+class RevocationIndex:
+    """
+    Índice en memoria de los JTI revocados y aún no vencidos.
+
+    La consulta `is_revoked` no hace I/O. Una tarea en segundo plano relee
+    periódicamente las revocaciones hechas por otros workers y elimina de la
+    tabla y del índice los tokens cuyo `exp` ya pasó.
+    """
+
+    token_lifetime: timedelta
+    sync_interval: float
+    prune_interval: float
+
+    def __init__(self):
+        self.token_lifetime = timedelta(minutes=30)
+        self.sync_interval = 5.0
+        self.prune_interval = 300.0
+        # jti -> vencimiento del token
+        self._expiry: Dict[str, datetime] = {}
+        self._engine: Optional[AsyncEngine] = None
+        self._task: Optional[asyncio.Task] = None
+        self._synced_at: Optional[datetime] = None
+
+    def __len__(self) -> int:
+        return len(self._expiry)
+
+    def add(self, jti: str, exp: Optional[datetime]):
+        self._expiry[jti] = exp or datetime.utcnow() + self.token_lifetime
+
+    def is_revoked(self, jti: str) -> bool:
+        return jti in self._expiry
+
+    async def start(
+        self,
+        engine: AsyncEngine,
+        *,
+        token_lifetime: timedelta,
+        sync_interval: float,
+        prune_interval: float,
+    ):
+        """Carga las revocaciones vigentes e inicia la sincronización."""
+        self._engine = engine
+        self.token_lifetime = token_lifetime
+        self.sync_interval = sync_interval
+        self.prune_interval = prune_interval
+        self._expiry.clear()
+        self._synced_at = None
+        await self.prune()
+        await self.sync()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def sync(self):
+        """Incorpora las revocaciones registradas desde la última lectura."""
+        started_at = datetime.utcnow()
+        stmt = select(RevokedToken.jti, RevokedToken.exp, RevokedToken.revoked_at)
+        if self._synced_at:
+            stmt = stmt.where(RevokedToken.revoked_at >= self._synced_at - SYNC_OVERLAP)
+
+        async with AsyncSession(self._engine) as session:
+            rows = (await session.exec(stmt)).all()
+
+        for jti, exp, revoked_at in rows:
+            # Filas previas a la columna exp: el token no vive más que su duración
+            self._expiry[jti] = exp or revoked_at + self.token_lifetime
+        self._synced_at = started_at
+
+    async def prune(self):
+        """Elimina las revocaciones de tokens que ya vencieron."""
+        now = datetime.utcnow()
+        async with AsyncSession(self._engine) as session:
+            await session.exec(
+                delete(RevokedToken).where(
+                    or_(
+                        RevokedToken.exp < now,
+                        and_(
+                            RevokedToken.exp.is_(None),
+                            RevokedToken.revoked_at < now - self.token_lifetime,
+                        ),
+                    )
+                )
+            )
+            await session.commit()
+
+        self._expiry = {jti: exp for jti, exp in self._expiry.items() if exp >= now}
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_prune = loop.time() + self.prune_interval
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.sync()
+                if loop.time() >= next_prune:
+                    await self.prune()
+                    next_prune = loop.time() + self.prune_interval
+            except Exception:
+                logger.exception("Error al sincronizar los tokens revocados")
+
+
+revocation_index = RevocationIndex()
@@ -0,0 +1,120 @@
+import logging
+import re
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import column, func, literal_column, table, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import OperationalError
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "messages_fts"
+
+# Tabla FTS5 propia (no external content): los rowid de `messages` pueden
+# cambiar con VACUUM, así que el vínculo se hace por message_id. session_id se
+# indexa para que el filtro por sesión se resuelva dentro del índice.
+CREATE_FTS_TABLE = f"""
+CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+    content,
+    session_id,
+    message_id UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+)
+"""
+
+SYNC_TRIGGERS = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON messages BEGIN
+        INSERT INTO {FTS_TABLE}(content, session_id, message_id)
+        VALUES (new.content, new.session_id, new.id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON messages BEGIN
+        DELETE FROM {FTS_TABLE} WHERE message_id = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF content ON messages
+    BEGIN
+        DELETE FROM {FTS_TABLE} WHERE message_id = old.id;
+        INSERT INTO {FTS_TABLE}(content, session_id, message_id)
+        VALUES (new.content, new.session_id, new.id);
+    END
+    """,
+)
+
+BACKFILL = f"""
+INSERT INTO {FTS_TABLE}(content, session_id, message_id)
+SELECT content, session_id, id FROM messages
+"""
+
+TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+messages_fts = table(
+    FTS_TABLE, column("content"), column("session_id"), column("message_id")
+)
+
+
+def build_match_query(search: str) -> Optional[str]:
+    """
+    Convierte el texto de búsqueda en una consulta FTS5 sobre `content`: cada
+    término entre comillas y como prefijo ("hol"* coincide con "hola"), todos
+    requeridos.
+    """
+    terms = TERM_PATTERN.findall(search.lower())
+    if not terms:
+        return None
+    return " ".join(f'content:"{term}"*' for term in terms)
+
+
+class MessageSearchIndex:
+    """Índice de texto completo de mensajes sobre SQLite FTS5."""
+
+    enabled: bool
+
+    def __init__(self):
+        # Hasta que setup confirme soporte se usa el filtro LIKE
+        self.enabled = False
+
+    def setup(self, conn: Connection):
+        """Crea la tabla FTS5 y los triggers de sincronización si el motor lo permite."""
+        self.enabled = False
+
+        if conn.dialect.name != "sqlite":
+            logger.info("Búsqueda FTS5 deshabilitada para %s", conn.dialect.name)
+            return
+
+        exists = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": FTS_TABLE},
+        ).first()
+
+        try:
+            if not exists:
+                conn.execute(text(CREATE_FTS_TABLE))
+                conn.execute(text(BACKFILL))
+            for trigger in SYNC_TRIGGERS:
+                conn.execute(text(trigger))
+        except OperationalError as e:
+            # SQLite compilado sin FTS5: "no such module: fts5"
+            logger.warning("Búsqueda FTS5 deshabilitada: %s", e)
+            return
+
+        self.enabled = True
+
+    def filter(self, query, *, message_id_column, session_id: UUID, match: str):
+        """Restringe la consulta a los mensajes de la sesión que coinciden."""
+        # Los UUID se guardan en SQLite como 32 caracteres hexadecimales
+        scoped = f'session_id:"{session_id.hex}" {match}'
+        return query.join(
+            messages_fts, messages_fts.c.message_id == message_id_column
+        ).where(literal_column(FTS_TABLE).match(scoped))
+
+    def rank(self):
+        """Expresión de relevancia (bm25: menor es más relevante)."""
+        return func.bm25(literal_column(FTS_TABLE))
+
+
+message_search = MessageSearchIndex()
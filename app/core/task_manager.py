@@ -1,4 +1,14 @@
-from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+
+class TaskManagerOverloaded(Exception):
+    """
+    La cola de trabajo de CPU está llena (o el pool se está reponiendo de un
+    proceso caído): la petición se rechaza.
+    """
 
 
 class TaskManager:
@@ -8,10 +18,67 @@ class TaskManager:
         if cls._instance is None:
             cls._instance = super(TaskManager, cls).__new__(cls)
             cls._instance.executor = ThreadPoolExecutor(max_workers=5)
+            cls._instance.cpu_workers = 2
+            cls._instance.cpu_queue_limit = 32
+            cls._instance.cpu_pending = 0
+            cls._instance.cpu_executor = None
         return cls._instance
 
     def add_task(self, func, *args, **kwargs):
         self.executor.submit(func, *args, **kwargs)
 
+    def configure(self, *, cpu_workers: int, cpu_queue_limit: int):
+        """Procesos del pool de CPU y trabajos admitidos a la vez (en cola o en curso)."""
+        self.cpu_workers = cpu_workers
+        self.cpu_queue_limit = cpu_queue_limit
+
+    def start(self):
+        """Levanta el pool de procesos (spawn: no hereda el event loop)."""
+        if self.cpu_executor is None:
+            self.cpu_executor = ProcessPoolExecutor(
+                max_workers=self.cpu_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+    def shutdown(self):
+        if self.cpu_executor is not None:
+            self.cpu_executor.shutdown(wait=True, cancel_futures=True)
+            self.cpu_executor = None
+
+    async def run_cpu(self, func, *args):
+        """
+        Ejecuta `func(*args)` en el pool de procesos sin bloquear el event loop.
+        Si ya hay `cpu_queue_limit` trabajos pendientes falla de inmediato con
+        TaskManagerOverloaded en lugar de encolar sin límite.
+
+        Si un proceso del pool muere (OOM, segfault) el pool queda roto para
+        siempre: se descarta, los trabajos afectados fallan con
+        TaskManagerOverloaded y el siguiente levanta un pool nuevo.
+        """
+        if self.cpu_pending >= self.cpu_queue_limit:
+            raise TaskManagerOverloaded()
+
+        self.start()
+        executor = self.cpu_executor
+        self.cpu_pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                executor, func, *args
+            )
+        except BrokenProcessPool as error:
+            # Los trabajos en curso fallan juntos: solo el primero lo reemplaza
+            if self.cpu_executor is executor:
+                self.cpu_executor = None
+                executor.shutdown(wait=False, cancel_futures=True)
+            raise TaskManagerOverloaded() from error
+        finally:
+            self.cpu_pending -= 1
+
+    def stats(self) -> dict:
+        return {
+            "cpu_pending": self.cpu_pending,
+            "cpu_queue_limit": self.cpu_queue_limit,
+        }
+
 
 manager = TaskManager()
@@ -0,0 +1,74 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import event
+
+from app.models.user import User
+
+
+class UserCache:
+    """
+    Caché en proceso de usuarios autenticados por id, con TTL y tamaño
+    acotado (LRU). Evita consultar la base de datos en cada petición
+    autenticada; el TTL limita cuánto puede tardar en verse un cambio hecho
+    por otro worker.
+    """
+
+    max_size: int
+    ttl: float
+    hits: int
+    misses: int
+
+    def __init__(self, *, max_size: int = 10000, ttl: float = 60.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[UUID, Tuple[float, User]] = OrderedDict()
+
+    def configure(self, *, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clear()
+
+    def get(self, user_id: UUID) -> Optional[User]:
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[user_id]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, user: User):
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+        self._entries[user.id] = (time.monotonic() + self.ttl, user)
+        self._entries.move_to_end(user.id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: UUID):
+        """Descarta el usuario (por ejemplo al modificarlo o desactivarlo)."""
+        self._entries.pop(user_id, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+user_cache = UserCache()
+
+
+# Cualquier cambio de un usuario a través del ORM invalida su entrada
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user(mapper, connection, target: User):
+    user_cache.invalidate(target.id)
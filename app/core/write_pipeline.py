@@ -0,0 +1,114 @@
+import asyncio
+import logging
+from typing import List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.message import Message
+
+logger = logging.getLogger(__name__)
+
+PendingMessage = Tuple[Message, asyncio.Future]
+
+
+class GroupCommitWriter:
+    """
+    Pipeline de escritura por lotes (group commit) para mensajes.
+
+    Las peticiones encolan su mensaje y esperan un future. Una única tarea con
+    una conexión dedicada junta los mensajes que llegan durante `max_delay`
+    segundos (o hasta `max_batch`) y los inserta en una sola transacción, de
+    modo que SQLite hace un commit por lote y no uno por mensaje.
+    """
+
+    enabled: bool
+    max_batch: int
+    max_delay: float
+
+    def __init__(self):
+        self.enabled = False
+        self.max_batch = 100
+        self.max_delay = 0.005
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._connection: Optional[AsyncConnection] = None
+
+    async def start(self, engine: AsyncEngine, *, max_batch: int, max_delay: float):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue = asyncio.Queue(maxsize=max_batch * 10)
+        self._connection = await engine.connect()
+        self._task = asyncio.create_task(self._run())
+        self.enabled = True
+
+    async def stop(self):
+        """Deja de aceptar mensajes y escribe los que estén pendientes."""
+        if not self.enabled:
+            return
+        self.enabled = False
+        await self._queue.join()
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        await self._connection.close()
+
+    async def submit(self, message: Message) -> Message:
+        """Encola el mensaje y espera a que su lote quede confirmado."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((message, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await self._write(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _write(self, batch: List[PendingMessage]):
+        try:
+            await self._commit([message for message, _ in batch])
+        except Exception:
+            # Un mensaje inválido no debe tumbar el lote: se reintenta uno a uno
+            logger.warning("Group commit fallido, reintentando %d filas", len(batch))
+            for message, future in batch:
+                try:
+                    await self._commit([message])
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+                    continue
+                if not future.done():
+                    future.set_result(message)
+            return
+
+        for message, future in batch:
+            if not future.done():
+                future.set_result(message)
+
+    async def _commit(self, messages: List[Message]):
+        async with AsyncSession(
+            bind=self._connection, expire_on_commit=False
+        ) as session:
+            session.add_all(messages)
+            try:
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+
+
+message_writer = GroupCommitWriter()
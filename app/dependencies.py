@@ -1,15 +1,21 @@
 from functools import lru_cache
+import time
 import jwt
-from typing import Annotated, AsyncGenerator
+from typing import Annotated, Optional
+from uuid import UUID
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, WebSocketException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.core import db, connection_manager, task_manager
+from app.core import db, connection_manager, task_manager, write_pipeline
+from app.core.audit_log import audit_log
 from app.core.connection_manager import ConnectionManager
 from app.core.task_manager import TaskManager
+from app.core.user_cache import UserCache, user_cache
+from app.enums.user_role import UserRole
 from app.models.user import User
+from app.schemas.user import TokenUser
 from app.services.audit_service import AuditService
 from app.services.message_service import MessageService
 from app.services.auth_service import AuthService
@@ -27,89 +33,226 @@ def get_task_manager() -> TaskManager:
     return task_manager.manager
 
 
-async def get_auth_service() -> AsyncGenerator[AuthService, None]:
-    async with AsyncSession(db.engine) as session:
-        service = AuthService(session=session)
-        yield service
+def get_user_cache() -> UserCache:
+    return user_cache
 
 
-async def get_session_service() -> AsyncGenerator[SessionService, None]:
-    async with AsyncSession(db.engine) as session:
-        service = SessionService(manager=connection_manager.manager, session=session)
-        yield service
+async def get_auth_service(
+    session: AsyncSession = Depends(db.get_session),
+    tasks: TaskManager = Depends(get_task_manager),
+) -> AuthService:
+    return AuthService(session=session, task_manager=tasks)
+
+
+async def get_session_service(
+    session: AsyncSession = Depends(db.get_session),
+) -> SessionService:
+    return SessionService(manager=connection_manager.manager, session=session)
 
 
 async def get_message_service(
     manager: ConnectionManager = Depends(get_connection_manager),
-) -> AsyncGenerator[MessageService, None]:
-    async with AsyncSession(db.engine) as session:
-        service = MessageService(manager=manager, session=session)
-        yield service
+    session: AsyncSession = Depends(db.get_session),
+) -> MessageService:
+    return MessageService(
+        manager=manager, session=session, writer=write_pipeline.message_writer
+    )
 
 
-async def get_user_service() -> AsyncGenerator[UserService, None]:
-    async with AsyncSession(db.engine) as session:
-        service = UserService(session=session)
-        yield service
+async def get_user_service(
+    session: AsyncSession = Depends(db.get_session),
+) -> UserService:
+    return UserService(session=session)
 
 
-async def get_token_control_service() -> AsyncGenerator[TokenControlService, None]:
-    async with AsyncSession(db.engine) as session:
-        service = TokenControlService(session=session)
-        yield service
+async def get_token_control_service(
+    session: AsyncSession = Depends(db.get_session),
+) -> TokenControlService:
+    return TokenControlService(session=session)
 
 
-async def get_audit_service() -> AsyncGenerator[AuditService, None]:
-    async with AsyncSession(db.engine) as session:
-        service = AuditService(session=session)
-        yield service
+async def get_audit_service() -> AuditService:
+    return AuditService(log=audit_log)
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    user_service: UserService = Depends(get_user_service),
-    token_control_service: TokenControlService = Depends(get_token_control_service),
-    settings: Settings = Depends(get_settings),
-) -> User:
+def invalid_credentials() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid authentication credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+async def verify_token(
+    token: str, *, token_control_service: TokenControlService, settings: Settings
+) -> dict:
+    """Claims del JWT con firma y vencimiento verificados y sin revocar."""
     try:
         payload = jwt.decode(
             token, settings.jwt_secret, algorithms=[settings.jwt_algorithm]
         )
+    except jwt.InvalidTokenError:
+        raise invalid_credentials()
+
+    if await token_control_service.is_token_revoked(jti=payload.get("jti")):
+        raise HTTPException(status_code=401, detail="Token has been revoked")
+
+    return payload
+
 
-        if await token_control_service.is_token_revoked(jti=payload.get("jti")):
-            raise HTTPException(status_code=401, detail="Token has been revoked")
+async def load_user(
+    user_id: str, *, user_service: UserService, cache: UserCache
+) -> User:
+    user = cache.get(UUID(user_id))
 
-        user = await user_service.get_by_id(user_id=payload.get("sub"))
+    if not user:
+        user = await user_service.get_by_id(user_id=user_id)
+        if user:
+            cache.set(user)
 
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication credentials",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+    if not user:
+        raise invalid_credentials()
 
-        return user
-    except jwt.DecodeError:
+    if not user.is_active:
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication credentials",
-            headers={"WWW-Authenticate": "Bearer"},
+            status_code=status.HTTP_403_FORBIDDEN, detail="inactive_user"
         )
-    except jwt.exceptions.ExpiredSignatureError:
+
+    return user
+
+
+async def authenticate_token(
+    token: str,
+    *,
+    user_service: UserService,
+    token_control_service: TokenControlService,
+    cache: UserCache,
+    settings: Settings,
+) -> User:
+    """Valida el JWT y devuelve su usuario; HTTPException 401 si no es válido."""
+    payload = await verify_token(
+        token, token_control_service=token_control_service, settings=settings
+    )
+    return await load_user(payload.get("sub"), user_service=user_service, cache=cache)
+
+
+def claims_are_fresh(payload: dict, settings: Settings) -> bool:
+    return (
+        "role" in payload
+        and time.time() - payload.get("iat", 0) <= settings.JWT_CLAIMS_MAX_AGE
+    )
+
+
+async def authorize_token(
+    token: str,
+    *,
+    user_service: UserService,
+    token_control_service: TokenControlService,
+    cache: UserCache,
+    settings: Settings,
+) -> TokenUser:
+    """
+    Identidad y rol del JWT. Con claims de menos de JWT_CLAIMS_MAX_AGE
+    segundos no se consulta la base de datos (la revocación se revisa en
+    memoria); los tokens más viejos o sin claims se revalidan con el usuario.
+    """
+    payload = await verify_token(
+        token, token_control_service=token_control_service, settings=settings
+    )
+    if not claims_are_fresh(payload, settings):
+        user = await load_user(
+            payload.get("sub"), user_service=user_service, cache=cache
+        )
+        return TokenUser.from_user(user)
+
+    user = TokenUser(
+        id=payload["sub"], role=payload["role"], is_active=payload.get("active", True)
+    )
+    if not user.is_active:
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication credentials",
-            headers={"WWW-Authenticate": "Bearer"},
+            status_code=status.HTTP_403_FORBIDDEN, detail="inactive_user"
         )
+    return user
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    user_service: UserService = Depends(get_user_service),
+    token_control_service: TokenControlService = Depends(get_token_control_service),
+    cache: UserCache = Depends(get_user_cache),
+    settings: Settings = Depends(get_settings),
+) -> User:
+    return await authenticate_token(
+        token,
+        user_service=user_service,
+        token_control_service=token_control_service,
+        cache=cache,
+        settings=settings,
+    )
+
+
+async def get_token_user(
+    token: str = Depends(oauth2_scheme),
+    user_service: UserService = Depends(get_user_service),
+    token_control_service: TokenControlService = Depends(get_token_control_service),
+    cache: UserCache = Depends(get_user_cache),
+    settings: Settings = Depends(get_settings),
+) -> TokenUser:
+    """Usuario autenticado para las rutas que solo necesitan su id y rol."""
+    return await authorize_token(
+        token,
+        user_service=user_service,
+        token_control_service=token_control_service,
+        cache=cache,
+        settings=settings,
+    )
+
+
+async def get_websocket_user(
+    token: Optional[str] = Query(None),
+    user_service: UserService = Depends(get_user_service),
+    token_control_service: TokenControlService = Depends(get_token_control_service),
+    cache: UserCache = Depends(get_user_cache),
+    settings: Settings = Depends(get_settings),
+) -> Optional[TokenUser]:
+    """
+    Usuario del WebSocket (`?token=`, el navegador no envía cabeceras). Sin
+    token la conexión es de solo lectura; con un token inválido se rechaza.
+    """
+    if token is None:
+        return None
+
+    try:
+        return await authorize_token(
+            token,
+            user_service=user_service,
+            token_control_service=token_control_service,
+            cache=cache,
+            settings=settings,
+        )
+    except HTTPException:
+        raise WebSocketException(
+            code=status.WS_1008_POLICY_VIOLATION, reason="invalid_token"
+        )
+
+
+async def rate_limit_user_key(user: TokenUser = Depends(get_token_user)) -> str:
+    """Clave de límite por usuario autenticado."""
+    return f"user:{user.id}"
+
+
+async def rate_limit_session_key(session_id: UUID) -> str:
+    """Clave de límite por la sesión de la ruta."""
+    return f"session:{session_id}"
 
 
 async def get_current_admin_user(
-    current_user: Annotated[User, Depends(get_current_user)],
-):
-    if current_user.role != "admin":
+    current_user: Annotated[TokenUser, Depends(get_token_user)],
+) -> TokenUser:
+    if current_user.role != UserRole.admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You do not have permission to perform this action",
@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class BrokerBackend(Enum):
+    memory = "memory"
+    unix = "unix"
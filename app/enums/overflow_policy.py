@@ -0,0 +1,7 @@
+from enum import Enum
+
+
+class OverflowPolicy(Enum):
+    drop_oldest = "drop_oldest"
+    coalesce = "coalesce"
+    disconnect = "disconnect"
@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class UserRole(Enum):
+    user = "user"
+    admin = "admin"
@@ -1,20 +1,36 @@
 from contextlib import asynccontextmanager
+from datetime import timedelta
 import os
-from better_profanity import profanity
 from fastapi import FastAPI, WebSocket, Request
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from starlette.status import HTTP_422_UNPROCESSABLE_ENTITY
 from fastapi.middleware.cors import CORSMiddleware
-from slowapi import _rate_limit_exceeded_handler
-from slowapi.errors import RateLimitExceeded
-from slowapi.middleware import SlowAPIMiddleware
-from app.core.limiter import limiter
-from app.dependencies import get_session_service
-from app.schemas.session import SessionFilters
+from app.core import connection_manager, db, task_manager
+from app.core.audit_log import FileSink, audit_log
+from app.core.broker import create_broker
+from app.core.limiter import (
+    MemoryStore,
+    RateLimitMiddleware,
+    SharedStore,
+    limiter,
+)
+from app.core.login_throttle import login_throttle
+from app.core.metrics import MetricsMiddleware, instrument_engine, loop_lag_monitor
+from app.core.profanity import profanity
+from app.core.query_stats import QueryStatsMiddleware, query_monitor
+from app.core.revocation import revocation_index
+from app.core.user_cache import user_cache
+from app.core.write_pipeline import message_writer
 from app.settings import get_settings
-from app.core.db import init_db
-from app.routers import auth, message, session as session_router, user, websocket
+from app.routers import (
+    auth,
+    message,
+    metrics,
+    session as session_router,
+    user,
+    websocket,
+)
 
 
 settings = get_settings()
@@ -24,17 +40,81 @@ BADWORDS_PATH = os.path.join(BASE_DIR, "profanity_word_list.txt")
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
-    await init_db()
+    await db.init_db()
+    await revocation_index.start(
+        db.engine,
+        token_lifetime=timedelta(minutes=settings.jwt_expiration),
+        sync_interval=settings.REVOCATION_SYNC_INTERVAL,
+        prune_interval=settings.REVOCATION_PRUNE_INTERVAL,
+    )
+    if settings.METRICS_ENABLED:
+        loop_lag_monitor.start(interval=settings.METRICS_LOOP_LAG_INTERVAL)
+    await audit_log.start(
+        engine=db.engine if settings.AUDIT_DATABASE else None,
+        file=FileSink(
+            path=settings.AUDIT_FILE_PATH,
+            max_bytes=settings.AUDIT_FILE_MAX_BYTES,
+            backups=settings.AUDIT_FILE_BACKUPS,
+        )
+        if settings.AUDIT_FILE_PATH
+        else None,
+        buffer_size=settings.AUDIT_BUFFER_SIZE,
+        max_batch=settings.AUDIT_BATCH_SIZE,
+        flush_interval=settings.AUDIT_FLUSH_INTERVAL,
+    )
+    if settings.LOGIN_ATTEMPTS_ENABLED:
+        await login_throttle.start(
+            db.engine,
+            max_failures=settings.LOGIN_ATTEMPTS_MAX,
+            max_block=settings.LOGIN_BLOCK_MAX,
+            retention=settings.LOGIN_ATTEMPTS_RETENTION,
+            flush_interval=settings.LOGIN_ATTEMPTS_FLUSH_INTERVAL,
+            prune_interval=settings.LOGIN_ATTEMPTS_PRUNE_INTERVAL,
+            max_keys=settings.LOGIN_ATTEMPTS_MAX_KEYS,
+        )
     profanity.load_censor_words_from_file(BADWORDS_PATH)
+    connection_manager.manager.configure(
+        send_timeout=settings.WS_SEND_TIMEOUT,
+        queue_size=settings.WS_SEND_QUEUE_SIZE,
+        overflow_policy=settings.WS_OVERFLOW_POLICY,
+    )
+    task_manager.manager.configure(
+        cpu_workers=settings.PASSWORD_HASH_WORKERS,
+        cpu_queue_limit=settings.PASSWORD_HASH_QUEUE_LIMIT,
+    )
+    task_manager.manager.start()
+    user_cache.configure(max_size=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
+
+    # Las sesiones se registran bajo demanda (primer mensaje o WebSocket)
+    connection_manager.manager.configure_registry(
+        capacity=settings.SESSION_REGISTRY_CAPACITY,
+        idle_ttl=settings.SESSION_REGISTRY_IDLE_TTL,
+    )
+    connection_manager.manager.configure_replay(
+        buffer_size=settings.WS_REPLAY_BUFFER_SIZE
+    )
 
-    async for service in get_session_service():
-        sessions = await service.session_list(params=SessionFilters(page=1, size=0))
+    await connection_manager.manager.start_broker(
+        create_broker(settings.BROKER_BACKEND, socket_path=settings.BROKER_SOCKET_PATH)
+    )
 
-        for s in sessions["items"]:
-            service.manager.create_session(session=s)
+    if settings.MESSAGE_GROUP_COMMIT:
+        await message_writer.start(
+            db.engine,
+            max_batch=settings.MESSAGE_GROUP_COMMIT_MAX_BATCH,
+            max_delay=settings.MESSAGE_GROUP_COMMIT_MAX_DELAY_MS / 1000,
+        )
 
     yield
 
+    await message_writer.stop()
+    await login_throttle.stop()
+    await audit_log.stop()
+    await loop_lag_monitor.stop()
+    await revocation_index.stop()
+    await connection_manager.manager.stop_broker()
+    task_manager.manager.shutdown()
+
 
 app = FastAPI(
     lifespan=lifespan,
@@ -68,11 +148,38 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
     )
 
 
-app.state.limiter = limiter
-app.add_middleware(SlowAPIMiddleware)
+limiter.configure(
+    enabled=settings.RATE_LIMIT_ENABLED,
+    default=settings.RATE_LIMIT_DEFAULT,
+    store=SharedStore(
+        path=settings.RATE_LIMIT_SHARED_PATH, slots=settings.RATE_LIMIT_SHARED_SLOTS
+    )
+    if settings.RATE_LIMIT_SHARED
+    else MemoryStore(),
+)
+app.add_middleware(RateLimitMiddleware, limiter=limiter)
 
-# Manejar exceptions de SlowAPI
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+if settings.SQL_STATS_ENABLED:
+    query_monitor.configure(
+        slow_threshold=settings.SQL_SLOW_QUERY_MS / 1000,
+        n_plus_one_threshold=settings.SQL_N_PLUS_ONE_THRESHOLD,
+    )
+    app.add_middleware(
+        QueryStatsMiddleware,
+        monitor=query_monitor,
+        server_timing=settings.SQL_SERVER_TIMING,
+    )
+
+if settings.METRICS_ENABLED:
+    # Por fuera del limitador: también mide las respuestas 429
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(metrics.router)
+
+if settings.METRICS_ENABLED or settings.SQL_STATS_ENABLED:
+    instrument_engine(
+        db.engine,
+        on_query=query_monitor.record if settings.SQL_STATS_ENABLED else None,
+    )
 
 # CORS
 app.add_middleware(
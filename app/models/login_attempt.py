@@ -8,4 +8,4 @@ class LoginAttempt(SQLModel, table=True):
     username: str = Field(index=True)
     ip_address: str
     success: bool
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=datetime.utcnow, index=True)
@@ -1,7 +1,7 @@
 from datetime import datetime
 from uuid import UUID, uuid4
 from pydantic import model_validator
-from sqlmodel import Field, Relationship, SQLModel
+from sqlmodel import Field, Index, Relationship, SQLModel
 from typing import Optional
 
 from app.enums.send_types import SenderType
@@ -24,4 +24,8 @@ class Message(SQLModel, table=True):
     session: "Session" = Relationship(back_populates="messages")
 
     __tablename__ = "messages"
+    __table_args__ = (
+        # Paginación por cursor: cada página es un rango del índice
+        Index("ix_messages_session_timestamp_id", "session_id", "timestamp", "id"),
+    )
     model_config = {"arbitrary_types_allowed": True}
@@ -1,3 +1,4 @@
+from typing import Optional
 from uuid import UUID, uuid4
 from sqlmodel import SQLModel, Field
 from datetime import datetime
@@ -6,4 +7,6 @@ from datetime import datetime
 class RevokedToken(SQLModel, table=True):
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     jti: str = Field(index=True, unique=True)
-    revoked_at: datetime = Field(default_factory=datetime.utcnow)
+    revoked_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+    # Vencimiento del token revocado: pasado este momento la fila se elimina
+    exp: Optional[datetime] = Field(default=None, index=True)
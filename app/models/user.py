@@ -3,6 +3,8 @@ from uuid import UUID, uuid4
 from sqlmodel import Field, Relationship, SQLModel, UniqueConstraint
 from typing import Optional
 
+from app.enums.user_role import UserRole
+
 
 class User(SQLModel, table=True):
     id: UUID = Field(default_factory=uuid4, primary_key=True)
@@ -10,6 +12,8 @@ class User(SQLModel, table=True):
     password: Optional[str]
     full_name: Optional[str] = Field(max_length=100)
     is_active: bool = Field(default=True)
+    # Nullable para que init_db la agregue a tablas existentes (NULL = user)
+    role: Optional[UserRole] = Field(default=UserRole.user)
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
     sessions: list["Session"] = Relationship(back_populates="created_by")
@@ -1,13 +1,35 @@
 from uuid import UUID
-from fastapi import APIRouter, Body, Depends
-from app.dependencies import get_current_user, get_message_service
+from fastapi import APIRouter, Body, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from app.core.limiter import limiter
+from app.dependencies import (
+    get_message_service,
+    get_token_user,
+    rate_limit_session_key,
+    rate_limit_user_key,
+)
 from app.enums.send_types import SenderType
-from app.models.user import User
 from app.schemas import message as message_schema
+from app.schemas.user import TokenUser
 from app.services.message_service import MessageService
+from app.settings import get_settings
 
 router = APIRouter(prefix="/messages", tags=["Mensajes"])
 
+settings = get_settings()
+
+# Compartido por POST /messages y /messages/bulk
+send_limit = Depends(
+    limiter.limit(
+        settings.RATE_LIMIT_MESSAGES, scope="messages", key=rate_limit_user_key
+    )
+)
+export_limit = Depends(
+    limiter.limit(
+        settings.RATE_LIMIT_EXPORT, scope="export", key=rate_limit_session_key
+    )
+)
+
 
 @router.get(
     "/{session_id}",
@@ -21,26 +43,89 @@ router = APIRouter(prefix="/messages", tags=["Mensajes"])
 )
 async def list_messages(
     session_id: UUID,
-    _: User = Depends(get_current_user),
+    _: TokenUser = Depends(get_token_user),
     params: message_schema.MessageFilters = Depends(),
     message_service: MessageService = Depends(get_message_service),
 ):
     return await message_service.message_list(session_id=session_id, params=params)
 
 
+@router.get(
+    "/{session_id}/export",
+    dependencies=[export_limit],
+    summary="Exportar mensajes",
+    description="Historial completo de la sesión en NDJSON (un mensaje por línea)",
+    status_code=200,
+    responses={
+        200: {
+            "description": "Mensajes en NDJSON",
+            "content": {"application/x-ndjson": {}},
+        },
+        404: {"description": "Sesión no encontrada"},
+        422: {"description": "Error de validación"},
+        429: {"description": "Límite de peticiones superado"},
+    },
+)
+async def export_messages(
+    session_id: UUID,
+    _: TokenUser = Depends(get_token_user),
+    params: message_schema.MessageExportFilters = Depends(),
+    message_service: MessageService = Depends(get_message_service),
+):
+    session = await message_service.session_service.get_active(session_id=session_id)
+    if not session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="session_not_found"
+        )
+
+    return StreamingResponse(
+        message_service.export_messages(session_id=session_id, params=params),
+        media_type="application/x-ndjson",
+        headers={
+            "Content-Disposition": f'attachment; filename="messages-{session_id}.ndjson"'
+        },
+    )
+
+
+@router.post(
+    "/bulk",
+    dependencies=[send_limit],
+    summary="Crear mensajes en lote",
+    description=(
+        f"Hasta {message_schema.MESSAGE_BULK_MAX_ITEMS} mensajes de una o más "
+        "sesiones en una sola transacción; devuelve el resultado de cada uno"
+    ),
+    status_code=200,
+    response_model=message_schema.MessageBulkResponse,
+    responses={
+        200: {"description": "Resultado por mensaje"},
+        422: {"description": "Error de validación"},
+        429: {"description": "Límite de peticiones superado"},
+    },
+)
+async def create_messages(
+    body: message_schema.MessageBulkCreate,
+    user: TokenUser = Depends(get_token_user),
+    message_service: MessageService = Depends(get_message_service),
+):
+    return await message_service.create_messages(user_id=user.id, items=body.items)
+
+
 @router.post(
     "/",
+    dependencies=[send_limit],
     summary="Crear mensaje",
     status_code=200,
     response_model=message_schema.MessageCreationResponse,
     responses={
         200: {"description": "Mensaje enviado"},
         422: {"description": "Error de validación"},
+        429: {"description": "Límite de peticiones superado"},
     },
 )
 async def create_message(
     message: message_schema.MessageCreate,
-    user: User = Depends(get_current_user),
+    user: TokenUser = Depends(get_token_user),
     message_service: MessageService = Depends(get_message_service),
 ):
     return await message_service.create_message(
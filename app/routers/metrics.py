@@ -0,0 +1,39 @@
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
+
+from app.core.metrics import CONTENT_TYPE, metrics
+from app.settings import Settings, get_settings
+
+router = APIRouter(tags=["Métricas"])
+
+
+def verify_metrics_token(
+    authorization: Optional[str] = Header(None),
+    settings: Settings = Depends(get_settings),
+):
+    """Con METRICS_TOKEN configurado, exige ese token como Bearer."""
+    if not settings.METRICS_TOKEN:
+        return
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(
+        token.encode(), settings.METRICS_TOKEN.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="invalid_metrics_token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+@router.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    include_in_schema=False,
+    dependencies=[Depends(verify_metrics_token)],
+)
+async def get_metrics():
+    """Métricas del worker en el formato de texto de Prometheus."""
+    return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
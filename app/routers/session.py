@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends
-from app.dependencies import get_current_user, get_session_service
-from app.models.user import User
+from app.dependencies import get_session_service, get_token_user
 from app.schemas import session as session_schema
+from app.schemas.user import TokenUser
 from app.services.session_service import SessionService
 
 router = APIRouter(prefix="/sessions", tags=["Sesiones"])
@@ -18,7 +18,7 @@ router = APIRouter(prefix="/sessions", tags=["Sesiones"])
 )
 async def session_list(
     params: session_schema.SessionFilters = Depends(),
-    _: User = Depends(get_current_user),
+    _: TokenUser = Depends(get_token_user),
     session_service: SessionService = Depends(get_session_service),
 ):
     return await session_service.session_list(params=params)
@@ -37,7 +37,7 @@ async def session_list(
 )
 async def create_session(
     session: session_schema.CreateSession,
-    user: User = Depends(get_current_user),
+    user: TokenUser = Depends(get_token_user),
     session_service: SessionService = Depends(get_session_service),
 ):
     return await session_service.create_session(
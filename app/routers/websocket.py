@@ -1,10 +1,19 @@
+from typing import Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Depends, Query, WebSocket, WebSocketDisconnect
 
 from app.core.connection_manager import ConnectionManager
-from app.dependencies import get_connection_manager, get_session_service
-from app.models.message import Message
-from app.services.session_service import SessionService
+from app.core.limiter import Throttle, limiter, parse_rate
+from app.dependencies import (
+    get_connection_manager,
+    get_message_service,
+    get_websocket_user,
+)
+from app.schemas.user import TokenUser
+from app.services.message_ingest import MessageIngest
+from app.services.message_replay import MessageReplay, parse_last_seen
+from app.services.message_service import MessageService
+from app.settings import Settings, get_settings
 
 router = APIRouter()
 
@@ -14,19 +23,60 @@ async def websocket_endpoint(
     websocket: WebSocket,
     session_id: UUID,
     manager: ConnectionManager = Depends(get_connection_manager),
-    session_service: SessionService = Depends(get_session_service),
+    message_service: MessageService = Depends(get_message_service),
+    user: Optional[TokenUser] = Depends(get_websocket_user),
+    settings: Settings = Depends(get_settings),
+    last_seen: Optional[str] = Query(None, max_length=64),
 ):
-    session = await session_service.get_by_id(session_id=session_id)
+    try:
+        cursor = parse_last_seen(last_seen) if last_seen else None
+    except ValueError:
+        raise WebSocketDisconnect(code=1008, reason="invalid_last_seen")
+
+    session = await message_service.session_service.get_active(session_id=session_id)
+    # La conexión vuelve al pool mientras el socket está abierto
+    await message_service.session.close()
 
     if not session:
         raise WebSocketDisconnect(code=1008, reason="session not found")
 
+    ingest = MessageIngest(
+        service=message_service,
+        manager=manager,
+        websocket=websocket,
+        session_id=session_id,
+        sender_id=user.id if user else None,
+        max_pending=settings.WS_INGEST_QUEUE_SIZE,
+        throttle=Throttle(parse_rate(settings.RATE_LIMIT_WS_MESSAGES))
+        if limiter.enabled and settings.RATE_LIMIT_WS_MESSAGES
+        else None,
+    )
+
     try:
-        await manager.connect(websocket=websocket, session=session)
+        writer = await manager.connect(
+            websocket=websocket, session=session, hold=cursor is not None
+        )
+        if cursor is not None:
+            # Historial pendiente antes de pasar a la entrega en vivo
+            await MessageReplay(
+                service=message_service,
+                manager=manager,
+                websocket=websocket,
+                session_id=session_id,
+                chunk_size=settings.WS_REPLAY_CHUNK_SIZE,
+                limit=settings.WS_REPLAY_LIMIT,
+                send_timeout=settings.WS_SEND_TIMEOUT,
+            ).run(writer, cursor)
+        ingest.start()
 
         while True:
-            data = await websocket.receive_json()
-            message = Message(**data, session_id=session_id)
-            await manager.broadcast(message)
+            # Los mensajes se procesan en segundo plano: el cliente puede
+            # enviar varios seguidos y recibe un ack por cada uno
+            await ingest.submit(await websocket.receive_text())
     except WebSocketDisconnect:
+        pass
+    finally:
+        # También ante errores de la reproducción o de la base de datos: si no,
+        # quedan el writer, su cola y la suscripción de la sesión
         manager.disconnect(websocket, session_id)
+        await ingest.stop()
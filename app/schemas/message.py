@@ -1,10 +1,14 @@
-from datetime import datetime
+from datetime import datetime, timezone
+from typing import List, Literal, Optional
 import uuid
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 
 from app.enums.send_types import SenderType
 from app.schemas.pagination import PaginationParams
 
+# Mensajes admitidos por petición en POST /messages/bulk
+MESSAGE_BULK_MAX_ITEMS = 500
+
 
 class MessageCreate(BaseModel):
     content: str = Field(..., max_length=300)
@@ -44,4 +48,86 @@ class MessageCreationResponse(BaseModel):
     data: MessageCreationData
 
 
-class MessageFilters(PaginationParams): ...
+class MessageBulkCreate(BaseModel):
+    items: List[MessageCreate] = Field(
+        ..., min_length=1, max_length=MESSAGE_BULK_MAX_ITEMS
+    )
+
+
+class MessageBulkResult(BaseModel):
+    index: int
+    status: Literal["created", "rejected"]
+    session_id: uuid.UUID
+    message_id: Optional[uuid.UUID] = None
+    content: Optional[str] = None
+    timestamp: Optional[datetime] = None
+    detail: Optional[str] = None
+
+
+class MessageBulkResponse(BaseModel):
+    status: str = "success"
+    created: int
+    rejected: int
+    results: List[MessageBulkResult]
+
+
+class MessageIngestFrame(BaseModel):
+    """Mensaje enviado por WebSocket; client_id vuelve en el ack o el error."""
+
+    client_id: Optional[str] = Field(None, max_length=64)
+    content: str = Field(..., max_length=300)
+    sender_type: SenderType = SenderType.user
+
+
+class MessageAck(BaseModel):
+    type: Literal["ack"] = "ack"
+    client_id: Optional[str] = None
+    message_id: uuid.UUID
+    content: str
+    timestamp: datetime
+
+
+class MessageNack(BaseModel):
+    type: Literal["error"] = "error"
+    client_id: Optional[str] = None
+    detail: str
+
+
+class ReplayEnd(BaseModel):
+    """
+    Fin de la reproducción al reconectar. Si no está completa, el resto se
+    obtiene con GET /messages usando `next_cursor`.
+    """
+
+    type: Literal["replay_end"] = "replay_end"
+    count: int
+    complete: bool
+    next_cursor: Optional[str] = None
+
+
+class MessageExport(BaseModel):
+    id: uuid.UUID
+    session_id: uuid.UUID
+    content: str
+    timestamp: datetime
+    sender_type: SenderType
+    sender_id: Optional[uuid.UUID] = None
+
+
+class MessageExportFilters(BaseModel):
+    since: Optional[datetime] = Field(None, description="Desde (incluido)")
+    until: Optional[datetime] = Field(None, description="Hasta (excluido)")
+
+    @field_validator("since", "until")
+    @classmethod
+    def to_utc(cls, value: Optional[datetime]) -> Optional[datetime]:
+        # Los timestamps se guardan en UTC sin zona
+        if value and value.tzinfo:
+            return value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+
+class MessageFilters(PaginationParams):
+    # "cursor" activa la paginación por keyset (timestamp, id)
+    pagination: Optional[Literal["offset", "cursor"]] = Field("offset")
+    cursor: Optional[str] = Field(None, max_length=200)
@@ -2,6 +2,8 @@ from uuid import UUID
 from pydantic import BaseModel, EmailStr, Field
 from typing import Optional
 
+from app.enums.user_role import UserRole
+
 
 # 🎯 Schema para crear usuarios (input POST)
 class UserCreate(BaseModel):
@@ -22,3 +24,19 @@ class UserRead(BaseModel):
     id: UUID
     email: EmailStr
     full_name: Optional[str] = Field(max_length=100)
+
+
+# 🔑 Identidad firmada en el access token (sin consultar la base de datos)
+class TokenUser(BaseModel):
+    id: UUID
+    role: UserRole = UserRole.user
+    is_active: bool = True
+
+    @classmethod
+    def from_user(cls, user) -> "TokenUser":
+        return cls(
+            id=user.id, role=user.role or UserRole.user, is_active=user.is_active
+        )
+
+    def claims(self) -> dict:
+        return {"sub": str(self.id), "role": self.role.value, "active": self.is_active}
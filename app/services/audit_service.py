@@ -1,30 +1,38 @@
-from app.models.audit_event import AuditEvent
-from sqlmodel.ext.asyncio.session import AsyncSession
+from datetime import datetime
+from typing import Optional
+from uuid import uuid4
+
 from fastapi import Request
 
+from app.core.audit_log import AuditLog
+from app.core.limiter import client_ip
+
 
 class AuditService:
-    session: AsyncSession
+    log: AuditLog
 
-    def __init__(self, *, session: AsyncSession):
-        self.session = session
+    def __init__(self, *, log: AuditLog):
+        self.log = log
 
-    async def audit_event(
-        self, *, request: Request, action: str, success: bool, username: str = None
+    def audit_event(
+        self,
+        *,
+        request: Request,
+        action: str,
+        success: bool,
+        username: Optional[str] = None,
     ):
-        ip = request.client.host
-        user_agent = request.headers.get("user-agent")
-        endpoint = request.url.path
-        method = request.method
-
-        event = AuditEvent(
-            username=username,
-            ip_address=ip,
-            user_agent=user_agent,
-            endpoint=endpoint,
-            method=method,
-            action=action,
-            success=success,
+        """Registra el evento sin esperar: lo escribe AuditLog en segundo plano."""
+        self.log.emit(
+            {
+                "id": uuid4(),
+                "username": username,
+                "ip_address": client_ip(request.scope),
+                "user_agent": request.headers.get("user-agent"),
+                "endpoint": request.url.path,
+                "method": request.method,
+                "action": action,
+                "success": success,
+                "timestamp": datetime.utcnow(),
+            }
         )
-        await self.session.add(event)
-        await self.session.commit()
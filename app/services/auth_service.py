@@ -1,11 +1,12 @@
-from typing import Union
-from fastapi import HTTPException
+from typing import Optional, Union
+from fastapi import HTTPException, status
 from sqlalchemy.exc import IntegrityError
 from sqlmodel import select
 
 from app.services.user_service import UserService
 from app.settings import get_settings
 from app.core.security import get_password_hash, verify_password
+from app.core.task_manager import TaskManager, TaskManagerOverloaded, manager
 from app.models.user import User
 from app.schemas.user import UserCreate
 from sqlmodel.ext.asyncio.session import AsyncSession
@@ -16,14 +17,32 @@ settings = get_settings()
 class AuthService:
     session: AsyncSession
     user_service: UserService
+    task_manager: TaskManager
 
-    def __init__(self, session: AsyncSession):
+    def __init__(
+        self, session: AsyncSession, task_manager: Optional[TaskManager] = None
+    ):
         self.session = session
         self.user_service = UserService(session=session)
+        self.task_manager = task_manager or manager
+
+    async def run_password_task(self, func, *args):
+        """bcrypt corre en el pool de procesos; con el pool saturado se rechaza."""
+        try:
+            return await self.task_manager.run_cpu(func, *args)
+        except TaskManagerOverloaded:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="server_busy",
+                headers={"Retry-After": "1"},
+            )
 
     async def create_user(self, *, user_data: UserCreate) -> User:
+        user_data.password = await self.run_password_task(
+            get_password_hash, user_data.password
+        )
+
         try:
-            user_data.password = get_password_hash(user_data.password)
             user_obj = {**user_data.model_dump()}
             user = User(**user_obj)
 
@@ -56,7 +75,7 @@ class AuthService:
         if not user.password:
             return None
 
-        if not verify_password(password, user.password):
+        if not await self.run_password_task(verify_password, password, user.password):
             return None
 
         return user
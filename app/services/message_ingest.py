@@ -0,0 +1,179 @@
+import asyncio
+import json
+import logging
+from typing import List, Optional, Union
+from uuid import UUID
+
+from fastapi import WebSocket
+from fastapi.exceptions import HTTPException
+from pydantic import ValidationError
+
+from app.core.connection_manager import ConnectionManager
+from app.core.limiter import Throttle
+from app.enums.send_types import SenderType
+from app.schemas.message import (
+    MessageAck,
+    MessageCreate,
+    MessageIngestFrame,
+    MessageNack,
+)
+from app.services.message_service import MessageService
+
+logger = logging.getLogger(__name__)
+
+
+def _client_id(data) -> Optional[str]:
+    if isinstance(data, dict) and isinstance(data.get("client_id"), str):
+        return data["client_id"]
+    return None
+
+
+class MessageIngest:
+    """
+    Ingesta de mensajes de un WebSocket por el mismo camino que POST
+    /messages (censura, persistencia, contador y broadcast).
+
+    El cliente puede enviar varios mensajes sin esperar respuesta: se
+    encolan (hasta `max_pending`, después se deja de leer del socket) y se
+    procesan en orden. Cada uno recibe un ack o un error con su client_id.
+    Con `throttle`, los que superan el límite del socket se rechazan con
+    `rate_limited` sin encolarse.
+    """
+
+    service: MessageService
+    manager: ConnectionManager
+    websocket: WebSocket
+    session_id: UUID
+    sender_id: Optional[UUID]
+    throttle: Optional[Throttle]
+
+    def __init__(
+        self,
+        *,
+        service: MessageService,
+        manager: ConnectionManager,
+        websocket: WebSocket,
+        session_id: UUID,
+        sender_id: Optional[UUID],
+        max_pending: int,
+        throttle: Optional[Throttle] = None,
+    ):
+        self.service = service
+        self.manager = manager
+        self.websocket = websocket
+        self.session_id = session_id
+        self.sender_id = sender_id
+        self.max_pending = max_pending
+        self.throttle = throttle
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def submit(self, raw: str):
+        """Encola un frame; espera si ya hay `max_pending` sin procesar."""
+        if self.throttle and self.throttle.acquire():
+            try:
+                client_id = _client_id(json.loads(raw))
+            except ValueError:
+                client_id = None
+            return self._reply(MessageNack(client_id=client_id, detail="rate_limited"))
+        await self._queue.put(raw)
+
+    async def stop(self):
+        """Procesa lo ya recibido y termina."""
+        if self._task is None:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            try:
+                await self._process_batch(batch)
+            except Exception:
+                # Un error fuera de _process no debe terminar la tarea: stop()
+                # espera a que se procese todo lo encolado
+                logger.exception("Error al procesar un lote de mensajes del WebSocket")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _process_batch(self, batch: List[str]):
+        writer = self.service.writer
+        # AsyncSession no admite uso concurrente: la sesión se valida (y queda
+        # en el registro del manager) antes de procesar el lote en paralelo,
+        # así create_message no vuelve a consultar la base de datos
+        if (
+            writer
+            and writer.enabled
+            and await self.service.session_service.get_active(
+                session_id=self.session_id
+            )
+        ):
+            # Con group commit los mensajes del lote se confirman en la misma
+            # transacción
+            await asyncio.gather(*(self._process(raw) for raw in batch))
+        else:
+            for raw in batch:
+                await self._process(raw)
+        # El socket puede seguir abierto mucho tiempo: se devuelve la
+        # conexión al pool entre lotes
+        await self.service.session.close()
+
+    async def _process(self, raw: Union[str, bytes]):
+        client_id = None
+        try:
+            data = json.loads(raw)
+            client_id = _client_id(data)
+            frame = MessageIngestFrame.model_validate(data)
+        except (ValueError, ValidationError):
+            return self._reply(
+                MessageNack(client_id=client_id, detail="invalid_format")
+            )
+
+        if self.sender_id is None:
+            return self._reply(
+                MessageNack(client_id=client_id, detail="not_authenticated")
+            )
+
+        message_data = MessageCreate(
+            content=frame.content,
+            sender_type=frame.sender_type,
+            session_id=self.session_id,
+        )
+        try:
+            result = await self.service.create_message(
+                message_data=message_data,
+                sender_id=self.sender_id
+                if frame.sender_type == SenderType.user
+                else None,
+            )
+        except HTTPException as e:
+            return self._reply(MessageNack(client_id=client_id, detail=str(e.detail)))
+        except Exception:
+            logger.exception("Error al procesar un mensaje del WebSocket")
+            await self.service.session.rollback()
+            return self._reply(
+                MessageNack(client_id=client_id, detail="internal_error")
+            )
+
+        data = result["data"]
+        self._reply(
+            MessageAck(
+                client_id=client_id,
+                message_id=data["message_id"],
+                content=data["content"],
+                timestamp=data["timestamp"],
+            )
+        )
+
+    def _reply(self, frame: Union[MessageAck, MessageNack]):
+        self.manager.send(self.session_id, self.websocket, frame.model_dump_json())
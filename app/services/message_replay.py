@@ -0,0 +1,180 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import List, Optional, Set, Tuple, Union
+from uuid import UUID
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from app.core.connection_manager import ConnectionManager
+from app.core.connection_writer import SLOW_CONSUMER_CLOSE_CODE, ConnectionWriter
+from app.core.pagination import encode_cursor
+from app.schemas.message import MessageNack, ReplayEnd
+from app.services.message_service import MessageService
+
+
+def parse_last_seen(value: str) -> Union[UUID, datetime]:
+    """
+    Id del último mensaje recibido o su timestamp ISO 8601 (UTC si no indica
+    zona). Lanza ValueError si no es ninguno de los dos.
+    """
+    try:
+        return UUID(value)
+    except ValueError:
+        pass
+
+    timestamp = datetime.fromisoformat(value)
+    if timestamp.tzinfo:
+        # Los timestamps se guardan en UTC sin zona
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+
+class MessageReplay:
+    """
+    Reproduce al reconectar los mensajes posteriores a `last_seen`: desde los
+    recientes en memoria de la sesión si los cubren o, si no, desde la base de
+    datos en bloques de `chunk_size`, hasta `limit` mensajes. Cada bloque se
+    envía como un frame con un arreglo JSON y al final se envía `replay_end`.
+
+    El socket ya está registrado con los mensajes en vivo retenidos; al
+    terminar se liberan los que no se reprodujeron, sin huecos ni duplicados.
+    """
+
+    service: MessageService
+    manager: ConnectionManager
+    websocket: WebSocket
+    session_id: UUID
+    chunk_size: int
+    limit: int
+    send_timeout: float
+
+    def __init__(
+        self,
+        *,
+        service: MessageService,
+        manager: ConnectionManager,
+        websocket: WebSocket,
+        session_id: UUID,
+        chunk_size: int,
+        limit: int,
+        send_timeout: float,
+    ):
+        self.service = service
+        self.manager = manager
+        self.websocket = websocket
+        self.session_id = session_id
+        self.chunk_size = chunk_size
+        self.limit = limit
+        self.send_timeout = send_timeout
+        self.replayed: Set[str] = set()
+        self._last_chunk: Set[str] = set()
+
+    async def run(self, writer: ConnectionWriter, last_seen: Union[UUID, datetime]):
+        try:
+            recent = self.manager.recent_after(self.session_id, last_seen)
+            if recent is not None:
+                end = await self._replay_recent(writer, recent)
+            else:
+                end = await self._replay_stored(writer, last_seen)
+            if end:
+                await self._send(writer, end.model_dump_json())
+        finally:
+            # Un mensaje ya reproducido aún puede llegar en vivo si se
+            # confirmó justo antes de la última lectura
+            writer.release(replayed=self.replayed, skip=self._last_chunk)
+            await self.service.session.close()
+
+    async def _replay_recent(
+        self, writer: ConnectionWriter, recent: List[Tuple[datetime, str, str]]
+    ) -> ReplayEnd:
+        items = recent[: self.limit]
+        for start in range(0, len(items), self.chunk_size):
+            await self._send_chunk(
+                writer,
+                [
+                    (key, frame)
+                    for _, key, frame in items[start : start + self.chunk_size]
+                ],
+            )
+
+        if len(items) == len(recent):
+            return ReplayEnd(count=len(items), complete=True)
+        timestamp, key, _ = items[-1]
+        return ReplayEnd(
+            count=len(items),
+            complete=False,
+            next_cursor=encode_cursor(
+                timestamp=timestamp, id=UUID(key), direction="next"
+            ),
+        )
+
+    async def _replay_stored(
+        self, writer: ConnectionWriter, last_seen: Union[UUID, datetime]
+    ) -> Optional[ReplayEnd]:
+        message_id = None
+        if isinstance(last_seen, UUID):
+            message = await self.service.get_message(
+                session_id=self.session_id, message_id=last_seen
+            )
+            if message is None:
+                await self._send(
+                    writer, MessageNack(detail="last_seen_not_found").model_dump_json()
+                )
+                return None
+            timestamp, message_id = message.timestamp, message.id
+        else:
+            timestamp = last_seen
+
+        count = 0
+        complete = False
+        while count < self.limit:
+            size = min(self.chunk_size, self.limit - count)
+            rows = await self.service.messages_after(
+                session_id=self.session_id,
+                timestamp=timestamp,
+                message_id=message_id,
+                limit=size,
+            )
+            if rows:
+                await self._send_chunk(
+                    writer,
+                    [
+                        (str(row.id), row.model_dump_json(exclude={"session_id"}))
+                        for row in rows
+                    ],
+                )
+                count += len(rows)
+                timestamp, message_id = rows[-1].timestamp, rows[-1].id
+            if len(rows) < size:
+                complete = True
+                break
+
+        if not complete:
+            # Se alcanzó el límite: solo queda saber si hay más mensajes
+            complete = not await self.service.messages_after(
+                session_id=self.session_id,
+                timestamp=timestamp,
+                message_id=message_id,
+                limit=1,
+            )
+
+        next_cursor = None
+        if not complete and message_id:
+            next_cursor = encode_cursor(
+                timestamp=timestamp, id=message_id, direction="next"
+            )
+        return ReplayEnd(count=count, complete=complete, next_cursor=next_cursor)
+
+    async def _send_chunk(self, writer: ConnectionWriter, chunk: List[Tuple[str, str]]):
+        await self._send(writer, f"[{','.join(frame for _, frame in chunk)}]")
+        self._last_chunk = {key for key, _ in chunk}
+        self.replayed |= self._last_chunk
+
+    async def _send(self, writer: ConnectionWriter, frame: str):
+        # Mientras se reproduce solo se escribe aquí: el writer retiene los
+        # mensajes en vivo y aún no hay acks
+        try:
+            await asyncio.wait_for(self.websocket.send_text(frame), self.send_timeout)
+        except Exception:
+            writer.close()
+            raise WebSocketDisconnect(code=SLOW_CONSUMER_CLOSE_CODE)
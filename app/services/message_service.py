@@ -1,24 +1,53 @@
 import asyncio
-from typing import Union
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Union
 from uuid import UUID
-from better_profanity import profanity
+from sqlalchemy import tuple_
 from sqlmodel import asc, desc, func, select
+from app.core.metrics import CENSORSHIP_DURATION
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.profanity import profanity
+from app.core.search import build_match_query, message_search
+from app.core.write_pipeline import GroupCommitWriter
+from app.enums.send_types import SenderType
 from app.enums.session_enum import SessionLevelCensorship
 from app.models.message import Message
-from app.schemas.message import MessageCreate, MessageFilters
+from app.models.session import Session
+from app.schemas.message import (
+    MessageBulkResult,
+    MessageCreate,
+    MessageExport,
+    MessageExportFilters,
+    MessageFilters,
+)
+from app.services.session_service import SessionService
 from sqlmodel.ext.asyncio.session import AsyncSession
 from app.core.connection_manager import ConnectionManager
 from fastapi import status
 from fastapi.exceptions import HTTPException
 
+# Filas que se leen del cursor de la base de datos por cada bloque exportado
+EXPORT_BATCH_SIZE = 1000
+
 
 class MessageService:
     session: AsyncSession
     manager: ConnectionManager
+    writer: Optional[GroupCommitWriter]
+    session_service: SessionService
 
-    def __init__(self, session: AsyncSession, manager: ConnectionManager):
+    def __init__(
+        self,
+        session: AsyncSession,
+        manager: ConnectionManager,
+        writer: Optional[GroupCommitWriter] = None,
+    ):
         self.session = session
         self.manager = manager
+        self.writer = writer
+        self.session_service = SessionService(session=session, manager=manager)
 
     async def create_message(
         self, *, sender_id: Union[str, None], message_data: MessageCreate
@@ -26,29 +55,32 @@ class MessageService:
         """Crea un nuevo mensaje."""
         message = Message(**message_data.model_dump(), sender_id=sender_id)
 
-        session = None
-
-        if message_data.session_id in self.manager.active_connections:
-            session = self.manager.active_connections[message_data.session_id]["data"]
+        session = await self.session_service.get_active(
+            session_id=message_data.session_id
+        )
 
         if not session:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="session_not_found"
             )
 
-        if session.level_censorship == SessionLevelCensorship.medium:
-            message.content = profanity.censor(message.content)
+        content = self._censor(session, message.content)
+        if content is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="ofensive_content",
+            )
+        message.content = content
 
-        if session.level_censorship == SessionLevelCensorship.high:
-            if profanity.contains_profanity(message.content):
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="ofensive_content",
-                )
+        if self.writer and self.writer.enabled:
+            # Group commit: el mensaje se confirma junto con los de su lote
+            message = await self.writer.submit(message)
+        else:
+            self.session.add(message)
+            await self.session.commit()
+            await self.session.refresh(message)
 
-        self.session.add(message)
-        await self.session.commit()
-        await self.session.refresh(message)
+        self.manager.increment_message_count(message.session_id)
 
         asyncio.create_task(self.manager.broadcast(message=message))
 
@@ -68,29 +100,281 @@ class MessageService:
             },
         }
 
+    async def create_messages(
+        self, *, user_id: Optional[UUID], items: List[MessageCreate]
+    ) -> dict:
+        """
+        Crea varios mensajes (de una o más sesiones) en una sola transacción.
+        Los rechazados (sesión inexistente o contenido ofensivo) no impiden
+        crear el resto; cada sesión recibe sus mensajes en un único frame.
+        """
+        sessions = await self.session_service.get_active_many(
+            session_ids=(item.session_id for item in items)
+        )
+
+        results: List[MessageBulkResult] = []
+        created: Dict[UUID, List[Message]] = defaultdict(list)
+        for index, item in enumerate(items):
+            session = sessions.get(item.session_id)
+            content = self._censor(session, item.content) if session else None
+            if content is None:
+                results.append(
+                    MessageBulkResult(
+                        index=index,
+                        status="rejected",
+                        session_id=item.session_id,
+                        detail="ofensive_content" if session else "session_not_found",
+                    )
+                )
+                continue
+
+            message = Message(
+                **item.model_dump(exclude={"content"}),
+                content=content,
+                sender_id=user_id if item.sender_type == SenderType.user else None,
+            )
+            created[item.session_id].append(message)
+            results.append(
+                MessageBulkResult(
+                    index=index,
+                    status="created",
+                    session_id=item.session_id,
+                    message_id=message.id,
+                    content=message.content,
+                    timestamp=message.timestamp,
+                )
+            )
+
+        if created:
+            # id y timestamp se generan al construir: no hace falta refresh
+            self.session.add_all(
+                [message for messages in created.values() for message in messages]
+            )
+            await self.session.commit()
+
+        for session_id, messages in created.items():
+            self.manager.increment_message_count(session_id, len(messages))
+            asyncio.create_task(
+                self.manager.broadcast_many(session_id=session_id, messages=messages)
+            )
+
+        accepted = sum(len(messages) for messages in created.values())
+        return {
+            "status": "success",
+            "created": accepted,
+            "rejected": len(items) - accepted,
+            "results": results,
+        }
+
+    def _censor(self, session: Session, content: str) -> Optional[str]:
+        """Contenido según el nivel de censura de la sesión; None si se rechaza."""
+        level = session.level_censorship
+        start = time.perf_counter()
+        if level == SessionLevelCensorship.medium:
+            content = profanity.censor(content)
+        elif level == SessionLevelCensorship.high and profanity.contains_profanity(
+            content
+        ):
+            content = None
+        CENSORSHIP_DURATION.observe(
+            time.perf_counter() - start, level.value if level else "none"
+        )
+        return content
+
     async def message_list(self, *, session_id: UUID, params: MessageFilters):
         """Lista todas las tareas."""
+        if params.cursor or params.pagination == "cursor":
+            return await self.message_list_by_cursor(
+                session_id=session_id, params=params
+            )
+
         offset = (params.page - 1) * params.size
 
-        query = select(Message)
+        query = select(Message).where(Message.session_id == session_id)
 
-        total = await self.session.exec(
-            select(Message).where(Message.session_id == session_id)
+        total_count = await self.count_messages(
+            session_id=session_id, search=params.search
         )
-        total_count = len(total.all())
 
-        if params.search and params.search.strip():
-            pattern = f"%{params.search.strip().lower()}%"
-            query = query.filter(func.lower(Message.content).ilike(pattern))
+        query = self._filter_by_search(query, session_id, params.search)
 
         if params.sort_by and hasattr(Message, params.sort_by):
             if params.descending == "DESC":
                 query = query.order_by(desc(params.sort_by))
             else:
                 query = query.order_by(asc(params.sort_by))
+        elif self._uses_full_text(params.search):
+            # Sin orden explícito, la búsqueda devuelve primero lo más relevante
+            query = query.order_by(message_search.rank())
 
         query = query.offset(offset).limit(params.size)
         result = await self.session.exec(query)
         items = result.all()
 
         return {"total": total_count, "items": items}
+
+    async def message_list_by_cursor(self, *, session_id: UUID, params: MessageFilters):
+        """Lista mensajes por keyset (timestamp, id): cada página cuesta lo mismo."""
+        direction = "next"
+        query = select(Message).where(Message.session_id == session_id)
+
+        if params.cursor:
+            try:
+                timestamp, message_id, direction = decode_cursor(params.cursor)
+            except ValueError:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="invalid_cursor",
+                )
+
+        # "prev" recorre el índice en sentido contrario y luego invierte la página
+        scan_desc = (params.descending == "DESC") != (direction == "prev")
+        position = tuple_(Message.timestamp, Message.id)
+
+        if params.cursor:
+            if scan_desc:
+                query = query.where(position < tuple_(timestamp, message_id))
+            else:
+                query = query.where(position > tuple_(timestamp, message_id))
+
+        query = self._filter_by_search(query, session_id, params.search)
+
+        order = desc if scan_desc else asc
+        query = query.order_by(order(Message.timestamp), order(Message.id))
+        query = query.limit(params.size + 1)
+
+        total_count = await self.count_messages(
+            session_id=session_id, search=params.search
+        )
+
+        result = await self.session.exec(query)
+        rows = result.all()
+        has_more = len(rows) > params.size
+        items = rows[: params.size]
+
+        if direction == "prev":
+            items.reverse()
+
+        next_cursor = prev_cursor = None
+        if items:
+            # Hay mensajes posteriores si sobró una fila o si se venía retrocediendo
+            if has_more or direction == "prev":
+                next_cursor = encode_cursor(
+                    timestamp=items[-1].timestamp, id=items[-1].id, direction="next"
+                )
+            # Hay mensajes anteriores si sobró una fila al retroceder o si se
+            # avanzó desde un cursor
+            if has_more if direction == "prev" else params.cursor:
+                prev_cursor = encode_cursor(
+                    timestamp=items[0].timestamp, id=items[0].id, direction="prev"
+                )
+
+        return {
+            "total": total_count,
+            "items": items,
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor,
+        }
+
+    async def export_messages(
+        self, *, session_id: UUID, params: MessageExportFilters
+    ) -> AsyncIterator[str]:
+        """
+        Historial de la sesión en NDJSON, en orden cronológico. Se lee con un
+        cursor del lado del servidor de a `EXPORT_BATCH_SIZE` filas, así que la
+        memoria no depende del tamaño del historial.
+        """
+        query = select(
+            *(getattr(Message, field) for field in MessageExport.model_fields)
+        )
+        query = query.where(Message.session_id == session_id)
+        if params.since:
+            query = query.where(Message.timestamp >= params.since)
+        if params.until:
+            query = query.where(Message.timestamp < params.until)
+        query = query.order_by(asc(Message.timestamp), asc(Message.id))
+
+        # Sesión propia: la de la petición se cierra antes de que termine el
+        # envío de la respuesta
+        async with AsyncSession(self.session.bind) as session:
+            result = await session.stream(
+                query, execution_options={"yield_per": EXPORT_BATCH_SIZE}
+            )
+            async for rows in result.partitions():
+                yield "".join(
+                    MessageExport.model_validate(row._mapping).model_dump_json() + "\n"
+                    for row in rows
+                )
+
+    async def get_message(
+        self, *, session_id: UUID, message_id: UUID
+    ) -> Optional[Message]:
+        query = select(Message).where(
+            Message.session_id == session_id, Message.id == message_id
+        )
+        result = await self.session.exec(query)
+        return result.one_or_none()
+
+    async def messages_after(
+        self,
+        *,
+        session_id: UUID,
+        timestamp: datetime,
+        message_id: Optional[UUID] = None,
+        limit: int,
+    ) -> List[Message]:
+        """Mensajes posteriores a la posición (timestamp, id), en orden."""
+        query = select(Message).where(Message.session_id == session_id)
+        if message_id is None:
+            query = query.where(Message.timestamp > timestamp)
+        else:
+            query = query.where(
+                tuple_(Message.timestamp, Message.id) > tuple_(timestamp, message_id)
+            )
+        query = query.order_by(asc(Message.timestamp), asc(Message.id)).limit(limit)
+        result = await self.session.exec(query)
+        return result.all()
+
+    async def count_messages(
+        self, *, session_id: UUID, search: Optional[str] = None
+    ) -> int:
+        """Total de mensajes; sin búsqueda se usa el contador en memoria."""
+        filtered = bool(search and search.strip())
+
+        if not filtered:
+            cached = self.manager.get_message_count(session_id)
+            if cached is not None:
+                return cached
+            generation = self.manager.message_count_generation(session_id)
+
+        query = (
+            select(func.count())
+            .select_from(Message)
+            .where(Message.session_id == session_id)
+        )
+        query = self._filter_by_search(query, session_id, search)
+        result = await self.session.exec(query)
+        total = result.one()
+
+        if not filtered:
+            self.manager.set_message_count(session_id, total, generation=generation)
+
+        return total
+
+    def _uses_full_text(self, search: Optional[str]) -> bool:
+        return bool(message_search.enabled and search and build_match_query(search))
+
+    def _filter_by_search(self, query, session_id: UUID, search: Optional[str]):
+        if self._uses_full_text(search):
+            return message_search.filter(
+                query,
+                message_id_column=Message.id,
+                session_id=session_id,
+                match=build_match_query(search),
+            )
+
+        # Motores sin FTS5: filtro LIKE sobre el contenido
+        if search and search.strip():
+            pattern = f"%{search.strip().lower()}%"
+            query = query.filter(func.lower(Message.content).ilike(pattern))
+        return query
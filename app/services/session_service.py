@@ -1,4 +1,4 @@
-from typing import Union
+from typing import Dict, Iterable, Union
 from uuid import UUID
 from fastapi import HTTPException, status
 from sqlmodel import asc, desc, func, select
@@ -30,6 +30,7 @@ class SessionService:
 
             self.manager.create_session(
                 session=session,
+                message_count=0,
             )
             return session
         except IntegrityError:
@@ -44,18 +45,55 @@ class SessionService:
 
         return result.one_or_none()
 
+    async def get_active(self, *, session_id: UUID) -> Union[Session | None]:
+        """Sesión del registro del manager; si no está se carga y se registra."""
+        session = self.manager.get_session(session_id)
+
+        if session is None:
+            session = await self.get_by_id(session_id=session_id)
+            if session:
+                self.manager.create_session(session=session)
+
+        return session
+
+    async def get_active_many(
+        self, *, session_ids: Iterable[UUID]
+    ) -> Dict[UUID, Session]:
+        """Como get_active, con una sola consulta para las no registradas."""
+        sessions = {}
+        missing = []
+        for session_id in set(session_ids):
+            session = self.manager.get_session(session_id)
+            if session is None:
+                missing.append(session_id)
+            else:
+                sessions[session_id] = session
+
+        if missing:
+            result = await self.session.exec(
+                select(Session).where(Session.id.in_(missing))
+            )
+            for session in result.all():
+                self.manager.create_session(session=session)
+                sessions[session.id] = session
+
+        return sessions
+
     async def session_list(self, *, params: SessionFilters):
         """Lista todas las tareas."""
         offset = (params.page - 1) * params.size
 
         query = select(Session)
 
-        total = await self.session.exec(select(Session))
-        total_count = len(total.all())
+        count_query = select(func.count()).select_from(Session)
 
         if params.search and params.search.strip():
             pattern = f"%{params.search.strip().lower()}%"
             query = query.filter(func.lower(Session.name).ilike(pattern))
+            count_query = count_query.filter(func.lower(Session.name).ilike(pattern))
+
+        total = await self.session.exec(count_query)
+        total_count = total.one()
 
         if params.sort_by and hasattr(Session, params.sort_by):
             if params.descending == "DESC":
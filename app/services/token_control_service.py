@@ -1,5 +1,7 @@
+from datetime import datetime
+from typing import Optional
 import jwt
-from sqlmodel import select
+from app.core.revocation import RevocationIndex, revocation_index
 from app.models.revoked_token import RevokedToken
 from app.settings import get_settings
 from sqlmodel.ext.asyncio.session import AsyncSession
@@ -9,9 +11,11 @@ settings = get_settings()
 
 class TokenControlService:
     session: AsyncSession
+    index: RevocationIndex
 
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, index: Optional[RevocationIndex] = None):
         self.session = session
+        self.index = index or revocation_index
 
     async def revoke_token(self, *, token: str):
         try:
@@ -19,17 +23,17 @@ class TokenControlService:
                 token, settings.jwt_secret, algorithms=[settings.jwt_algorithm]
             )
             jti = payload.get("jti")
-            if jti:
-                revoked = RevokedToken(jti=jti)
-                await self.session.add(revoked)
+            if jti and not self.index.is_revoked(jti):
+                exp = payload.get("exp")
+                exp = datetime.utcfromtimestamp(exp) if exp else None
+                self.session.add(RevokedToken(jti=jti, exp=exp))
                 await self.session.commit()
-        except jwt.JWTError:
+                self.index.add(jti, exp)
+        except jwt.PyJWTError:
             pass
 
     async def is_token_revoked(self, *, jti: str) -> bool:
         if jti:
-            stmt = select(RevokedToken).where(RevokedToken.jti == jti)
-            result = await self.session.exec(stmt)
-            revoked_token = result.one_or_none()
-            return revoked_token is not None
+            # Índice en memoria: sin consultas en cada petición autenticada
+            return self.index.is_revoked(jti)
         return True  # si no hay jti, lo tratamos como inválido
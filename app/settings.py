@@ -3,6 +3,9 @@ from typing import Optional
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from app.enums.broker_backend import BrokerBackend
+from app.enums.overflow_policy import OverflowPolicy
+
 load_dotenv()
 
 
@@ -12,9 +15,119 @@ class Settings(BaseSettings):
     jwt_secret: str
     jwt_algorithm: Optional[str] = "HS256"
     jwt_expiration: Optional[int] = 30
+    # Segundos desde la emisión en que se confía en los claims del token (rol,
+    # activo) sin leer el usuario; los tokens más viejos se revalidan con la
+    # caché de usuarios o la base de datos
+    JWT_CLAIMS_MAX_AGE: Optional[int] = 300
+
+    # Pool de conexiones (PostgreSQL y SQLite en archivo)
+    DB_POOL_SIZE: Optional[int] = 5
+    DB_MAX_OVERFLOW: Optional[int] = 10
+    DB_POOL_TIMEOUT: Optional[float] = 30
+    DB_POOL_RECYCLE: Optional[int] = 1800
+    DB_POOL_PRE_PING: Optional[bool] = True
+    # Sentencias preparadas por conexión con asyncpg (0 detrás de pgbouncer)
+    DB_STATEMENT_CACHE_SIZE: Optional[int] = 100
+
+    # Pragmas aplicados a cada conexión SQLite
+    SQLITE_JOURNAL_MODE: Optional[str] = "WAL"
+    SQLITE_SYNCHRONOUS: Optional[str] = "NORMAL"
+    SQLITE_MMAP_SIZE: Optional[int] = 256 * 1024 * 1024
+    # Negativo: tamaño en KiB (64 MiB)
+    SQLITE_CACHE_SIZE: Optional[int] = -64 * 1024
+    SQLITE_BUSY_TIMEOUT_MS: Optional[int] = 5000
+
+    # Límites GCRA ("N/second|minute|hour|day"): por defecto por IP en todas
+    # las peticiones y handshakes WebSocket; login por IP, envío de mensajes
+    # por usuario, exportación por sesión y frames entrantes por socket
+    RATE_LIMIT_ENABLED: Optional[bool] = True
+    RATE_LIMIT_DEFAULT: Optional[str] = "100/minute"
+    RATE_LIMIT_LOGIN: Optional[str] = "10/minute"
+    RATE_LIMIT_MESSAGES: Optional[str] = "600/minute"
+    RATE_LIMIT_EXPORT: Optional[str] = "10/minute"
+    RATE_LIMIT_WS_MESSAGES: Optional[str] = "20/second"
+    # Estado compartido entre los workers del host (archivo en memoria)
+    RATE_LIMIT_SHARED: Optional[bool] = False
+    RATE_LIMIT_SHARED_PATH: Optional[str] = "/dev/shm/messenger-ratelimit"
+    RATE_LIMIT_SHARED_SLOTS: Optional[int] = 65536
 
-    LOGIN_ATTEMPTS_ENABLED: Optional[bool] = False
+    # Bloqueo por fallos de login consecutivos (usuario + IP): desde
+    # LOGIN_ATTEMPTS_MAX fallos se bloquea 1, 2, 4... minutos hasta
+    # LOGIN_BLOCK_MAX segundos. Los intentos se escriben por lotes y se
+    # purgan tras LOGIN_ATTEMPTS_RETENTION segundos. En memoria se guardan a
+    # lo sumo LOGIN_ATTEMPTS_MAX_KEYS pares (usuario, IP)
+    LOGIN_ATTEMPTS_ENABLED: Optional[bool] = True
     LOGIN_ATTEMPTS_MAX: Optional[int] = 5
+    LOGIN_BLOCK_MAX: Optional[float] = 86400
+    LOGIN_ATTEMPTS_RETENTION: Optional[float] = 86400
+    LOGIN_ATTEMPTS_FLUSH_INTERVAL: Optional[float] = 1
+    LOGIN_ATTEMPTS_PRUNE_INTERVAL: Optional[float] = 300
+    LOGIN_ATTEMPTS_MAX_KEYS: Optional[int] = 100000
+
+    # Auditoría en segundo plano: buffer en memoria (los eventos que no
+    # entran se descartan y cuentan), lotes por tamaño o tiempo hacia la
+    # tabla y/o un archivo JSON lines con rotación (AUDIT_FILE_PATH)
+    AUDIT_BUFFER_SIZE: Optional[int] = 10000
+    AUDIT_BATCH_SIZE: Optional[int] = 500
+    AUDIT_FLUSH_INTERVAL: Optional[float] = 1
+    AUDIT_DATABASE: Optional[bool] = True
+    AUDIT_FILE_PATH: Optional[str] = None
+    AUDIT_FILE_MAX_BYTES: Optional[int] = 10 * 1024 * 1024
+    AUDIT_FILE_BACKUPS: Optional[int] = 5
+
+    # Endpoint /metrics (Prometheus) e instrumentación de rutas, SQL y del
+    # event loop (retraso medido cada METRICS_LOOP_LAG_INTERVAL segundos).
+    # Con METRICS_TOKEN, /metrics exige "Authorization: Bearer <token>"
+    METRICS_ENABLED: Optional[bool] = True
+    METRICS_LOOP_LAG_INTERVAL: Optional[float] = 0.5
+    METRICS_TOKEN: Optional[str] = None
+
+    # Instrumentación SQL: consultas y tiempo de base por petición (cabecera
+    # Server-Timing si SQL_SERVER_TIMING), log de las que superan
+    # SQL_SLOW_QUERY_MS (sin los valores de los parámetros) y aviso de N+1
+    # cuando una misma sentencia se repite SQL_N_PLUS_ONE_THRESHOLD veces
+    SQL_STATS_ENABLED: Optional[bool] = True
+    SQL_SERVER_TIMING: Optional[bool] = True
+    SQL_SLOW_QUERY_MS: Optional[float] = 100
+    SQL_N_PLUS_ONE_THRESHOLD: Optional[int] = 5
+
+    # Índice de tokens revocados: relectura (otros workers) y purga de vencidos
+    REVOCATION_SYNC_INTERVAL: Optional[float] = 5
+    REVOCATION_PRUNE_INTERVAL: Optional[float] = 300
+
+    # Pool de procesos para bcrypt: procesos y trabajos admitidos a la vez
+    PASSWORD_HASH_WORKERS: Optional[int] = 2
+    PASSWORD_HASH_QUEUE_LIMIT: Optional[int] = 32
+
+    # Caché de usuarios autenticados (get_current_user)
+    USER_CACHE_SIZE: Optional[int] = 10000
+    USER_CACHE_TTL: Optional[float] = 60
+
+    # Registro de sesiones en memoria: se llena bajo demanda y desaloja (LRU)
+    # las sesiones sin sockets al superar la capacidad o tras el TTL
+    SESSION_REGISTRY_CAPACITY: Optional[int] = 10000
+    SESSION_REGISTRY_IDLE_TTL: Optional[float] = 3600
+
+    # Colas de salida por conexión WebSocket
+    WS_SEND_TIMEOUT: Optional[float] = 5.0
+    WS_SEND_QUEUE_SIZE: Optional[int] = 256
+    WS_OVERFLOW_POLICY: Optional[OverflowPolicy] = OverflowPolicy.drop_oldest
+    # Mensajes recibidos por un socket pendientes de procesar antes de dejar de leer
+    WS_INGEST_QUEUE_SIZE: Optional[int] = 64
+    # Reconexión con last_seen: mensajes recientes en memoria por sesión,
+    # tamaño de cada bloque leído de la base de datos y máximo a reproducir
+    WS_REPLAY_BUFFER_SIZE: Optional[int] = 100
+    WS_REPLAY_CHUNK_SIZE: Optional[int] = 100
+    WS_REPLAY_LIMIT: Optional[int] = 1000
+
+    # Group commit: los mensajes se insertan por lotes en una sola transacción
+    MESSAGE_GROUP_COMMIT: Optional[bool] = False
+    MESSAGE_GROUP_COMMIT_MAX_BATCH: Optional[int] = 100
+    MESSAGE_GROUP_COMMIT_MAX_DELAY_MS: Optional[float] = 5
+
+    # Pub/sub entre workers: "memory" (un proceso) o "unix" (varios en un host)
+    BROKER_BACKEND: Optional[BrokerBackend] = BrokerBackend.memory
+    BROKER_SOCKET_PATH: Optional[str] = "/tmp/messenger-broker.sock"
 
     ORIGINS: Optional[list[str]] = [
         "http://messenger.localhost:9000",
@@ -0,0 +1,136 @@
+"""
+Benchmark de auditoría: latencia que agrega registrar un evento dentro de la
+petición (esquema anterior: un INSERT + commit por evento) frente a
+encolarlo en AuditLog, que lo escribe por lotes en segundo plano.
+
+Simula `--concurrency` handlers concurrentes que registran un evento cada
+uno sobre un SQLite temporal y mide la latencia del registro, los eventos
+por segundo hasta que quedan todos escritos y los eventos perdidos (commits
+que agotaron busy_timeout o eventos descartados).
+
+Uso:
+    poetry run python -m benchmarks.audit_benchmark --events 5000 --concurrency 1 50
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from uuid import uuid4
+
+from sqlalchemy.exc import OperationalError
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.audit_log import AuditLog, FileSink
+from app.core.engine import create_db_engine
+from app.models.audit_event import AuditEvent
+from app.settings import Settings
+
+
+def record(i: int) -> dict:
+    return {
+        "id": uuid4(),
+        "username": f"usuario{i}@example.com",
+        "ip_address": "203.0.113.7",
+        "user_agent": "benchmark",
+        "endpoint": "/auth/logout",
+        "method": "POST",
+        "action": "logout",
+        "success": True,
+        "timestamp": datetime.utcnow(),
+    }
+
+
+async def inline(engine, i: int):
+    async with AsyncSession(engine) as session:
+        # Esquema anterior: instancia ORM, INSERT y commit dentro de la petición
+        session.add(AuditEvent(**record(i)))
+        await session.commit()
+
+
+async def run(mode: str, events: int, concurrency: int, tmp: str):
+    path = os.path.join(tmp, f"{mode}-{concurrency}.db")
+    # Mismo motor que la aplicación (WAL, busy_timeout)
+    engine = create_db_engine(
+        Settings(
+            database_url=f"sqlite+aiosqlite:///{path}",
+            jwt_secret="benchmark",
+            DB_POOL_SIZE=concurrency,
+            DB_MAX_OVERFLOW=0,
+        )
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    log = AuditLog()
+    if mode != "inline":
+        await log.start(
+            engine=engine,
+            file=FileSink(path=f"{path}.jsonl", max_bytes=1 << 30, backups=1)
+            if mode == "buffered+file"
+            else None,
+            buffer_size=events,
+            max_batch=500,
+            flush_interval=0.05,
+        )
+
+    latencies = []
+    errors = []
+    pending = iter(range(events))
+
+    async def handler():
+        for i in pending:
+            start = time.perf_counter()
+            if mode == "inline":
+                try:
+                    await inline(engine, i)
+                except OperationalError:
+                    # database is locked: se agotó busy_timeout esperando turno
+                    errors.append(i)
+                    continue
+            else:
+                log.emit(record(i))
+                # Cede el loop como lo haría el resto de la petición
+                await asyncio.sleep(0)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(handler() for _ in range(concurrency)))
+    await log.stop()
+    elapsed = time.perf_counter() - start
+    await engine.dispose()
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99)]
+    lost = len(errors) + log.dropped + log.failed
+    return events / elapsed, statistics.median(latencies), p99, lost
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 50])
+    args = parser.parse_args()
+
+    print(
+        f"{'esquema':>14} {'concurrencia':>13} {'eventos/s':>10} "
+        f"{'p50 (µs)':>10} {'p99 (µs)':>10} {'perdidos':>9}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for concurrency in args.concurrency:
+            for mode in ("inline", "buffered", "buffered+file"):
+                rate, p50, p99, lost = asyncio.run(
+                    run(mode, args.events, concurrency, tmp)
+                )
+                print(
+                    f"{mode:>14} {concurrency:>13} {rate:>10.0f} "
+                    f"{p50 * 1e6:>10.1f} {p99 * 1e6:>10.1f} {lost:>9}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark de fan-out de ConnectionManager.broadcast con sockets falsos:
+throughput (entregas/segundo) y latencia de cola por broadcast y por entrega,
+comparando el envío secuencial anterior con las colas por conexión actuales.
+
+Uso:
+    poetry run python -m benchmarks.broadcast_benchmark --sockets 1000 5000 10000
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from uuid import uuid4
+
+from app.core.connection_manager import ConnectionManager
+from app.models.message import Message
+from app.models.user import User  # noqa: F401 (registra la relación)
+
+
+class FakeWebSocket:
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.latencies = []
+        self.sent_at = 0.0
+
+    async def accept(self):
+        pass
+
+    async def close(self, code: int = 1000):
+        pass
+
+    async def send_text(self, frame: str):
+        await asyncio.sleep(self.delay)
+        self.latencies.append(time.perf_counter() - self.sent_at)
+
+    async def send_json(self, data):
+        await self.send_text(data)
+
+
+class SequentialConnectionManager(ConnectionManager):
+    """Implementación previa: serializa por socket y espera uno tras otro."""
+
+    async def broadcast(self, *, message: Message):
+        for connection in list(
+            self.active_connections[message.session_id]["connections"]
+        ):
+            await connection.send_json(message.model_dump_json(exclude=["session_id"]))
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run(manager_cls, sockets: int, broadcasts: int, slow_ratio: float):
+    rnd = random.Random(sockets)
+    manager = manager_cls(send_timeout=0.1)
+    session = type("S", (), {"id": uuid4()})()
+    session_id = session.id
+    websockets = [
+        FakeWebSocket(0.2 if rnd.random() < slow_ratio else 0) for _ in range(sockets)
+    ]
+    for websocket in websockets:
+        await manager.connect(websocket=websocket, session=session)
+
+    durations = []
+    start = time.perf_counter()
+    for i in range(broadcasts):
+        message = Message(content=f"mensaje {i}", session_id=session_id)
+        sent_at = time.perf_counter()
+        for websocket in websockets:
+            websocket.sent_at = sent_at
+        await manager.broadcast(message=message)
+        durations.append(time.perf_counter() - sent_at)
+        await asyncio.sleep(0)
+
+    # Esperar a que los writers vacíen sus colas
+    writers = manager.active_connections[session_id]["connections"].values()
+    while any(writer.queue for writer in writers):
+        await asyncio.sleep(0.001)
+    elapsed = time.perf_counter() - start
+
+    for websocket in list(manager.active_connections[session_id]["connections"]):
+        manager.disconnect(websocket, session_id)
+
+    latencies = [lat for ws in websockets for lat in ws.latencies]
+    return {
+        "deliveries/s": len(latencies) / elapsed,
+        "broadcast p50 ms": statistics.median(durations) * 1000,
+        "broadcast p99 ms": percentile(durations, 99) * 1000,
+        "entrega p99 ms": percentile(latencies, 99) * 1000 if latencies else 0,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sockets", type=int, nargs="+", default=[1000, 5000, 10000])
+    parser.add_argument("--broadcasts", type=int, default=20)
+    parser.add_argument("--slow-ratio", type=float, default=0.001)
+    args = parser.parse_args()
+
+    columns = ["deliveries/s", "broadcast p50 ms", "broadcast p99 ms", "entrega p99 ms"]
+    print(f"{'sockets':>8} {'modo':<12}" + "".join(f"{c:>18}" for c in columns))
+    for sockets in args.sockets:
+        for name, manager_cls in (
+            ("secuencial", SequentialConnectionManager),
+            ("colas", ConnectionManager),
+        ):
+            result = await run(manager_cls, sockets, args.broadcasts, args.slow_ratio)
+            print(
+                f"{sockets:>8} {name:<12}"
+                + "".join(f"{result[c]:>18.1f}" for c in columns)
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,134 @@
+"""
+Benchmark de ingesta de mensajes de sistema: mensajes/segundo enviándolos de
+a uno por POST /messages frente a lotes por POST /messages/bulk, repartidos
+entre varias sesiones con censura media.
+
+Levanta la aplicación en proceso (ASGI) sobre un SQLite temporal.
+
+Uso:
+    poetry run python -m benchmarks.bulk_ingest_benchmark --messages 5000 --batch 100 500
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+TMP = tempfile.TemporaryDirectory()
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite+aiosqlite:///{os.path.join(TMP.name, 'bench.db')}"
+)
+os.environ.setdefault("JWT_SECRET", "benchmark")
+
+import httpx  # noqa: E402
+
+from app.core import connection_manager  # noqa: E402
+from app.core.limiter import limiter  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+def item(session_ids, i):
+    return {
+        "content": f"evento {i} del sistema",
+        "sender_type": "system",
+        "session_id": session_ids[i % len(session_ids)],
+    }
+
+
+async def one_by_one(client, headers, session_ids, messages, concurrency):
+    pending = iter(range(messages))
+
+    async def worker():
+        for i in pending:
+            response = await client.post(
+                "/messages/", json=item(session_ids, i), headers=headers
+            )
+            response.raise_for_status()
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return messages
+
+
+async def batched(client, headers, session_ids, messages, batch):
+    for start in range(0, messages, batch):
+        response = await client.post(
+            "/messages/bulk",
+            json={
+                "items": [
+                    item(session_ids, i)
+                    for i in range(start, min(start + batch, messages))
+                ]
+            },
+            headers=headers,
+        )
+        response.raise_for_status()
+    return (messages + batch - 1) // batch
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--batch", type=int, nargs="+", default=[100, 500])
+    args = parser.parse_args()
+
+    limiter.enabled = False
+    transport = httpx.ASGITransport(app=app)
+
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            credentials = {"email": "bench@example.com", "password": "bench"}
+            await client.post("/auth/register", json={**credentials, "full_name": "b"})
+            token = (
+                await client.post(
+                    "/auth/login",
+                    data={"username": "bench@example.com", "password": "bench"},
+                )
+            ).json()["access_token"]
+            headers = {"Authorization": f"Bearer {token}"}
+            session_ids = [
+                (
+                    await client.post(
+                        "/sessions/",
+                        json={"name": f"bench {i}", "level_censorship": "medium"},
+                        headers=headers,
+                    )
+                ).json()["id"]
+                for i in range(args.sessions)
+            ]
+
+            print(f"{'esquema':>22}{'peticiones':>12}{'msg/s':>10}")
+            runs = [
+                (
+                    f"de a uno (conc. {args.concurrency})",
+                    lambda: one_by_one(
+                        client, headers, session_ids, args.messages, args.concurrency
+                    ),
+                )
+            ] + [
+                (
+                    f"bulk de {batch}",
+                    lambda batch=batch: batched(
+                        client, headers, session_ids, args.messages, batch
+                    ),
+                )
+                for batch in args.batch
+            ]
+            for label, run in runs:
+                start = time.perf_counter()
+                requests = await run()
+                rate = args.messages / (time.perf_counter() - start)
+                print(f"{label:>22}{requests:>12}{rate:>10.0f}")
+                # Los broadcast se lanzan como tareas: que terminen
+                await asyncio.sleep(0.05)
+
+    connection_manager.manager.active_connections.clear()
+    TMP.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
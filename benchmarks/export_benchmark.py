@@ -0,0 +1,131 @@
+"""
+Benchmark de exportación del historial de una sesión: recorrer GET /messages
+página a página (100 filas, OFFSET y conteo por página) frente al stream
+NDJSON con cursor del lado del servidor, sobre SQLite en archivo. Para el
+stream también se mide el pico de memoria asignada por Python.
+
+Uso:
+    poetry run python -m benchmarks.export_benchmark --sizes 10000 100000
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.connection_manager import ConnectionManager
+from app.enums.send_types import SenderType
+from app.models.message import Message
+from app.models.session import Session
+from app.models.user import User
+from app.schemas.message import MessageExportFilters, MessageFilters
+from app.services.message_service import MessageService
+
+PAGE_SIZE = 100
+
+
+async def populate(engine, size: int) -> Session:
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    user = User(email="bench@example.com", full_name="b", password=None)
+    session = Session(name="bench", created_by_id=user.id)
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        db.add_all([user, session])
+        await db.commit()
+
+    start = datetime(2025, 1, 1)
+    async with engine.begin() as conn:
+        for offset in range(0, size, 10000):
+            await conn.execute(
+                insert(Message),
+                [
+                    dict(
+                        id=uuid4(),
+                        content=f"mensaje {i}",
+                        timestamp=start + timedelta(seconds=i),
+                        sender_type=SenderType.user,
+                        sender_id=user.id,
+                        session_id=session.id,
+                    )
+                    for i in range(offset, min(offset + 10000, size))
+                ],
+            )
+    return session
+
+
+async def export_paged(engine, session_id) -> tuple:
+    requests = rows = 0
+    while True:
+        requests += 1
+        # Una petición (y una sesión de base de datos) por página
+        async with AsyncSession(engine) as db:
+            service = MessageService(session=db, manager=ConnectionManager())
+            page = await service.message_list(
+                session_id=session_id,
+                params=MessageFilters(page=requests, size=PAGE_SIZE),
+            )
+        if not page["items"]:
+            return requests, rows
+        rows += len(page["items"])
+
+
+async def export_stream(engine, session_id) -> int:
+    size = 0
+    async with AsyncSession(engine) as db:
+        service = MessageService(session=db, manager=ConnectionManager())
+        async for chunk in service.export_messages(
+            session_id=session_id, params=MessageExportFilters()
+        ):
+            size += len(chunk)
+    return size
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    args = parser.parse_args()
+
+    print(
+        f"{'mensajes':>10}{'paginado (s)':>14}{'peticiones':>12}"
+        f"{'stream (s)':>12}{'pico stream (MiB)':>19}"
+    )
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_async_engine(
+                f"sqlite+aiosqlite:///{os.path.join(tmp, 'messages.db')}"
+            )
+            session = await populate(engine, size)
+
+            start = time.perf_counter()
+            requests, _ = await export_paged(engine, session.id)
+            paged = time.perf_counter() - start
+
+            start = time.perf_counter()
+            await export_stream(engine, session.id)
+            streamed = time.perf_counter() - start
+
+            tracemalloc.start()
+            await export_stream(engine, session.id)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            await engine.dispose()
+
+        print(
+            f"{size:>10}{paged:>14.2f}{requests:>12}"
+            f"{streamed:>12.2f}{peak / 2**20:>19.1f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
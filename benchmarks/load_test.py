@@ -0,0 +1,502 @@
+"""
+Prueba de carga de punta a punta del camino de mensajes: POST /messages/ a
+una tasa objetivo mientras N suscriptores WebSocket, repartidos entre M
+sesiones, reciben cada mensaje.
+
+Levanta la aplicación con uvicorn (subproceso, `--workers` procesos) o en
+un hilo del mismo proceso (`--in-process`) sobre un SQLite temporal, sin
+límites de peticiones. Con varios workers usa el broker `unix` (los
+suscriptores de una sesión pueden estar en otro worker) y no empieza hasta
+que todos arrancaron; si alguno muere la prueba falla. Reporta en JSON:
+
+- http: peticiones, errores por estado, tasa de error, throughput y
+  latencia (p50/p90/p99/max) de POST /messages/.
+- delivery: entregas esperadas (mensaje x suscriptores de su sesión),
+  recibidas, perdidas y latencia envío-recepción.
+- websocket: suscriptores conectados, errores de conexión y cierres.
+
+Con `--baseline` compara contra un reporte guardado y termina con código 1
+si hay regresiones; `--save-baseline` guarda el reporte actual. Las líneas
+base dependen de la máquina: conviene generarlas donde se comparan.
+
+Uso:
+    poetry run python -m benchmarks.load_test --subscribers 100 --sessions 10 --rate 200 --duration 10
+    poetry run python -m benchmarks.load_test --baseline benchmarks/baselines/load_test.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+import httpx
+from websockets.asyncio.client import connect
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Métricas comparadas con la línea base: (ruta en el reporte, sentido)
+#   "lower": una subida es regresión; "higher": una bajada es regresión
+COMPARED = [
+    ("http.throughput", "higher"),
+    ("http.latency_ms.p90", "lower"),
+    ("http.error_rate", "lower"),
+    ("delivery.latency_ms.p50", "lower"),
+    ("delivery.latency_ms.p90", "lower"),
+    ("delivery.loss_rate", "lower"),
+]
+
+
+def percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    """p50/p90/p99/max por rango más cercano, en milisegundos."""
+    if not values:
+        return {"p50": None, "p90": None, "p99": None, "max": None}
+    ordered = sorted(values)
+
+    def rank(q: float) -> float:
+        return round(ordered[min(int(q * len(ordered)), len(ordered) - 1)] * 1e3, 3)
+
+    return {
+        "p50": rank(0.50),
+        "p90": rank(0.90),
+        "p99": rank(0.99),
+        "max": round(ordered[-1] * 1e3, 3),
+    }
+
+
+def lookup(report: dict, path: str):
+    value = report
+    for key in path.split("."):
+        value = value.get(key) if isinstance(value, dict) else None
+    return value
+
+
+def compare(
+    report: dict, baseline: dict, *, tolerance: float, rate_slack: float
+) -> List[str]:
+    """
+    Regresiones respecto de la línea base. Latencias y throughput admiten
+    una variación relativa de `tolerance`; las tasas de error y pérdida, una
+    diferencia absoluta de `rate_slack`.
+    """
+    regressions = []
+    for path, better in COMPARED:
+        current, previous = lookup(report, path), lookup(baseline, path)
+        if previous is None:
+            continue
+        if current is None:
+            regressions.append(f"{path}: sin datos (base {previous})")
+            continue
+        if path.endswith("_rate"):
+            worse = current > previous + rate_slack
+        elif better == "lower":
+            worse = current > previous * (1 + tolerance)
+        else:
+            worse = current < previous * (1 - tolerance)
+        if worse:
+            regressions.append(f"{path}: {current} (base {previous})")
+    return regressions
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def server_env(database: str, *, workers: int) -> Dict[str, str]:
+    env = {
+        "DATABASE_URL": f"sqlite+aiosqlite:///{database}",
+        "JWT_SECRET": "load-test",
+        "RATE_LIMIT_ENABLED": "false",
+        "LOGIN_ATTEMPTS_ENABLED": "false",
+    }
+    if workers > 1:
+        # Sin broker entre workers, los suscriptores de otro worker no
+        # recibirían los mensajes: se mide la entrega de punta a punta
+        env["BROKER_BACKEND"] = "unix"
+        env["BROKER_SOCKET_PATH"] = os.path.join(
+            os.path.dirname(database), "broker.sock"
+        )
+    return env
+
+
+class Server:
+    """
+    La aplicación con uvicorn, en un subproceso o en un hilo. En el
+    subproceso se leen los logs de uvicorn para saber cuántos workers
+    terminaron de arrancar y cuántos murieron.
+    """
+
+    def __init__(self, *, database: str, port: int, workers: int, in_process: bool):
+        self.port = port
+        self.workers = workers
+        self.in_process = in_process
+        self.env = server_env(database, workers=1 if in_process else workers)
+        self.workers_ready = 0
+        self.worker_deaths = 0
+        self._process: Optional[subprocess.Popen] = None
+        self._logs: Optional[threading.Thread] = None
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self):
+        if self.in_process:
+            import uvicorn
+
+            os.environ.update(self.env)
+            config = uvicorn.Config(
+                "app.main:app", host="127.0.0.1", port=self.port, log_level="warning"
+            )
+            self._server = uvicorn.Server(config)
+            self._thread = threading.Thread(target=self._server.run, daemon=True)
+            self._thread.start()
+            return
+
+        self._process = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "uvicorn",
+                "app.main:app",
+                "--host",
+                "127.0.0.1",
+                "--port",
+                str(self.port),
+                "--workers",
+                str(self.workers),
+                "--log-level",
+                "info",
+                "--no-access-log",
+            ],
+            cwd=ROOT,
+            env={**os.environ, **self.env},
+            stdout=sys.stderr,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        self._logs = threading.Thread(target=self._read_logs, daemon=True)
+        self._logs.start()
+
+    def _read_logs(self):
+        """Reenvía los logs de uvicorn y cuenta arranques y caídas de workers."""
+        for line in self._process.stderr:
+            sys.stderr.write(line)
+            if "Application startup complete." in line:
+                self.workers_ready += 1
+            elif "died" in line and "Child process" in line:
+                self.worker_deaths += 1
+
+    async def wait_ready(self, timeout: float = 30):
+        """Espera a que respondan y, en el subproceso, arranquen los N workers."""
+        deadline = time.monotonic() + timeout
+        async with httpx.AsyncClient(base_url=self.url) as client:
+            while time.monotonic() < deadline:
+                self.check()
+                try:
+                    if (await client.get("/openapi.json")).status_code == 200 and (
+                        self._process is None or self.workers_ready >= self.workers
+                    ):
+                        return
+                except httpx.TransportError:
+                    pass
+                await asyncio.sleep(0.1)
+        raise TimeoutError(
+            f"La aplicación no respondió a tiempo ({self.workers_ready} de "
+            f"{self.workers} workers listos)"
+        )
+
+    def check(self):
+        """Falla si uvicorn terminó o murió alguno de sus workers."""
+        if self._process is None:
+            return
+        if self._process.poll() is not None:
+            raise RuntimeError("uvicorn terminó inesperadamente")
+        if self.worker_deaths:
+            raise RuntimeError(f"Murieron {self.worker_deaths} workers de uvicorn")
+
+    def stop(self):
+        if self._server is not None:
+            self._server.should_exit = True
+            self._thread.join(timeout=10)
+        if self._process is not None:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+
+
+async def setup(client: httpx.AsyncClient, sessions: int):
+    """Usuario, token y sesiones (censura baja) para la prueba."""
+    credentials = {"email": "load@example.com", "password": "load-test"}
+    await client.post("/auth/register", json={**credentials, "full_name": "load"})
+    response = await client.post(
+        "/auth/login",
+        data={"username": credentials["email"], "password": credentials["password"]},
+    )
+    response.raise_for_status()
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    session_ids = []
+    for i in range(sessions):
+        response = await client.post(
+            "/sessions/",
+            json={"name": f"carga {i}", "level_censorship": "low"},
+            headers=headers,
+        )
+        response.raise_for_status()
+        session_ids.append(response.json()["id"])
+    return headers, session_ids
+
+
+class LoadTest:
+    """Suscriptores, emisor a tasa fija y recolección de resultados."""
+
+    def __init__(self, *, url: str, session_ids: List[str], headers: dict, args):
+        self.url = url
+        self.session_ids = session_ids
+        self.headers = headers
+        self.args = args
+        self.sent_at: Dict[int, float] = {}
+        self.http_latencies: List[float] = []
+        self.http_results: Counter = Counter()
+        self.delivery_latencies: List[float] = []
+        self.received = 0
+        self.subscribers_per_session: Counter = Counter()
+        self.connected = 0
+        self.connect_errors = 0
+        self.disconnects = 0
+        self.expected = 0
+        self.accepted: List[int] = []
+        self._all_received = asyncio.Event()
+
+    async def subscriber(
+        self, session_id: str, ready: asyncio.Event, stop: asyncio.Event
+    ):
+        ws_url = self.url.replace("http", "ws", 1) + f"/ws/{session_id}/"
+        try:
+            websocket = await connect(ws_url, max_queue=None)
+        except Exception:
+            self.connect_errors += 1
+            ready.set()
+            return
+        self.connected += 1
+        self.subscribers_per_session[session_id] += 1
+        ready.set()
+        try:
+            async with websocket:
+                while not stop.is_set():
+                    frame = await websocket.recv()
+                    now = time.perf_counter()
+                    data = json.loads(frame)
+                    for record in data if isinstance(data, list) else [data]:
+                        self.record_delivery(record, now)
+        except Exception:
+            if not stop.is_set():
+                self.disconnects += 1
+
+    def record_delivery(self, record: dict, now: float):
+        content = record.get("content") if isinstance(record, dict) else None
+        if not content or not content.startswith("carga:"):
+            return
+        sent = self.sent_at.get(int(content.split(":", 1)[1]))
+        if sent is None:
+            return
+        self.delivery_latencies.append(now - sent)
+        self.received += 1
+        if self.expected and self.received >= self.expected:
+            self._all_received.set()
+
+    async def post(self, client: httpx.AsyncClient, seq: int):
+        session_id = self.session_ids[seq % len(self.session_ids)]
+        self.sent_at[seq] = start = time.perf_counter()
+        try:
+            response = await client.post(
+                "/messages/",
+                json={
+                    "content": f"carga:{seq}",
+                    "sender_type": "user",
+                    "session_id": session_id,
+                },
+                headers=self.headers,
+            )
+        except httpx.HTTPError as e:
+            self.http_results[type(e).__name__] += 1
+            return
+        self.http_latencies.append(time.perf_counter() - start)
+        self.http_results[str(response.status_code)] += 1
+        if response.status_code == 200:
+            self.accepted.append(seq)
+
+    async def drive(self, client: httpx.AsyncClient) -> float:
+        """Lanza POSTs a `rate` por segundo durante `duration` (lazo abierto)."""
+        total = int(self.args.rate * self.args.duration)
+        in_flight = asyncio.Semaphore(self.args.max_in_flight)
+        tasks = []
+
+        async def send(seq: int):
+            async with in_flight:
+                await self.post(client, seq)
+
+        start = time.perf_counter()
+        for seq in range(total):
+            delay = start + seq / self.args.rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(send(seq)))
+        await asyncio.gather(*tasks)
+        return time.perf_counter() - start
+
+    async def run(self) -> dict:
+        stop = asyncio.Event()
+        readies = []
+        subscribers = []
+        for i in range(self.args.subscribers):
+            ready = asyncio.Event()
+            readies.append(ready)
+            session_id = self.session_ids[i % len(self.session_ids)]
+            subscribers.append(
+                asyncio.create_task(self.subscriber(session_id, ready, stop))
+            )
+        await asyncio.gather(*(ready.wait() for ready in readies))
+
+        limits = httpx.Limits(max_connections=self.args.max_in_flight)
+        async with httpx.AsyncClient(
+            base_url=self.url, limits=limits, timeout=30
+        ) as client:
+            elapsed = await self.drive(client)
+
+        # Entregas esperadas: cada mensaje aceptado llega a los suscriptores
+        # conectados de su sesión
+        self.expected = sum(
+            self.subscribers_per_session[self.session_ids[seq % len(self.session_ids)]]
+            for seq in self.accepted
+        )
+        if self.received < self.expected:
+            try:
+                await asyncio.wait_for(self._all_received.wait(), self.args.drain)
+            except asyncio.TimeoutError:
+                pass
+
+        stop.set()
+        for task in subscribers:
+            task.cancel()
+        await asyncio.gather(*subscribers, return_exceptions=True)
+        return self.report(elapsed)
+
+    def report(self, elapsed: float) -> dict:
+        requests = len(self.sent_at)
+        ok = self.http_results.get("200", 0)
+        errors = {k: v for k, v in self.http_results.items() if k != "200"}
+        lost = max(self.expected - self.received, 0)
+        return {
+            "config": {
+                "subscribers": self.args.subscribers,
+                "sessions": self.args.sessions,
+                "rate": self.args.rate,
+                "duration": self.args.duration,
+                "workers": 1 if self.args.in_process else self.args.workers,
+                "in_process": self.args.in_process,
+            },
+            "http": {
+                "requests": requests,
+                "ok": ok,
+                "errors": errors,
+                "error_rate": round(1 - ok / requests, 6) if requests else 0.0,
+                "throughput": round(ok / elapsed, 1) if elapsed else 0.0,
+                "latency_ms": percentiles(self.http_latencies),
+            },
+            "delivery": {
+                "expected": self.expected,
+                "received": self.received,
+                "lost": lost,
+                "loss_rate": round(lost / self.expected, 6) if self.expected else 0.0,
+                "latency_ms": percentiles(self.delivery_latencies),
+            },
+            "websocket": {
+                "subscribers": self.connected,
+                "connect_errors": self.connect_errors,
+                "disconnects": self.disconnects,
+            },
+        }
+
+
+async def main(args) -> int:
+    # El reporte sale por stdout: lo que imprima la aplicación va a stderr
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(sys.stderr):
+        server = Server(
+            database=os.path.join(tmp, "load.db"),
+            port=args.port or free_port(),
+            workers=args.workers,
+            in_process=args.in_process,
+        )
+        server.start()
+        try:
+            await server.wait_ready()
+            async with httpx.AsyncClient(base_url=server.url, timeout=30) as client:
+                headers, session_ids = await setup(client, args.sessions)
+            report = await LoadTest(
+                url=server.url, session_ids=session_ids, headers=headers, args=args
+            ).run()
+            # Un worker caído durante la carga invalida el reporte
+            server.check()
+        finally:
+            server.stop()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            f.write(output + "\n")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("config") != report["config"]:
+            print("AVISO la configuración difiere de la línea base", file=sys.stderr)
+        regressions = compare(
+            report, baseline, tolerance=args.tolerance, rate_slack=args.rate_slack
+        )
+        for regression in regressions:
+            print(f"REGRESIÓN {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--subscribers", type=int, default=100)
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--rate", type=float, default=200, help="POST por segundo")
+    parser.add_argument("--duration", type=float, default=10, help="segundos")
+    parser.add_argument("--max-in-flight", type=int, default=100)
+    parser.add_argument(
+        "--drain", type=float, default=10, help="espera máxima de entregas"
+    )
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--in-process", action="store_true")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--output", help="archivo para el reporte JSON")
+    parser.add_argument("--baseline", help="reporte JSON contra el cual comparar")
+    parser.add_argument("--save-baseline", help="guarda el reporte como línea base")
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    parser.add_argument("--rate-slack", type=float, default=0.01)
+    sys.exit(asyncio.run(main(parser.parse_args())))
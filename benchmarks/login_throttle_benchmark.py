@@ -0,0 +1,123 @@
+"""
+Benchmark del bloqueo de logins: costo de decidir si un intento está
+bloqueado según cuántos intentos hay en la tabla para el mismo usuario e IP.
+
+- scan: esquema anterior (login_tracker.is_blocked), que lee con una Session
+  síncrona todos los intentos del par usuario/IP y los recorre en Python.
+- throttle: LoginThrottle, contador en memoria por clave (O(1)).
+
+Uso:
+    poetry run python -m benchmarks.login_throttle_benchmark --history 1000 10000 100000
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session, SQLModel, select
+
+from app.core.login_throttle import LoginThrottle
+from app.models.login_attempt import LoginAttempt
+
+USERNAME = "victima@example.com"
+IP = "203.0.113.7"
+MAX_FAILURES = 5
+
+
+def populate(path: str, history: int):
+    engine = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine)
+    start = datetime.utcnow() - timedelta(seconds=history)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(LoginAttempt),
+            [
+                {
+                    "id": uuid4(),
+                    "username": USERNAME,
+                    "ip_address": IP,
+                    "success": False,
+                    "timestamp": start + timedelta(seconds=i),
+                }
+                for i in range(history)
+            ],
+        )
+    engine.dispose()
+
+
+def scan_is_blocked(session: Session) -> bool:
+    """Algoritmo del antiguo login_tracker.is_blocked."""
+    stmt = (
+        select(LoginAttempt)
+        .where(LoginAttempt.username == USERNAME, LoginAttempt.ip_address == IP)
+        .order_by(LoginAttempt.timestamp.desc())
+    )
+    attempts = session.exec(stmt).all()
+    consecutive_failures = 0
+    for attempt in attempts:
+        if attempt.success:
+            break
+        consecutive_failures += 1
+    if consecutive_failures < MAX_FAILURES:
+        return False
+    # El original no acotaba el exponente y desbordaba datetime con ~40 fallos
+    block = timedelta(minutes=2 ** min(consecutive_failures - MAX_FAILURES, 20))
+    return datetime.utcnow() < attempts[0].timestamp + block
+
+
+def measure_scan(path: str, checks: int) -> float:
+    engine = create_engine(f"sqlite:///{path}")
+    with Session(engine) as session:
+        start = time.perf_counter()
+        for _ in range(checks):
+            scan_is_blocked(session)
+        elapsed = time.perf_counter() - start
+    engine.dispose()
+    return elapsed / checks
+
+
+async def measure_throttle(path: str, checks: int) -> float:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    throttle = LoginThrottle()
+    await throttle.start(
+        engine,
+        max_failures=MAX_FAILURES,
+        max_block=86400,
+        retention=10**9,
+        flush_interval=60,
+        prune_interval=3600,
+    )
+    start = time.perf_counter()
+    for _ in range(checks):
+        throttle.blocked_for(USERNAME, IP)
+    elapsed = time.perf_counter() - start
+    throttle.enabled = False
+    await engine.dispose()
+    return elapsed / checks
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--history", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--checks", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'intentos':>10} {'esquema':>10} {'µs/intento':>14}")
+    for history in args.history:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "logins.db")
+            populate(path, history)
+            scan = measure_scan(path, args.checks)
+            throttle = asyncio.run(measure_throttle(path, args.checks * 1000))
+        print(f"{history:>10} {'scan':>10} {scan * 1e6:>14.1f}")
+        print(f"{history:>10} {'throttle':>10} {throttle * 1e6:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
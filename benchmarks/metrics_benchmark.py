@@ -0,0 +1,165 @@
+"""
+Benchmark del costo de la instrumentación (app.core.metrics):
+
+- observe/inc: nanosegundos por observación de un histograma y de un
+  contador, con y sin etiquetas, más el par de time.perf_counter().
+- middleware: µs por petición con y sin MetricsMiddleware, llamando a la
+  aplicación ASGI directamente.
+- SQL: µs por consulta (SELECT sobre SQLite en memoria, motor síncrono) con
+  y sin los hooks de instrument_engine, y con QueryMonitor contando las
+  consultas de una petición (app.core.query_stats).
+- export: milisegundos para generar /metrics con muchas series.
+
+Uso:
+    poetry run python -m benchmarks.metrics_benchmark --requests 20000
+"""
+
+import argparse
+import asyncio
+import time
+import timeit
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from sqlalchemy import create_engine, text
+
+from app.core.metrics import (
+    Counter,
+    Histogram,
+    MetricsMiddleware,
+    Registry,
+    instrument_engine,
+)
+from app.core.query_stats import QueryMonitor, RequestQueries, _current
+
+
+def micro(number: int):
+    histogram = Histogram("h", "h")
+    labelled = Histogram("hl", "hl", ("method", "route", "status"))
+    counter = Counter("c", "c", ("statement",))
+    cases = [
+        ("perf_counter() x2", lambda: time.perf_counter() - time.perf_counter()),
+        ("Histogram.observe()", lambda: histogram.observe(0.003)),
+        (
+            "Histogram.observe(3 etiquetas)",
+            lambda: labelled.observe(0.003, "GET", "/messages/{session_id}", "200"),
+        ),
+        ("Counter.inc(1 etiqueta)", lambda: counter.inc("SELECT")),
+    ]
+    print(f"{'operación':>32}{'ns':>10}")
+    for label, fn in cases:
+        cost = min(timeit.repeat(fn, number=number, repeat=3)) / number
+        print(f"{label:>32}{cost * 1e9:>10.0f}")
+
+
+def build_app(instrumented: bool) -> FastAPI:
+    app = FastAPI()
+    if instrumented:
+        app.add_middleware(MetricsMiddleware)
+
+    @app.get("/messages/{session_id}")
+    async def messages(session_id: str):
+        return {"ok": True}
+
+    return app
+
+
+async def measure_http(app: FastAPI, requests: int, repeat: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/messages/abc",
+        "raw_path": b"/messages/abc",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench")],
+        "client": ("10.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    for _ in range(100):
+        await app(dict(scope), receive, send)
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(requests):
+            await app(dict(scope), receive, send)
+        best = min(best, time.perf_counter() - start)
+    return best / requests * 1e6
+
+
+def measure_sql(
+    instrumented: bool, queries: int, repeat: int, *, monitor=None
+) -> float:
+    # Motor síncrono: los hooks son los mismos (sync_engine) y se evita el
+    # ruido del hilo de aiosqlite, que es mayor que el costo a medir
+    engine = create_engine("sqlite://")
+    if instrumented:
+        instrument_engine(
+            SimpleNamespace(sync_engine=engine),
+            on_query=monitor.record if monitor else None,
+        )
+    best = float("inf")
+    with engine.connect() as conn:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(queries):
+                conn.execute(text("SELECT 1"))
+            best = min(best, time.perf_counter() - start)
+    engine.dispose()
+    return best / queries * 1e6
+
+
+def measure_export(series: int) -> float:
+    registry = Registry()
+    histogram = registry.histogram("h", "h", ("method", "route", "status"))
+    for i in range(series):
+        histogram.observe(0.01, "GET", f"/ruta/{i}", "200")
+    start = time.perf_counter()
+    registry.render()
+    return (time.perf_counter() - start) * 1e3
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    micro(200000)
+
+    print(f"\n{'camino':>32}{'sin (µs)':>10}{'con (µs)':>10}{'costo (µs)':>12}")
+    bare = await measure_http(build_app(False), args.requests, args.repeat)
+    measured = await measure_http(build_app(True), args.requests, args.repeat)
+    print(
+        f"{'petición HTTP':>32}{bare:>10.1f}{measured:>10.1f}{measured - bare:>12.1f}"
+    )
+    bare = measure_sql(False, args.queries, args.repeat)
+    measured = measure_sql(True, args.queries, args.repeat)
+    print(f"{'consulta SQL':>32}{bare:>10.1f}{measured:>10.1f}{measured - bare:>12.1f}")
+    # Como dentro de una petición: las consultas se suman a RequestQueries
+    token = _current.set(RequestQueries())
+    monitored = measure_sql(True, args.queries, args.repeat, monitor=QueryMonitor())
+    _current.reset(token)
+    print(
+        f"{'consulta SQL + query_stats':>32}{bare:>10.1f}{monitored:>10.1f}"
+        f"{monitored - bare:>12.1f}"
+    )
+
+    print(f"\n{'series':>32}{'export (ms)':>12}")
+    for series in (100, 1000, 10000):
+        print(f"{series:>32}{measure_export(series):>12.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,93 @@
+"""
+Benchmark de bcrypt durante una ráfaga de logins: latencia (p50/p99) de una
+petición ajena que solo necesita el event loop, verificando contraseñas en
+línea (esquema anterior) frente al pool de procesos de TaskManager.
+
+Uso:
+    poetry run python -m benchmarks.password_hashing_benchmark --logins 20
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.core.security import get_password_hash, verify_password
+from app.core.task_manager import TaskManager, TaskManagerOverloaded
+
+PROBE_INTERVAL = 0.005
+
+
+async def probe(latencies: list, stop: asyncio.Event):
+    """
+    Simula un endpoint barato que llega cada PROBE_INTERVAL: su latencia es el
+    retraso con que el loop logra atenderlo.
+    """
+    while not stop.is_set():
+        expected = time.perf_counter() + PROBE_INTERVAL
+        await asyncio.sleep(PROBE_INTERVAL)
+        latencies.append(max(0.0, time.perf_counter() - expected) * 1000)
+
+
+async def login_storm(verify, logins: int, hashed: str) -> int:
+    """Lanza todos los logins a la vez; devuelve cuántos fueron rechazados."""
+
+    async def login():
+        try:
+            await verify("secret", hashed)
+        except TaskManagerOverloaded:
+            return 1
+        return 0
+
+    return sum(await asyncio.gather(*(login() for _ in range(logins))))
+
+
+async def measure(verify, logins: int, hashed: str):
+    latencies = []
+    stop = asyncio.Event()
+    prober = asyncio.create_task(probe(latencies, stop))
+    start = time.perf_counter()
+    rejected = await login_storm(verify, logins, hashed)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await prober
+
+    if len(latencies) < 2:
+        latencies = latencies * 2 or [elapsed * 1000] * 2
+    p99 = statistics.quantiles(latencies, n=100)[98]
+    return (logins - rejected) / elapsed, statistics.median(latencies), p99, rejected
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--queue-limit", type=int, default=32)
+    args = parser.parse_args()
+
+    hashed = get_password_hash("secret")
+    manager = TaskManager()
+    manager.configure(cpu_workers=args.workers, cpu_queue_limit=args.queue_limit)
+    manager.start()
+    # Calienta los procesos para no medir su arranque
+    await asyncio.gather(*(manager.run_cpu(pow, 2, 2) for _ in range(args.workers)))
+
+    async def inline(password, hashed):
+        return verify_password(password, hashed)
+
+    async def pooled(password, hashed):
+        return await manager.run_cpu(verify_password, password, hashed)
+
+    print(
+        f"{'esquema':>14}{'logins/s':>10}{'p50 loop (ms)':>15}"
+        f"{'p99 loop (ms)':>15}{'rechazados':>12}"
+    )
+    for label, verify in (("en línea", inline), ("pool procesos", pooled)):
+        rate, p50, p99, rejected = await measure(verify, args.logins, hashed)
+        print(f"{label:>14}{rate:>10.1f}{p50:>15.2f}{p99:>15.2f}{rejected:>12}")
+
+    manager.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
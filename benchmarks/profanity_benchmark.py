@@ -0,0 +1,79 @@
+"""
+Benchmark del filtro de groserías: mensajes/segundo del motor compilado
+(app.core.profanity) frente a better_profanity sobre el mismo corpus.
+
+Uso:
+    poetry run python -m benchmarks.profanity_benchmark --messages 5000
+"""
+
+import argparse
+import os
+import random
+import time
+
+from better_profanity import Profanity
+
+from app.core.profanity import ProfanityFilter
+
+BADWORDS_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "app",
+    "profanity_word_list.txt",
+)
+
+VOCABULARY = (
+    "hola que tal amigo como estas hoy vamos a la reunión de las cinco "
+    "el proyecto va bien gracias por la ayuda nos vemos mañana"
+).split()
+
+
+def build_messages(count: int, profanity_ratio: float, seed: int = 42) -> list[str]:
+    rnd = random.Random(seed)
+    with open(BADWORDS_PATH, encoding="utf-8") as f:
+        badwords = [w.strip() for w in f if w.strip()]
+
+    messages = []
+    for _ in range(count):
+        words = [rnd.choice(VOCABULARY) for _ in range(rnd.randint(5, 40))]
+        if rnd.random() < profanity_ratio:
+            words.insert(rnd.randrange(len(words)), rnd.choice(badwords))
+        messages.append(" ".join(words))
+    return messages
+
+
+def measure(func, messages: list[str]) -> float:
+    start = time.perf_counter()
+    for message in messages:
+        func(message)
+    return len(messages) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--profanity-ratio", type=float, default=0.2)
+    args = parser.parse_args()
+
+    messages = build_messages(args.messages, args.profanity_ratio)
+
+    reference = Profanity()
+    reference.load_censor_words_from_file(BADWORDS_PATH)
+
+    start = time.perf_counter()
+    engine = ProfanityFilter()
+    engine.load_censor_words_from_file(BADWORDS_PATH)
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    mismatches = sum(engine.censor(m) != reference.censor(m) for m in messages)
+
+    print(f"mensajes: {len(messages)}  compilación: {compile_ms:.1f} ms")
+    print(f"diferencias con better_profanity: {mismatches}")
+    print(f"{'operación':<20}{'better_profanity':>18}{'compilado':>14}{'x':>8}")
+    for name in ("censor", "contains_profanity"):
+        before = measure(getattr(reference, name), messages)
+        after = measure(getattr(engine, name), messages)
+        print(f"{name:<20}{before:>14.0f} m/s{after:>10.0f} m/s{after / before:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
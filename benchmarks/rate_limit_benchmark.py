@@ -0,0 +1,152 @@
+"""
+Benchmark del limitador de peticiones: costo por petición de slowapi
+(SlowAPIMiddleware, esquema anterior) frente al limitador GCRA nativo, en
+memoria y compartido entre workers, sobre una ruta mínima. También mide un
+límite propio de la ruta (decorador de slowapi vs dependencia).
+
+Las peticiones se envían directo a la aplicación ASGI, repartidas entre
+`--keys` direcciones IP, con límites que nunca se alcanzan.
+
+Uso:
+    poetry run python -m benchmarks.rate_limit_benchmark --requests 20000
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from fastapi import Depends, FastAPI, Request
+from slowapi import Limiter, _rate_limit_exceeded_handler
+from slowapi.errors import RateLimitExceeded
+from slowapi.middleware import SlowAPIMiddleware
+from slowapi.util import get_remote_address
+
+from app.core.limiter import MemoryStore, RateLimiter, RateLimitMiddleware, SharedStore
+
+LIMIT = "1000000/minute"
+
+
+def baseline_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.get("/limited")
+    async def limited():
+        return {"ok": True}
+
+    return app
+
+
+def slowapi_app() -> FastAPI:
+    limiter = Limiter(key_func=get_remote_address, default_limits=[LIMIT])
+    app = FastAPI()
+    app.state.limiter = limiter
+    app.add_middleware(SlowAPIMiddleware)
+    app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.get("/limited")
+    @limiter.limit(LIMIT)
+    async def limited(request: Request):
+        return {"ok": True}
+
+    return app
+
+
+def native_app(store) -> FastAPI:
+    limiter = RateLimiter()
+    limiter.configure(enabled=True, default=LIMIT, store=store)
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware, limiter=limiter)
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.get("/limited", dependencies=[Depends(limiter.limit(LIMIT, scope="limited"))])
+    async def limited():
+        return {"ok": True}
+
+    return app
+
+
+async def measure(
+    app: FastAPI, path: str, requests: int, keys: int, repeat: int
+) -> float:
+    """Microsegundos por petición (la mejor de `repeat` rondas)."""
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            assert message["status"] == 200, message
+
+    scopes = [
+        {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(b"host", b"bench")],
+            "client": (f"10.0.{i // 256}.{i % 256}", 50000),
+            "server": ("bench", 80),
+        }
+        for i in range(keys)
+    ]
+
+    for scope in scopes[:100]:
+        await app(dict(scope), receive, send)
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for i in range(requests):
+            await app(dict(scopes[i % keys]), receive, send)
+        best = min(best, time.perf_counter() - start)
+    return best / requests * 1e6
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--keys", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        shared = SharedStore(path=os.path.join(tmp, "ratelimit"), slots=65536)
+        apps = [
+            ("sin límite", baseline_app()),
+            ("slowapi", slowapi_app()),
+            ("GCRA memoria", native_app(MemoryStore())),
+            ("GCRA compartido", native_app(shared)),
+        ]
+
+        print(
+            f"{'limitador':>16}{'ruta':>10}{'µs/petición':>14}{'sobrecosto (µs)':>17}"
+        )
+        for path in ("/ping", "/limited"):
+            base = None
+            for label, app in apps:
+                cost = await measure(app, path, args.requests, args.keys, args.repeat)
+                base = cost if base is None else base
+                print(f"{label:>16}{path:>10}{cost:>14.1f}{cost - base:>17.1f}")
+        shared.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,193 @@
+"""
+Benchmark de sesiones de base de datos por petición: throughput y uso del
+pool de conexiones de GET /messages y POST /messages con una sesión por
+servicio (esquema anterior) frente a la sesión única por petición.
+
+Levanta la aplicación en proceso (ASGI) sobre un SQLite temporal.
+
+Uso:
+    poetry run python -m benchmarks.request_session_benchmark --concurrency 1 20
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+TMP = tempfile.TemporaryDirectory()
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite+aiosqlite:///{os.path.join(TMP.name, 'bench.db')}"
+)
+os.environ.setdefault("JWT_SECRET", "benchmark")
+
+import httpx  # noqa: E402
+from fastapi import Depends  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+from sqlmodel.ext.asyncio.session import AsyncSession  # noqa: E402
+
+from app import dependencies  # noqa: E402
+from app.core import connection_manager, db, write_pipeline  # noqa: E402
+from app.core.engine import create_db_engine  # noqa: E402
+from app.core.limiter import limiter  # noqa: E402
+from app.core.user_cache import user_cache  # noqa: E402
+from app.main import app  # noqa: E402
+from app.services.message_service import MessageService  # noqa: E402
+from app.services.token_control_service import TokenControlService  # noqa: E402
+from app.services.user_service import UserService  # noqa: E402
+from app.settings import get_settings  # noqa: E402
+
+
+# --- Dependencias anteriores: cada servicio abre su propia sesión ---
+async def legacy_user_service():
+    async with AsyncSession(db.engine) as session:
+        yield UserService(session=session)
+
+
+async def legacy_token_control_service():
+    async with AsyncSession(db.engine) as session:
+        yield TokenControlService(session=session)
+
+
+async def legacy_message_service(
+    manager=Depends(dependencies.get_connection_manager),
+):
+    async with AsyncSession(db.engine) as session:
+        yield MessageService(
+            manager=manager, session=session, writer=write_pipeline.message_writer
+        )
+
+
+LEGACY = {
+    dependencies.get_user_service: legacy_user_service,
+    dependencies.get_token_control_service: legacy_token_control_service,
+    dependencies.get_message_service: legacy_message_service,
+}
+
+
+class PoolStats:
+    def __init__(self, pool):
+        self.checkouts = 0
+        self.in_use = 0
+        self.peak = 0
+        event.listen(pool, "checkout", self._checkout)
+        event.listen(pool, "checkin", self._checkin)
+
+    def reset(self):
+        self.checkouts = 0
+        self.peak = self.in_use
+
+    def _checkout(self, *args):
+        self.checkouts += 1
+        self.in_use += 1
+        self.peak = max(self.peak, self.in_use)
+
+    def _checkin(self, *args):
+        self.in_use -= 1
+
+
+async def run(client, headers, request, requests: int, concurrency: int):
+    """Devuelve (peticiones/segundo, peticiones fallidas)."""
+    pending = iter(range(requests))
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        for i in pending:
+            response = await request(client, headers, i)
+            errors += response.is_error
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return requests / (time.perf_counter() - start), errors
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 20])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument(
+        "--pool-timeout",
+        type=float,
+        default=5,
+        help="segundos de espera por una conexión del pool (5 + 10 de overflow)",
+    )
+    args = parser.parse_args()
+
+    # Mismo motor que la aplicación, con una espera del pool más corta para
+    # que un pool agotado se vea como error y no como 30 s de espera
+    db.engine = create_db_engine(
+        get_settings().model_copy(update={"DB_POOL_TIMEOUT": args.pool_timeout})
+    )
+    db.async_session_maker.configure(bind=db.engine)
+
+    limiter.enabled = False
+    stats = PoolStats(db.engine.sync_engine.pool)
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            credentials = {"email": "bench@example.com", "password": "bench"}
+            await client.post("/auth/register", json={**credentials, "full_name": "b"})
+            token = (
+                await client.post(
+                    "/auth/login",
+                    data={"username": "bench@example.com", "password": "bench"},
+                )
+            ).json()["access_token"]
+            headers = {"Authorization": f"Bearer {token}"}
+            session = await client.post(
+                "/sessions/",
+                json={"name": "bench", "level_censorship": "low"},
+                headers=headers,
+            )
+            session_id = session.json()["id"]
+
+            async def list_messages(client, headers, i):
+                return await client.get(f"/messages/{session_id}", headers=headers)
+
+            async def create_message(client, headers, i):
+                return await client.post(
+                    "/messages/",
+                    json={
+                        "content": f"mensaje {i}",
+                        "sender_type": "user",
+                        "session_id": session_id,
+                    },
+                    headers=headers,
+                )
+
+            print(
+                f"{'endpoint':>16}{'conc.':>7}{'esquema':>18}"
+                f"{'req/s':>9}{'checkouts/req':>15}{'pico pool':>11}{'errores':>9}"
+            )
+            for name, request in (
+                ("GET /messages", list_messages),
+                ("POST /messages", create_message),
+            ):
+                for concurrency in args.concurrency:
+                    for label, overrides in (
+                        ("sesión/servicio", LEGACY),
+                        ("sesión/petición", {}),
+                    ):
+                        app.dependency_overrides = overrides
+                        user_cache.clear()
+                        stats.reset()
+                        rps, errors = await run(
+                            client, headers, request, args.requests, concurrency
+                        )
+                        print(
+                            f"{name:>16}{concurrency:>7}{label:>18}{rps:>9.0f}"
+                            f"{stats.checkouts / args.requests:>15.2f}{stats.peak:>11}{errors:>9}"
+                        )
+                        # Los broadcast se lanzan como tareas: que terminen
+                        await asyncio.sleep(0.05)
+
+    connection_manager.manager.active_connections.clear()
+    TMP.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
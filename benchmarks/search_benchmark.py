@@ -0,0 +1,129 @@
+"""
+Benchmark de búsqueda de mensajes: latencia de message_list con `search`
+usando el índice FTS5 frente al filtro LIKE, para distintos tamaños de corpus.
+
+Uso:
+    poetry run python -m benchmarks.search_benchmark --sizes 1000 10000 100000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from uuid import uuid4
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.connection_manager import ConnectionManager
+from app.core.search import message_search
+from app.models.message import Message
+from app.models.session import Session
+from app.models.user import User
+from app.schemas.message import MessageFilters
+from app.services.message_service import MessageService
+
+SYLLABLES = (
+    "ba be bi bo ca ce ci co da de di do fa la le li lo ma me mi mo "
+    "na ne ni no pa pe po ra re ri ro sa se si so ta te ti to va ve"
+).split()
+VOCABULARY_SIZE = 5000
+
+
+def build_vocabulary(rnd: random.Random) -> list[str]:
+    words = set()
+    while len(words) < VOCABULARY_SIZE:
+        words.add("".join(rnd.choices(SYLLABLES, k=rnd.randint(2, 4))))
+    return sorted(words)
+
+
+def build_queries(vocabulary: list[str]) -> list[str]:
+    # Términos frecuentes, intermedios y raros (distribución Zipf), un prefijo
+    # y una combinación de dos términos
+    return [
+        vocabulary[0],
+        vocabulary[50],
+        vocabulary[1000],
+        vocabulary[4000][:4],
+        f"{vocabulary[10]} {vocabulary[200]}",
+    ]
+
+
+def populate(path: str, size: int, sessions: int):
+    engine = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine)
+    rnd = random.Random(size)
+    vocabulary = build_vocabulary(random.Random(0))
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+
+    user_id = uuid4()
+    session_ids = [uuid4() for _ in range(sessions)]
+    with engine.begin() as conn:
+        conn.execute(
+            insert(User), [{"id": user_id, "email": "bench@local", "full_name": "b"}]
+        )
+        conn.execute(
+            insert(Session),
+            [
+                {"id": sid, "name": f"s{i}", "created_by_id": user_id}
+                for i, sid in enumerate(session_ids)
+            ],
+        )
+        rows = [
+            {
+                "id": uuid4(),
+                "content": " ".join(
+                    rnd.choices(vocabulary, weights, k=rnd.randint(4, 20))
+                ),
+                "session_id": rnd.choice(session_ids),
+                "sender_id": user_id,
+            }
+            for _ in range(size)
+        ]
+        conn.execute(insert(Message), rows)
+        message_search.setup(conn)
+    engine.dispose()
+    return session_ids[0]
+
+
+async def measure(path: str, session_id, use_fts: bool, repeat: int) -> float:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    message_search.enabled = use_fts
+    queries = build_queries(build_vocabulary(random.Random(0)))
+    timings = []
+    async with AsyncSession(engine) as session:
+        service = MessageService(session=session, manager=ConnectionManager())
+        for _ in range(repeat):
+            for query in queries:
+                params = MessageFilters(search=query, size=20)
+                start = time.perf_counter()
+                await service.message_list(session_id=session_id, params=params)
+                timings.append((time.perf_counter() - start) * 1000)
+    await engine.dispose()
+    return statistics.median(timings)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'mensajes':>10}{'LIKE (ms)':>12}{'FTS5 (ms)':>12}{'x':>8}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "search.db")
+            session_id = populate(path, size, args.sessions)
+            like = await measure(path, session_id, False, args.repeat)
+            fts = await measure(path, session_id, True, args.repeat)
+        print(f"{size:>10}{like:>12.2f}{fts:>12.2f}{like / fts:>8.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
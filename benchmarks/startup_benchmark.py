@@ -0,0 +1,115 @@
+"""
+Benchmark de arranque: tiempo del lifespan y memoria residente (RSS) con
+muchas sesiones en la base de datos, cargando todas en el registro al
+arrancar (esquema anterior) frente al registro bajo demanda.
+
+Cada medición corre en un proceso nuevo para que el RSS no se contamine.
+
+Uso:
+    poetry run python -m benchmarks.startup_benchmark --sessions 1000000
+"""
+
+import argparse
+import asyncio
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from uuid import uuid4
+
+CHUNK = 50000
+
+
+def populate(path: str, sessions: int):
+    from sqlalchemy import create_engine, insert
+    from sqlmodel import SQLModel
+
+    from app.models.session import Session
+    from app.models.user import User
+
+    engine = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine)
+    user_id = uuid4()
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": user_id, "email": "b@example.com"}])
+        for start in range(0, sessions, CHUNK):
+            conn.execute(
+                insert(Session),
+                [
+                    {"id": uuid4(), "name": f"sesion-{i}", "created_by_id": user_id}
+                    for i in range(start, min(start + CHUNK, sessions))
+                ],
+            )
+    engine.dispose()
+
+
+async def child(mode: str):
+    """Arranca la aplicación y reporta segundos de arranque y RSS en MiB."""
+    from app.core import connection_manager, db
+    from app.main import app
+    from app.schemas.session import SessionFilters
+    from app.services.session_service import SessionService
+
+    start = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        if mode == "eager":
+            # Carga anterior: todas las sesiones al registro, sin desalojo
+            manager = connection_manager.manager
+            manager.configure_registry(capacity=sys.maxsize, idle_ttl=float("inf"))
+            async with db.async_session_maker() as session:
+                service = SessionService(manager=manager, session=session)
+                sessions = await service.session_list(
+                    params=SessionFilters(page=1, size=0)
+                )
+                for s in sessions["items"]:
+                    manager.create_session(session=s)
+        elapsed = time.perf_counter() - start
+        registered = len(connection_manager.manager.active_connections)
+
+    # ru_maxrss está en KiB en Linux
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{elapsed:.3f} {rss:.1f} {registered}")
+
+
+def measure(path: str, mode: str):
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite+aiosqlite:///{path}",
+        "JWT_SECRET": "benchmark",
+    }
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup_benchmark", "--child", mode],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.split()
+    return float(output[-3]), float(output[-2]), int(output[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=1000000)
+    parser.add_argument("--child", choices=["eager", "lazy"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        asyncio.run(child(args.child))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "startup.db")
+        populate(path, args.sessions)
+
+        print(
+            f"{'esquema':>14}{'arranque (s)':>14}{'RSS (MiB)':>12}{'registradas':>13}"
+        )
+        for label, mode in (("carga completa", "eager"), ("bajo demanda", "lazy")):
+            elapsed, rss, registered = measure(path, mode)
+            print(f"{label:>14}{elapsed:>14.2f}{rss:>12.1f}{registered:>13}")
+
+
+if __name__ == "__main__":
+    main()
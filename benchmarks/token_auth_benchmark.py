@@ -0,0 +1,126 @@
+"""
+Benchmark de autenticación por petición: µs y consultas a la base de datos
+para resolver el usuario de un access token.
+
+- db: get_current_user sin caché (SELECT del usuario en cada petición).
+- cache: get_current_user con la caché de usuarios caliente.
+- claims: get_token_user con rol y estado firmados en el token, sin
+  consultar la base (revocación en memoria).
+- claims vencidos: get_token_user con un token de más de
+  JWT_CLAIMS_MAX_AGE segundos, que se revalida con la caché.
+
+Uso:
+    poetry run python -m benchmarks.token_auth_benchmark --requests 5000
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+TMP = tempfile.TemporaryDirectory()
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite+aiosqlite:///{os.path.join(TMP.name, 'bench.db')}"
+)
+os.environ.setdefault("JWT_SECRET", "benchmark")
+
+import jwt  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+from sqlmodel.ext.asyncio.session import AsyncSession  # noqa: E402
+
+from app.core import db  # noqa: E402
+from app.core.jwt import create_access_token  # noqa: E402
+from app.core.user_cache import UserCache  # noqa: E402
+from app.dependencies import authenticate_token, authorize_token  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.schemas.user import TokenUser  # noqa: E402
+from app.services.token_control_service import TokenControlService  # noqa: E402
+from app.services.user_service import UserService  # noqa: E402
+from app.settings import get_settings  # noqa: E402
+
+queries = 0
+
+
+@event.listens_for(db.engine.sync_engine, "before_cursor_execute")
+def _count(conn, cursor, statement, parameters, context, executemany):
+    global queries
+    queries += 1
+
+
+def stale_token(user: TokenUser, settings) -> str:
+    issued = datetime.utcnow() - timedelta(seconds=settings.JWT_CLAIMS_MAX_AGE + 60)
+    return jwt.encode(
+        {
+            **user.claims(),
+            "iat": issued,
+            "exp": issued + timedelta(minutes=settings.jwt_expiration),
+            "jti": "benchmark",
+        },
+        settings.jwt_secret,
+        algorithm=settings.jwt_algorithm,
+    )
+
+
+async def measure(fn, token: str, cache: UserCache, requests: int):
+    global queries
+    settings = get_settings()
+
+    async def resolve():
+        # Una sesión por petición, como db.get_session
+        async with AsyncSession(db.engine) as session:
+            await fn(
+                token,
+                user_service=UserService(session=session),
+                token_control_service=TokenControlService(session=session),
+                cache=cache,
+                settings=settings,
+            )
+
+    await resolve()  # calentamiento: llena la caché si corresponde
+    queries = 0
+    start = time.perf_counter()
+    for _ in range(requests):
+        await resolve()
+    elapsed = time.perf_counter() - start
+    return elapsed / requests * 1e6, queries / requests
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+    settings = get_settings()
+
+    await db.init_db()
+    async with AsyncSession(db.engine) as session:
+        user = User(email="bench@example.com", full_name="bench", password="x")
+        session.add(user)
+        await session.commit()
+        await session.refresh(user)
+        identity = TokenUser.from_user(user)
+
+    token = create_access_token(identity.claims())
+    cases = [
+        ("db", authenticate_token, token, UserCache(max_size=0)),
+        ("cache", authenticate_token, token, UserCache()),
+        ("claims", authorize_token, token, UserCache(max_size=0)),
+        (
+            "claims vencidos",
+            authorize_token,
+            stale_token(identity, settings),
+            UserCache(),
+        ),
+    ]
+
+    print(f"{'camino':>16}{'µs/petición':>14}{'consultas':>11}")
+    for label, fn, case_token, cache in cases:
+        cost, per_request = await measure(fn, case_token, cache, args.requests)
+        print(f"{label:>16}{cost:>14.1f}{per_request:>11.2f}")
+
+    await db.engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
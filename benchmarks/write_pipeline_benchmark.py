@@ -0,0 +1,115 @@
+"""
+Benchmark de persistencia de mensajes: mensajes/segundo de
+MessageService.create_message con un commit por mensaje (ruta actual) frente
+al pipeline de group commit, para distintos números de productores
+concurrentes sobre SQLite en archivo.
+
+Uso:
+    poetry run python -m benchmarks.write_pipeline_benchmark --producers 1 10 50
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.connection_manager import ConnectionManager
+from app.core.write_pipeline import GroupCommitWriter
+from app.enums.send_types import SenderType
+from app.models.session import Session
+from app.models.user import User
+from app.schemas.message import MessageCreate
+from app.services.message_service import MessageService
+
+
+async def measure(
+    path: str,
+    producers: int,
+    messages: int,
+    writer: Optional[GroupCommitWriter],
+    *,
+    max_batch: int,
+    max_delay: float,
+) -> float:
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{path}", connect_args={"check_same_thread": False}
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all)
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    user = User(email="bench@local", full_name="b", password=None)
+    session = Session(name="bench", created_by_id=user.id)
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        db.add_all([user, session])
+        await db.commit()
+
+    manager = ConnectionManager()
+    manager.create_session(session=session, message_count=0)
+    if writer:
+        await writer.start(engine, max_batch=max_batch, max_delay=max_delay)
+
+    per_producer = messages // producers
+
+    async def produce():
+        for i in range(per_producer):
+            # Una sesión de base de datos por petición, como en get_session
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                service = MessageService(session=db, manager=manager, writer=writer)
+                await service.create_message(
+                    sender_id=None,
+                    message_data=MessageCreate(
+                        session_id=session.id,
+                        content=f"mensaje {i}",
+                        sender_type=SenderType.user,
+                    ),
+                )
+
+    start = time.perf_counter()
+    await asyncio.gather(*(produce() for _ in range(producers)))
+    elapsed = time.perf_counter() - start
+
+    if writer:
+        await writer.stop()
+    await engine.dispose()
+    return per_producer * producers / elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--producers", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--max-batch", type=int, default=100)
+    parser.add_argument("--max-delay", type=float, default=0.005)
+    args = parser.parse_args()
+
+    print(
+        f"{'productores':>12}{'directo (msg/s)':>18}{'group commit (msg/s)':>23}{'x':>8}"
+    )
+    for producers in args.producers:
+        results = []
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "messages.db")
+            for writer in (None, GroupCommitWriter()):
+                results.append(
+                    await measure(
+                        path,
+                        producers,
+                        args.messages,
+                        writer,
+                        max_batch=args.max_batch,
+                        max_delay=args.max_delay,
+                    )
+                )
+        direct, batched = results
+        print(f"{producers:>12}{direct:>18.0f}{batched:>23.0f}{batched / direct:>8.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
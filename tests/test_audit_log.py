@@ -0,0 +1,134 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from uuid import uuid4
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.audit_log import AuditLog, FileSink
+from app.models.audit_event import AuditEvent
+
+
+def event(action="logout", **fields):
+    return {
+        "id": uuid4(),
+        "username": None,
+        "ip_address": "1.1.1.1",
+        "user_agent": None,
+        "endpoint": "/auth/logout",
+        "method": "POST",
+        "action": action,
+        "success": True,
+        "timestamp": datetime.utcnow(),
+        **fields,
+    }
+
+
+class TestAuditLog(unittest.IsolatedAsyncioTestCase):
+    """Pruebas del registro de auditoría en segundo plano"""
+
+    async def asyncSetUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.engine = create_async_engine(
+            f"sqlite+aiosqlite:///{os.path.join(self.tmpdir.name, 'audit.db')}"
+        )
+        async with self.engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        self.path = os.path.join(self.tmpdir.name, "audit.jsonl")
+        self.log = AuditLog()
+
+    async def asyncTearDown(self):
+        await self.log.stop()
+        await self.engine.dispose()
+        self.tmpdir.cleanup()
+
+    async def start(self, *, file=True, **options):
+        await self.log.start(
+            engine=self.engine,
+            file=FileSink(path=self.path, max_bytes=1 << 20, backups=2)
+            if file
+            else None,
+            **{"buffer_size": 100, "max_batch": 10, "flush_interval": 60, **options},
+        )
+
+    async def stored_actions(self):
+        async with AsyncSession(self.engine) as session:
+            return sorted((await session.exec(select(AuditEvent.action))).all())
+
+    def file_actions(self):
+        with open(self.path) as f:
+            return sorted(json.loads(line)["action"] for line in f)
+
+    async def test_emit_does_not_write_until_flush(self):
+        """emit solo encola; el lote llega a la tabla y al archivo al vaciarse"""
+        await self.start()
+        self.log.emit(event("login_success", username="ana"))
+        self.log.emit(event("logout"))
+        self.assertEqual(await self.stored_actions(), [])
+
+        await self.log.flush()
+        self.assertEqual(await self.stored_actions(), ["login_success", "logout"])
+        self.assertEqual(self.file_actions(), ["login_success", "logout"])
+        self.assertEqual(self.log.stats()["written"], 2)
+
+    async def test_batch_size_triggers_flush(self):
+        await self.start(max_batch=3)
+        for _ in range(3):
+            self.log.emit(event())
+        for _ in range(20):
+            await asyncio.sleep(0.01)
+            if self.log.written:
+                break
+        self.assertEqual(self.log.written, 3)
+
+    async def test_full_buffer_drops_and_counts(self):
+        """Con el buffer lleno se descarta sin bloquear y se cuenta"""
+        await self.start(buffer_size=5, max_batch=100)
+        for _ in range(8):
+            self.log.emit(event())
+        self.assertEqual(
+            self.log.stats(), {"pending": 5, "dropped": 3, "written": 0, "failed": 0}
+        )
+
+    async def test_stop_flushes_buffer(self):
+        await self.start(file=False)
+        self.log.emit(event())
+        await self.log.stop()
+        self.assertEqual(await self.stored_actions(), ["logout"])
+        self.log.emit(event())
+        self.assertEqual(self.log.stats()["pending"], 0)
+
+    async def test_sink_failure_is_counted(self):
+        await self.start(file=False)
+        async with self.engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.drop_all)
+        self.log.emit(event())
+        with self.assertLogs("app.core.audit_log", level="ERROR"):
+            await self.log.flush()
+        self.assertEqual(self.log.failed, 1)
+
+
+class TestFileSink(unittest.TestCase):
+    """Pruebas del archivo JSON lines con rotación"""
+
+    def test_rotation_keeps_backups(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "audit.jsonl")
+            sink = FileSink(path=path, max_bytes=10, backups=2)
+            for line in ("uno\n", "dos\n", "tres\n", "cuatro\n", "cinco\n"):
+                sink.write([line, line])
+            sink.close()
+
+            self.assertEqual(
+                sorted(os.listdir(tmp)),
+                ["audit.jsonl", "audit.jsonl.1", "audit.jsonl.2"],
+            )
+            with open(path) as f:
+                self.assertEqual(f.read(), "cinco\ncinco\n")
+            with open(f"{path}.2") as f:
+                self.assertEqual(f.read(), "tres\ntres\n")
@@ -0,0 +1,98 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from uuid import uuid4
+
+from app.core.broker import UnixSocketBroker
+
+
+class Worker:
+    """Simula un worker: un broker y los frames que le llegan"""
+
+    def __init__(self, path: str):
+        self.broker = UnixSocketBroker(path=path, reconnect_delay=0.01)
+        self.frames = []
+
+    def handle(self, session_id, frame, message_count):
+        self.frames.append((session_id, frame, message_count))
+
+    async def start(self):
+        await self.broker.start(self.handle)
+        return self
+
+
+async def wait_until(condition, timeout: float = 2):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition() and loop.time() < deadline:
+        await asyncio.sleep(0.01)
+
+
+class TestUnixSocketBroker(unittest.IsolatedAsyncioTestCase):
+    """Pruebas del broker entre workers sobre un socket Unix"""
+
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "broker.sock")
+        self.workers = [await Worker(self.path).start() for _ in range(3)]
+
+    async def asyncTearDown(self):
+        for worker in self.workers:
+            await worker.broker.stop()
+        self.tmp.cleanup()
+
+    async def test_single_hub(self):
+        """Solo un worker debe actuar como hub"""
+        self.assertEqual(sum(w.broker.is_hub for w in self.workers), 1)
+
+    async def test_publish_only_to_subscribed_workers(self):
+        """Debe entregar solo a los otros workers suscritos a la sesión"""
+        a, b, c = self.workers
+        session_id = uuid4()
+        a.broker.subscribe(session_id)
+        b.broker.subscribe(session_id)
+        c.broker.subscribe(uuid4())
+        await asyncio.sleep(0.05)
+
+        await b.broker.publish(session_id, '{"content": "hola"}', 2)
+        await wait_until(lambda: a.frames)
+        await asyncio.sleep(0.05)
+
+        self.assertEqual(a.frames, [(session_id, '{"content": "hola"}', 2)])
+        self.assertEqual(b.frames, [])
+        self.assertEqual(c.frames, [])
+
+    async def test_unsubscribe(self):
+        """Un worker sin suscriptores no debe recibir frames"""
+        a, b, _ = self.workers
+        session_id = uuid4()
+        a.broker.subscribe(session_id)
+        a.broker.unsubscribe(session_id)
+        await asyncio.sleep(0.05)
+
+        await b.broker.publish(session_id, "{}")
+        await asyncio.sleep(0.05)
+
+        self.assertEqual(a.frames, [])
+
+    async def test_hub_failover(self):
+        """Si el hub se detiene otro worker lo reemplaza y conserva suscripciones"""
+        hub = next(w for w in self.workers if w.broker.is_hub)
+        a, b = [w for w in self.workers if w is not hub]
+        session_id = uuid4()
+        a.broker.subscribe(session_id)
+
+        await hub.broker.stop()
+        self.workers.remove(hub)
+        await wait_until(
+            lambda: any(w.broker.is_hub for w in (a, b))
+            and a.broker._connected.is_set()
+            and b.broker._connected.is_set()
+        )
+        await asyncio.sleep(0.05)
+
+        await b.broker.publish(session_id, "{}")
+        await wait_until(lambda: a.frames)
+
+        self.assertEqual(a.frames, [(session_id, "{}", 1)])
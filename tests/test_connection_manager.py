@@ -0,0 +1,413 @@
+import asyncio
+import json
+import unittest
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+from app.core.connection_manager import ConnectionManager
+from app.core.connection_writer import SLOW_CONSUMER_CLOSE_CODE, ConnectionWriter
+from app.core.metrics import (
+    BROADCAST_RECIPIENTS,
+    WS_COALESCED_MESSAGES,
+    WS_DROPPED_MESSAGES,
+    WS_SLOW_CONSUMER_CLOSES,
+)
+from app.enums.overflow_policy import OverflowPolicy
+from app.models.message import Message
+from app.models.user import User  # noqa: F401 (registra la relación)
+
+
+class FakeWebSocket:
+    """WebSocket fake que registra los frames enviados"""
+
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.frames = []
+        self.released = asyncio.Event()
+        self.accept = AsyncMock()
+        self.close = AsyncMock()
+
+    async def send_text(self, frame: str):
+        if self.delay is None:
+            await self.released.wait()
+        else:
+            await asyncio.sleep(self.delay)
+        self.frames.append(frame)
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class TestConnectionManager(unittest.IsolatedAsyncioTestCase):
+    """Pruebas unitarias para ConnectionManager"""
+
+    async def asyncSetUp(self):
+        self.manager = ConnectionManager(send_timeout=0.05, queue_size=2)
+        self.session = MagicMock(id=uuid4())
+
+    async def connect(self, websocket):
+        await self.manager.connect(websocket=websocket, session=self.session)
+        return websocket
+
+    def connections(self):
+        return self.manager.active_connections[self.session.id]["connections"]
+
+    async def test_broadcast_serializes_once(self):
+        """Debe enviar el mismo frame JSON a todos los sockets"""
+        sockets = [await self.connect(FakeWebSocket()) for _ in range(3)]
+        message = Message(content="hola", session_id=self.session.id)
+
+        await self.manager.broadcast(message=message)
+        await settle()
+
+        frames = [ws.frames[0] for ws in sockets]
+        self.assertTrue(all(frame is frames[0] for frame in frames))
+        payload = json.loads(frames[0])
+        self.assertEqual(payload["content"], "hola")
+        self.assertNotIn("session_id", payload)
+
+    async def test_broadcast_does_not_wait_for_slow_socket(self):
+        """Un socket lento no debe retrasar al resto y se desconecta al vencer"""
+        before = WS_SLOW_CONSUMER_CLOSES.value("send_timeout")
+        fast = await self.connect(FakeWebSocket())
+        slow = await self.connect(FakeWebSocket(delay=1))
+        message = Message(content="hola", session_id=self.session.id)
+
+        await self.manager.broadcast(message=message)
+        await settle()
+        self.assertEqual(len(fast.frames), 1)
+
+        await asyncio.sleep(0.1)
+        self.assertEqual(list(self.connections()), [fast])
+        slow.close.assert_awaited_once_with(code=SLOW_CONSUMER_CLOSE_CODE)
+        self.assertEqual(WS_SLOW_CONSUMER_CLOSES.value("send_timeout") - before, 1)
+
+    async def test_broadcast_metrics(self):
+        """Registra la duración y los destinatarios de cada broadcast"""
+        await self.connect(FakeWebSocket())
+        await self.connect(FakeWebSocket())
+        before = BROADCAST_RECIPIENTS.count()
+
+        await self.manager.broadcast(
+            message=Message(content="hola", session_id=self.session.id)
+        )
+
+        self.assertEqual(BROADCAST_RECIPIENTS.count() - before, 1)
+        self.assertEqual(self.manager.connection_counts(), [((), 2)])
+        self.assertEqual(self.manager.session_counts(), [((), 1)])
+
+    async def test_disconnect_stops_writer(self):
+        """Debe quitar la conexión y detener su writer"""
+        websocket = await self.connect(FakeWebSocket())
+        writer = self.connections()[websocket]
+
+        self.manager.disconnect(websocket, self.session.id)
+
+        self.assertEqual(self.connections(), {})
+        self.assertTrue(writer.closed)
+
+    async def test_connection_stats(self):
+        """Debe exponer profundidad de cola y descartes por conexión"""
+        await self.connect(FakeWebSocket(delay=None))
+        for i in range(4):
+            await self.manager.broadcast(
+                message=Message(content=str(i), session_id=self.session.id)
+            )
+            await settle()
+
+        [stats] = self.manager.connection_stats()
+        self.assertEqual(stats["session_id"], self.session.id)
+        self.assertEqual(stats["queue_depth"], 2)
+        self.assertEqual(stats["dropped"], 1)
+        self.assertEqual(self.manager.queue_depths(), [(("total",), 2), (("max",), 2)])
+
+    async def test_broadcast_publishes_to_broker(self):
+        """Debe publicar en el broker y entregar los frames remotos localmente"""
+        broker = MagicMock(local=False, publish=AsyncMock(), start=AsyncMock())
+        await self.manager.start_broker(broker)
+        websocket = await self.connect(FakeWebSocket())
+        broker.subscribe.assert_called_once_with(self.session.id)
+
+        message = Message(content="hola", session_id=self.session.id)
+        await self.manager.broadcast(message=message)
+        frame = broker.publish.await_args.args[1]
+        self.manager._deliver(self.session.id, '{"content": "remoto"}', 1)
+        await settle()
+
+        self.assertEqual(websocket.frames, [frame, '{"content": "remoto"}'])
+
+    async def test_broadcast_many_groups_frame(self):
+        """Varios mensajes de una sesión salen en un único frame con un arreglo"""
+        broker = MagicMock(local=False, publish=AsyncMock(), start=AsyncMock())
+        await self.manager.start_broker(broker)
+        websocket = await self.connect(FakeWebSocket())
+        messages = [Message(content=c, session_id=self.session.id) for c in ("a", "b")]
+
+        await self.manager.broadcast_many(session_id=self.session.id, messages=messages)
+        await settle()
+
+        self.assertEqual(len(websocket.frames), 1)
+        self.assertEqual(
+            [m["content"] for m in json.loads(websocket.frames[0])], ["a", "b"]
+        )
+        _, frame, count = broker.publish.await_args.args
+        self.assertEqual((frame, count), (websocket.frames[0], 2))
+
+        # Otro worker lo recibe y guarda cada mensaje entre los recientes
+        other = ConnectionManager()
+        other.create_session(session=self.session)
+        other._deliver(self.session.id, frame, 2)
+        recent = other.recent_after(self.session.id, messages[0].id)
+        self.assertEqual(json.loads(recent[0][2])["content"], "b")
+
+    async def test_message_count_requires_subscription_with_broker(self):
+        """Con varios workers el contador solo vale mientras hay suscripción"""
+        broker = MagicMock(local=False, publish=AsyncMock(), start=AsyncMock())
+        await self.manager.start_broker(broker)
+        self.manager.create_session(session=self.session, message_count=5)
+        self.assertIsNone(self.manager.get_message_count(self.session.id))
+
+        websocket = await self.connect(FakeWebSocket())
+        self.manager.set_message_count(self.session.id, 5)
+        self.manager._deliver(self.session.id, "{}", 2)
+        self.assertEqual(self.manager.get_message_count(self.session.id), 7)
+
+        self.manager.disconnect(websocket, self.session.id)
+        broker.unsubscribe.assert_called_once_with(self.session.id)
+        self.assertIsNone(self.manager.get_message_count(self.session.id))
+
+    async def test_stale_count_is_not_stored(self):
+        """Un COUNT que se cruzó con una inserción no pisa el contador"""
+        self.manager.create_session(session=self.session)
+        session_id = self.session.id
+
+        generation = self.manager.message_count_generation(session_id)
+        # Inserción mientras el COUNT (que no la incluye) está en curso
+        self.manager.increment_message_count(session_id)
+        self.manager.set_message_count(session_id, 10, generation=generation)
+        self.assertIsNone(self.manager.get_message_count(session_id))
+
+        generation = self.manager.message_count_generation(session_id)
+        self.manager.set_message_count(session_id, 11, generation=generation)
+        self.manager.increment_message_count(session_id)
+        self.assertEqual(self.manager.get_message_count(session_id), 12)
+
+    async def test_broadcast_unknown_session(self):
+        """No debe fallar si la sesión no está registrada"""
+        await self.manager.broadcast(message=Message(content="x", session_id=uuid4()))
+
+    async def test_recent_after(self):
+        """Los recientes en memoria cubren un last_seen solo si lo alcanzan"""
+        self.manager.create_session(session=self.session)
+        messages = [
+            Message(content=f"m{i}", session_id=self.session.id) for i in range(3)
+        ]
+        for message in messages:
+            await self.manager.broadcast(message=message)
+
+        after = self.manager.recent_after(self.session.id, messages[0].id)
+        self.assertEqual(
+            [key for _, key, _ in after], [str(m.id) for m in messages[1:]]
+        )
+        after = self.manager.recent_after(self.session.id, messages[0].timestamp)
+        self.assertEqual(len(after), 2)
+        self.assertIsNone(self.manager.recent_after(self.session.id, uuid4()))
+        self.assertIsNone(
+            self.manager.recent_after(self.session.id, datetime(2000, 1, 1))
+        )
+
+    async def test_hold_skips_replayed_messages(self):
+        """Los mensajes retenidos durante la reproducción no se duplican"""
+        websocket = FakeWebSocket()
+        writer = await self.manager.connect(
+            websocket=websocket, session=self.session, hold=True
+        )
+        replayed, live = (
+            Message(content=c, session_id=self.session.id) for c in ("a", "b")
+        )
+        await self.manager.broadcast(message=replayed)
+        await self.manager.broadcast(message=live)
+        await settle()
+        self.assertEqual(websocket.frames, [])
+
+        writer.release(replayed={str(replayed.id)}, skip={str(replayed.id)})
+        await self.manager.broadcast(message=replayed)
+        await settle()
+
+        self.assertEqual([json.loads(f)["content"] for f in websocket.frames], ["b"])
+
+
+class TestSessionRegistry(unittest.IsolatedAsyncioTestCase):
+    """Pruebas del registro acotado de sesiones"""
+
+    async def asyncSetUp(self):
+        self.manager = ConnectionManager()
+        self.manager.configure_registry(capacity=2, idle_ttl=60)
+        self.sessions = [MagicMock(id=uuid4()) for _ in range(3)]
+
+    def registered(self):
+        return set(self.manager.active_connections)
+
+    async def test_lru_eviction(self):
+        """Al superar la capacidad se desaloja la sesión usada hace más tiempo"""
+        first, second, third = self.sessions
+        self.manager.create_session(session=first)
+        self.manager.create_session(session=second)
+        self.manager.get_session(first.id)
+        self.manager.create_session(session=third)
+
+        self.assertEqual(self.registered(), {first.id, third.id})
+        self.assertIsNone(self.manager.get_session(second.id))
+
+    async def test_sessions_with_sockets_are_kept(self):
+        """Una sesión con sockets no se desaloja aunque se exceda la capacidad"""
+        first, second, third = self.sessions
+        websocket = FakeWebSocket()
+        await self.manager.connect(websocket=websocket, session=first)
+        self.manager.create_session(session=second)
+        self.manager.create_session(session=third)
+
+        self.assertEqual(self.registered(), {first.id, third.id})
+        self.manager.disconnect(websocket, first.id)
+
+    async def test_idle_ttl(self):
+        """Una sesión sin sockets ni uso durante el TTL se desaloja"""
+        session = self.sessions[0]
+        with patch("app.core.connection_manager.time.monotonic", return_value=100):
+            self.manager.create_session(session=session)
+        with patch("app.core.connection_manager.time.monotonic", return_value=161):
+            self.assertIsNone(self.manager.get_session(session.id))
+
+        self.assertEqual(self.registered(), set())
+
+    async def test_create_session_keeps_sockets(self):
+        """Registrar de nuevo una sesión no debe perder sus sockets"""
+        session = self.sessions[0]
+        websocket = FakeWebSocket()
+        await self.manager.connect(websocket=websocket, session=session)
+        self.manager.create_session(session=session)
+
+        entry = self.manager.active_connections[session.id]
+        self.assertIn(websocket, entry["connections"])
+        self.manager.disconnect(websocket, session.id)
+
+    async def test_disconnect_is_idempotent(self):
+        """Desconectar dos veces (o un socket ya descartado) no falla"""
+        session = self.sessions[0]
+        websocket = FakeWebSocket()
+        writer = await self.manager.connect(websocket=websocket, session=session)
+        writer.close()
+        await settle()
+
+        self.manager.disconnect(websocket, session.id)
+        self.manager.disconnect(websocket, session.id)
+        self.manager.disconnect(websocket, uuid4())
+        self.assertTrue(writer.closed)
+        self.assertEqual(self.manager.active_connections[session.id]["connections"], {})
+
+
+class TestConnectionWriter(unittest.IsolatedAsyncioTestCase):
+    """Pruebas de las políticas de desborde de ConnectionWriter"""
+
+    def writer(self, policy, on_close=None, max_queue=2):
+        self.websocket = FakeWebSocket(delay=None)
+        writer = ConnectionWriter(
+            self.websocket,
+            max_queue=max_queue,
+            policy=policy,
+            send_timeout=1,
+            on_close=on_close,
+        )
+        writer.start()
+        return writer
+
+    async def fill(self, writer, count, *, keyed=False):
+        # El primer frame queda bloqueado en send_text, el resto en la cola
+        for i in range(count):
+            writer.enqueue(json.dumps({"n": i}), key=str(i) if keyed else None)
+            await settle()
+
+    async def test_drop_oldest(self):
+        """Debe descartar el frame más antiguo de la cola"""
+        before = WS_DROPPED_MESSAGES.value("drop_oldest")
+        writer = self.writer(OverflowPolicy.drop_oldest)
+        await self.fill(writer, 5)
+
+        self.assertEqual(writer.dropped, 2)
+        self.assertEqual(WS_DROPPED_MESSAGES.value("drop_oldest") - before, 2)
+        self.assertEqual(list(writer.queue), ['{"n": 3}', '{"n": 4}'])
+
+    async def test_coalesce(self):
+        """Debe fusionar los mensajes pendientes en un arreglo JSON"""
+        writer = self.writer(OverflowPolicy.coalesce)
+        await self.fill(writer, 4, keyed=True)
+
+        self.websocket.released.set()
+        await settle()
+
+        self.assertEqual(writer.dropped, 0)
+        self.assertEqual(writer.coalesced, 2)
+        self.assertEqual(
+            [json.loads(frame) for frame in self.websocket.frames],
+            [{"n": 0}, [{"n": 1}, {"n": 2}], {"n": 3}],
+        )
+
+    async def test_coalesce_is_bounded(self):
+        """Desbordes repetidos no hacen crecer el frame fusionado"""
+        dropped = WS_DROPPED_MESSAGES.value("coalesce")
+        coalesced = WS_COALESCED_MESSAGES.value()
+        writer = self.writer(OverflowPolicy.coalesce)
+        await self.fill(writer, 100, keyed=True)
+        self.assertEqual(WS_DROPPED_MESSAGES.value("coalesce") - dropped, 96)
+        self.assertEqual(WS_COALESCED_MESSAGES.value() - coalesced, writer.coalesced)
+
+        self.assertLessEqual(len(writer.queue), writer.max_queue)
+        self.assertTrue(all(len(item) <= writer.max_queue for item in writer.queue))
+        self.assertEqual(writer.dropped, 96)
+
+        self.websocket.released.set()
+        await settle()
+        self.assertEqual(
+            [json.loads(frame) for frame in self.websocket.frames],
+            [{"n": 0}, [{"n": 97}, {"n": 98}], {"n": 99}],
+        )
+
+    async def test_coalesce_keeps_other_frames(self):
+        """Acks y arreglos de la reproducción no se fusionan con los mensajes"""
+        writer = self.writer(OverflowPolicy.coalesce, max_queue=3)
+        writer.enqueue(json.dumps({"n": 0}), key="0")
+        await settle()
+        writer.enqueue('{"ack": 1}')
+        writer.enqueue_many([("1", '{"n": 1}'), ("2", '{"n": 2}')], "unused")
+        writer.enqueue(json.dumps({"n": 3}), key="3")
+        writer.enqueue('[{"n": -1}]')
+        writer.enqueue(json.dumps({"n": 4}), key="4")
+
+        self.websocket.released.set()
+        await settle()
+        self.assertEqual(writer.dropped, 1)
+        self.assertEqual(
+            [json.loads(frame) for frame in self.websocket.frames],
+            [
+                {"n": 0},
+                {"ack": 1},
+                [{"n": 2}, {"n": 3}, {"n": 4}],
+                [{"n": -1}],
+            ],
+        )
+
+    async def test_disconnect_policy(self):
+        """Debe cerrar con 1013 al desbordar"""
+        before = WS_SLOW_CONSUMER_CLOSES.value("queue_full")
+        on_close = MagicMock()
+        writer = self.writer(OverflowPolicy.disconnect, on_close=on_close)
+        await self.fill(writer, 4)
+        self.assertEqual(WS_SLOW_CONSUMER_CLOSES.value("queue_full") - before, 1)
+
+        self.assertTrue(writer.closed)
+        self.assertFalse(writer.enqueue("{}"))
+        on_close.assert_called_once_with(writer)
+        self.websocket.close.assert_awaited_once_with(code=SLOW_CONSUMER_CLOSE_CODE)
@@ -0,0 +1,98 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, patch
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite://")
+os.environ.setdefault("JWT_SECRET", "secret")
+
+from sqlalchemy import Enum, inspect, text  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+from sqlalchemy.ext.asyncio import create_async_engine  # noqa: E402
+
+import app.models.audit_event  # noqa: E402, F401
+import app.models.login_attempt  # noqa: E402, F401
+import app.models.message  # noqa: E402, F401
+import app.models.revoked_token  # noqa: E402, F401
+import app.models.session  # noqa: E402, F401
+import app.models.user  # noqa: E402, F401
+from app.core import db  # noqa: E402
+from app.core.search import message_search  # noqa: E402
+
+
+def already_exists() -> OperationalError:
+    return OperationalError(
+        "CREATE TABLE users", {}, Exception("table users already exists")
+    )
+
+
+class TestCreateSchema(unittest.IsolatedAsyncioTestCase):
+    """Pruebas de la creación del esquema al arrancar"""
+
+    async def asyncSetUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        # setup() habilita la búsqueda global: no debe afectar a otras pruebas
+        patcher = patch.object(message_search, "enabled", message_search.enabled)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.url = f"sqlite+aiosqlite:///{os.path.join(self.tmpdir.name, 'app.db')}"
+
+    async def asyncTearDown(self):
+        self.tmpdir.cleanup()
+
+    async def test_concurrent_workers(self):
+        """Varios workers sobre una base nueva crean el esquema sin errores"""
+        engines = [create_async_engine(self.url) for _ in range(4)]
+        await asyncio.gather(*(db.create_schema(engine) for engine in engines))
+
+        async with engines[0].connect() as conn:
+            tables = await conn.run_sync(
+                lambda sync_conn: inspect(sync_conn).get_table_names()
+            )
+        self.assertIn("messages", tables)
+        for engine in engines:
+            await engine.dispose()
+
+    async def test_already_exists_is_retried(self):
+        """Un "already exists" de otro proceso se reintenta una vez"""
+        engine = create_async_engine(self.url)
+        create = AsyncMock(side_effect=[already_exists(), None])
+        with patch.object(db, "_create_schema", create):
+            await db.create_schema(engine)
+        self.assertEqual(create.await_count, 2)
+
+        create = AsyncMock(side_effect=OperationalError("SELECT", {}, Exception("x")))
+        with patch.object(db, "_create_schema", create):
+            with self.assertRaises(OperationalError):
+                await db.create_schema(engine)
+        self.assertEqual(create.await_count, 1)
+        await engine.dispose()
+
+    async def test_adds_enum_column_to_existing_table(self):
+        """Una columna enum nueva crea primero su tipo y luego se agrega"""
+        engine = create_async_engine(self.url)
+        async with engine.begin() as conn:
+            await conn.execute(
+                text(
+                    "CREATE TABLE users (id CHAR(32) PRIMARY KEY, email VARCHAR, "
+                    "password VARCHAR, full_name VARCHAR(100), is_active BOOLEAN, "
+                    "created_at DATETIME)"
+                )
+            )
+
+        with patch.object(Enum, "create", autospec=True) as create_type:
+            await db.create_schema(engine)
+        self.assertTrue(
+            any(
+                call.kwargs.get("checkfirst") and call.args[0].name == "userrole"
+                for call in create_type.call_args_list
+            )
+        )
+
+        async with engine.connect() as conn:
+            columns = await conn.run_sync(
+                lambda sync_conn: inspect(sync_conn).get_columns("users")
+            )
+        self.assertIn("role", [column["name"] for column in columns])
+        await engine.dispose()
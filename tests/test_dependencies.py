@@ -0,0 +1,105 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from uuid import uuid4
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite://")
+os.environ.setdefault("JWT_SECRET", "secret")
+
+import httpx  # noqa: E402
+from fastapi import Depends, FastAPI  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.ext.asyncio import create_async_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlmodel import SQLModel  # noqa: E402
+from sqlmodel.ext.asyncio.session import AsyncSession  # noqa: E402
+
+import app.models.message  # noqa: E402, F401
+import app.models.session  # noqa: E402, F401
+from app.core import db  # noqa: E402
+from app.core.jwt import create_access_token  # noqa: E402
+from app.core.user_cache import UserCache  # noqa: E402
+from app.dependencies import (  # noqa: E402
+    get_message_service,
+    get_session_service,
+    get_token_user,
+    get_user_cache,
+    get_user_service,
+)
+from app.models.user import User  # noqa: E402
+from app.services.message_service import MessageService  # noqa: E402
+from app.services.session_service import SessionService  # noqa: E402
+from app.services.user_service import UserService  # noqa: E402
+
+
+class TestRequestSession(unittest.IsolatedAsyncioTestCase):
+    """Pruebas de la sesión de base de datos compartida por petición"""
+
+    async def asyncSetUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        path = os.path.join(self.tmpdir.name, "app.db")
+        self.engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        async with self.engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        self.user = User(email="a@b.com", full_name="A", password=None)
+        async with AsyncSession(self.engine, expire_on_commit=False) as session:
+            session.add(self.user)
+            await session.commit()
+
+        # db.get_session con un motor propio de la prueba
+        patcher = patch.object(
+            db,
+            "async_session_maker",
+            sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.checkouts = 0
+
+        @event.listens_for(self.engine.sync_engine, "checkout")
+        def count_checkout(*args):
+            self.checkouts += 1
+
+        app = FastAPI()
+
+        @app.get("/check")
+        async def check(
+            user=Depends(get_token_user),
+            users: UserService = Depends(get_user_service),
+            messages: MessageService = Depends(get_message_service),
+            sessions: SessionService = Depends(get_session_service),
+        ):
+            await sessions.get_by_id(session_id=uuid4())
+            await messages.session_service.get_by_id(session_id=uuid4())
+            return {
+                "user": str(user.id),
+                "sessions": len(
+                    {id(users.session), id(messages.session), id(sessions.session)}
+                ),
+            }
+
+        # Sin caché: get_token_user carga el usuario con la sesión de la petición
+        app.dependency_overrides[get_user_cache] = lambda: UserCache(max_size=0)
+        self.client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        )
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+        await self.engine.dispose()
+        self.tmpdir.cleanup()
+
+    async def test_services_share_one_session_and_connection(self):
+        """Usuario y servicios de una petición usan una sesión y una conexión"""
+        # Token sin rol: se revalida con load_user (consulta a la base)
+        token = create_access_token({"sub": str(self.user.id)})
+        self.checkouts = 0
+        response = await self.client.get(
+            "/check", headers={"Authorization": f"Bearer {token}"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"user": str(self.user.id), "sessions": 1})
+        self.assertEqual(self.checkouts, 1)
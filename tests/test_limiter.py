@@ -0,0 +1,143 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.core.limiter import (
+    RATE_LIMITED_CLOSE_CODE,
+    MemoryStore,
+    Rate,
+    RateLimiter,
+    RateLimitMiddleware,
+    SharedStore,
+    Throttle,
+    gcra,
+    parse_rate,
+)
+
+
+class TestGcra(unittest.TestCase):
+    """Pruebas del algoritmo GCRA y del parseo de límites"""
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate("100/minute"), Rate(100, 60))
+        self.assertEqual(parse_rate("10 / seconds"), Rate(10, 1))
+        self.assertEqual(parse_rate("5/10minutes"), Rate(5, 600))
+        for value in ("", "0/minute", "diez/minute", "10/week"):
+            with self.assertRaises(ValueError):
+                parse_rate(value)
+
+    def test_burst_then_refill(self):
+        """Admite la ráfaga completa, rechaza y vuelve a admitir al pasar el intervalo"""
+        rate = Rate(3, 3)
+        tat, now = 0.0, 100.0
+        for _ in range(3):
+            tat, wait = gcra(tat, now, rate)
+            self.assertEqual(wait, 0)
+
+        rejected, wait = gcra(tat, now, rate)
+        self.assertEqual(rejected, tat)
+        self.assertAlmostEqual(wait, 1.0)
+
+        _, wait = gcra(tat, now + 1.0, rate)
+        self.assertEqual(wait, 0)
+
+    def test_memory_store_sweeps_idle_keys(self):
+        store = MemoryStore(sweep_interval=10)
+        rate = Rate(1, 1)
+        start = store._next_sweep - 10
+        store.acquire("a", rate, start)
+        store.acquire("b", rate, start)
+        self.assertEqual(len(store), 2)
+
+        store.acquire("c", rate, start + 10)
+        self.assertEqual(len(store), 1)
+
+    def test_shared_store_between_instances(self):
+        """Dos procesos (aquí dos instancias) comparten el mismo límite"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "ratelimit")
+            first = SharedStore(path=path, slots=64)
+            second = SharedStore(path=path, slots=64)
+            rate = Rate(2, 60)
+            try:
+                self.assertEqual(first.acquire("ip:1", rate, 10.0), 0)
+                self.assertEqual(second.acquire("ip:1", rate, 10.0), 0)
+                self.assertGreater(first.acquire("ip:1", rate, 10.0), 0)
+                self.assertEqual(second.acquire("ip:2", rate, 10.0), 0)
+            finally:
+                first.close()
+                second.close()
+
+    def test_throttle(self):
+        throttle = Throttle(Rate(2, 1))
+        with patch("app.core.limiter.time.monotonic", return_value=50.0):
+            self.assertEqual(
+                [throttle.acquire() > 0 for _ in range(3)], [False, False, True]
+            )
+        with patch("app.core.limiter.time.monotonic", return_value=50.5):
+            self.assertEqual(throttle.acquire(), 0)
+
+
+class TestRateLimiter(unittest.TestCase):
+    """Pruebas del limitador sobre una aplicación mínima"""
+
+    def setUp(self):
+        self.limiter = RateLimiter()
+        self.limiter.configure(enabled=True, default="5/minute", store=MemoryStore())
+
+        async def by_user(user: str = "anon") -> str:
+            return user
+
+        app = FastAPI()
+        app.add_middleware(RateLimitMiddleware, limiter=self.limiter)
+
+        @app.get("/ping")
+        async def ping():
+            return {"ok": True}
+
+        @app.get(
+            "/limited",
+            dependencies=[
+                Depends(self.limiter.limit("2/minute", scope="t", key=by_user))
+            ],
+        )
+        async def limited():
+            return {"ok": True}
+
+        @app.websocket("/ws")
+        async def ws(websocket):
+            await websocket.accept()
+            await websocket.close()
+
+        self.client = TestClient(app)
+
+    def test_default_limit_by_ip(self):
+        codes = [self.client.get("/ping").status_code for _ in range(6)]
+        self.assertEqual(codes, [200] * 5 + [429])
+        response = self.client.get("/ping")
+        self.assertEqual(response.json(), {"detail": "rate_limit_exceeded"})
+        self.assertGreaterEqual(int(response.headers["Retry-After"]), 1)
+
+    def test_route_limit_by_key(self):
+        """El límite de la ruta es por clave: otro usuario tiene su propio cupo"""
+        codes = [self.client.get("/limited?user=a").status_code for _ in range(3)]
+        self.assertEqual(codes, [200, 200, 429])
+        self.assertEqual(self.client.get("/limited?user=b").status_code, 200)
+
+    def test_websocket_handshake_closed_when_limited(self):
+        for _ in range(5):
+            self.client.get("/ping")
+        with self.assertRaises(WebSocketDisconnect) as ctx:
+            with self.client.websocket_connect("/ws"):
+                pass
+        self.assertEqual(ctx.exception.code, RATE_LIMITED_CLOSE_CODE)
+
+    def test_disabled(self):
+        self.limiter.enabled = False
+        codes = {self.client.get("/limited").status_code for _ in range(10)}
+        self.assertEqual(codes, {200})
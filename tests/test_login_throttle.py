@@ -0,0 +1,166 @@
+import os
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.login_throttle import LoginThrottle
+from app.models.login_attempt import LoginAttempt
+
+
+class TestLoginThrottle(unittest.IsolatedAsyncioTestCase):
+    """Pruebas del bloqueo de logins por fallos consecutivos"""
+
+    async def asyncSetUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        path = os.path.join(self.tmpdir.name, "logins.db")
+        self.engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        async with self.engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        self.throttle = LoginThrottle()
+
+    async def asyncTearDown(self):
+        await self.throttle.stop()
+        await self.engine.dispose()
+        self.tmpdir.cleanup()
+
+    async def start(self, **options):
+        await self.throttle.start(
+            self.engine,
+            **{
+                "max_failures": 3,
+                "max_block": 3600,
+                "retention": 86400,
+                "flush_interval": 60,
+                "prune_interval": 60,
+                "max_keys": 1000,
+                **options,
+            },
+        )
+
+    async def insert(self, *attempts):
+        async with AsyncSession(self.engine) as session:
+            session.add_all(attempts)
+            await session.commit()
+
+    async def stored(self):
+        async with AsyncSession(self.engine) as session:
+            stmt = select(LoginAttempt).order_by(LoginAttempt.timestamp)
+            return (await session.exec(stmt)).all()
+
+    def fail(self, times, username="ana", ip="1.1.1.1"):
+        for _ in range(times):
+            self.throttle.record(username, ip, success=False)
+
+    async def test_exponential_block(self):
+        """Bloquea desde max_failures fallos y duplica la espera con cada fallo"""
+        await self.start()
+        self.fail(2)
+        self.assertEqual(self.throttle.blocked_for("ana", "1.1.1.1"), 0)
+
+        self.fail(1)
+        self.assertAlmostEqual(self.throttle.blocked_for("ana", "1.1.1.1"), 60, delta=1)
+        self.assertEqual(self.throttle.blocked_for("ana", "2.2.2.2"), 0)
+
+        # Pasado el bloqueo, un fallo más bloquea el doble
+        later = time.time() + 61
+        with patch("app.core.login_throttle.time.time", return_value=later):
+            self.assertEqual(self.throttle.blocked_for("ana", "1.1.1.1"), 0)
+            self.fail(1)
+            self.assertAlmostEqual(
+                self.throttle.blocked_for("ana", "1.1.1.1"), 120, delta=1
+            )
+
+    async def test_success_resets(self):
+        await self.start()
+        self.fail(2)
+        self.throttle.record("ana", "1.1.1.1", success=True)
+        self.fail(2)
+        self.assertEqual(self.throttle.blocked_for("ana", "1.1.1.1"), 0)
+        self.assertEqual(len(self.throttle), 1)
+
+    async def test_block_is_capped(self):
+        await self.start(max_block=90)
+        self.fail(40)
+        self.assertLessEqual(self.throttle.blocked_for("ana", "1.1.1.1"), 90)
+
+    async def test_keys_are_capped(self):
+        """Usuarios inventados no hacen crecer los contadores sin límite"""
+        await self.start(max_keys=3)
+        self.fail(3)
+        for i in range(10):
+            self.fail(1, username=f"falso{i}")
+            # Un nuevo fallo de ana la mantiene entre las más recientes
+            self.fail(1)
+
+        self.assertEqual(len(self.throttle), 3)
+        self.assertGreater(self.throttle.blocked_for("ana", "1.1.1.1"), 0)
+        self.assertEqual(list(self.throttle._failures)[0], ("falso8", "1.1.1.1"))
+
+    async def test_attempts_written_in_batches(self):
+        """Los intentos se guardan al vaciar el lote, no uno por uno"""
+        await self.start()
+        self.fail(2)
+        self.throttle.record("ana", "1.1.1.1", success=True)
+        self.assertEqual(await self.stored(), [])
+
+        await self.throttle.flush()
+        self.assertEqual([a.success for a in await self.stored()], [False, False, True])
+
+    async def test_stop_flushes_pending(self):
+        await self.start()
+        self.fail(1)
+        await self.throttle.stop()
+        self.assertEqual(len(await self.stored()), 1)
+        self.throttle.record("ana", "1.1.1.1", success=False)
+        self.assertEqual(self.throttle._pending, [])
+
+    async def test_start_rebuilds_and_prunes(self):
+        """Reconstruye los fallos consecutivos retenidos y purga los antiguos"""
+        now = datetime.utcnow()
+        await self.insert(
+            LoginAttempt(
+                username="ana",
+                ip_address="1.1.1.1",
+                success=False,
+                timestamp=now - timedelta(days=2),
+            ),
+            LoginAttempt(
+                username="ana",
+                ip_address="1.1.1.1",
+                success=True,
+                timestamp=now - timedelta(minutes=5),
+            ),
+            *(
+                LoginAttempt(
+                    username="ana",
+                    ip_address="1.1.1.1",
+                    success=False,
+                    timestamp=now - timedelta(seconds=30 - i),
+                )
+                for i in range(3)
+            ),
+            LoginAttempt(
+                username="luis",
+                ip_address="1.1.1.1",
+                success=False,
+                timestamp=now - timedelta(minutes=1),
+            ),
+        )
+
+        await self.start()
+
+        self.assertEqual(len(await self.stored()), 5)
+        self.assertAlmostEqual(self.throttle.blocked_for("ana", "1.1.1.1"), 32, delta=2)
+        self.assertEqual(self.throttle.blocked_for("luis", "1.1.1.1"), 0)
+        self.assertEqual(len(self.throttle), 2)
+
+    async def test_disabled_does_nothing(self):
+        self.fail(10)
+        self.assertEqual(self.throttle.blocked_for("ana", "1.1.1.1"), 0)
+        self.assertEqual(len(self.throttle), 0)
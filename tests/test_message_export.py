@@ -0,0 +1,85 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.connection_manager import ConnectionManager
+from app.models.message import Message
+from app.models.session import Session
+from app.models.user import User
+from app.schemas.message import MessageExportFilters
+from app.services import message_service
+from app.services.message_service import MessageService
+
+
+class TestMessageExport(unittest.IsolatedAsyncioTestCase):
+    """Pruebas de la exportación NDJSON sobre SQLite en archivo"""
+
+    async def asyncSetUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        path = os.path.join(self.tmpdir.name, "messages.db")
+        self.engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        async with self.engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+
+        user = User(email="a@b.com", full_name="A", password=None)
+        self.session = Session(name="A", created_by_id=user.id)
+        other = Session(name="B", created_by_id=user.id)
+        start = datetime(2025, 1, 1)
+        messages = [
+            Message(
+                content=f"m{i}",
+                session_id=self.session.id,
+                sender_id=user.id,
+                timestamp=start + timedelta(minutes=i),
+            )
+            # Insertados desordenados: la exportación ordena por timestamp
+            for i in reversed(range(7))
+        ]
+        messages.append(Message(content="otra", session_id=other.id, sender_id=None))
+        async with AsyncSession(self.engine, expire_on_commit=False) as db:
+            db.add_all([user, self.session, other, *messages])
+            await db.commit()
+
+    async def asyncTearDown(self):
+        await self.engine.dispose()
+        self.tmpdir.cleanup()
+
+    async def export(self, **filters):
+        async with AsyncSession(self.engine) as db:
+            service = MessageService(session=db, manager=ConnectionManager())
+            chunks = [
+                chunk
+                async for chunk in service.export_messages(
+                    session_id=self.session.id,
+                    params=MessageExportFilters(**filters),
+                )
+            ]
+        return chunks, [json.loads(line) for line in "".join(chunks).splitlines()]
+
+    async def test_exports_whole_history_in_batches(self):
+        """Exporta todos los mensajes de la sesión en orden, por bloques"""
+        with patch.object(message_service, "EXPORT_BATCH_SIZE", 3):
+            chunks, rows = await self.export()
+
+        self.assertEqual([row["content"] for row in rows], [f"m{i}" for i in range(7)])
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(
+            set(rows[0]),
+            {"id", "session_id", "content", "timestamp", "sender_type", "sender_id"},
+        )
+
+    async def test_time_range(self):
+        """since es inclusivo, until exclusivo y acepta zona horaria"""
+        _, rows = await self.export(
+            since=datetime(2025, 1, 1, 0, 2),
+            until=datetime(2025, 1, 1, 2, 5, tzinfo=timezone(timedelta(hours=2))),
+        )
+
+        self.assertEqual([row["content"] for row in rows], ["m2", "m3", "m4"])
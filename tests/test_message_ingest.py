@@ -0,0 +1,176 @@
+import asyncio
+import json
+import unittest
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+from fastapi import HTTPException
+
+from app.core.limiter import Rate, Throttle
+from app.services.message_ingest import MessageIngest
+
+
+class TestMessageIngest(unittest.IsolatedAsyncioTestCase):
+    """Pruebas de la ingesta de mensajes por WebSocket"""
+
+    async def asyncSetUp(self):
+        self.service = MagicMock(writer=None, session=AsyncMock())
+        self.service.create_message = AsyncMock(side_effect=self.create_message)
+        self.manager = MagicMock()
+        self.session_id = uuid4()
+        self.sender_id = uuid4()
+        self.ingest = self.build(sender_id=self.sender_id)
+
+    def build(self, *, sender_id, max_pending=8, throttle=None):
+        ingest = MessageIngest(
+            service=self.service,
+            manager=self.manager,
+            websocket=MagicMock(),
+            session_id=self.session_id,
+            sender_id=sender_id,
+            max_pending=max_pending,
+            throttle=throttle,
+        )
+        ingest.start()
+        return ingest
+
+    async def create_message(self, *, message_data, sender_id):
+        if message_data.content == "ofensivo":
+            raise HTTPException(status_code=400, detail="ofensive_content")
+        return {
+            "data": {
+                "message_id": uuid4(),
+                "content": message_data.content,
+                "timestamp": datetime.utcnow(),
+            }
+        }
+
+    def replies(self):
+        return [json.loads(call.args[2]) for call in self.manager.send.call_args_list]
+
+    async def send(self, ingest, *frames):
+        for frame in frames:
+            await ingest.submit(frame if isinstance(frame, str) else json.dumps(frame))
+        await ingest.stop()
+
+    async def test_pipelined_acks_in_order(self):
+        """Cada mensaje recibe su ack con el client_id, en orden de envío"""
+        await self.send(
+            self.ingest, *({"client_id": str(i), "content": f"m{i}"} for i in range(5))
+        )
+
+        replies = self.replies()
+        self.assertEqual([r["client_id"] for r in replies], ["0", "1", "2", "3", "4"])
+        self.assertTrue(all(r["type"] == "ack" for r in replies))
+        message_data = self.service.create_message.await_args.kwargs["message_data"]
+        self.assertEqual(message_data.session_id, self.session_id)
+        self.assertEqual(
+            self.service.create_message.await_args.kwargs["sender_id"], self.sender_id
+        )
+
+    async def test_errors_do_not_stop_the_stream(self):
+        """Un mensaje rechazado o inválido responde error y sigue con el resto"""
+        await self.send(
+            self.ingest,
+            {"client_id": "a", "content": "ofensivo"},
+            "{no json",
+            {"client_id": "c", "content": "x" * 301},
+            {"client_id": "d", "content": "hola"},
+        )
+
+        self.assertEqual(
+            [(r["type"], r["client_id"], r.get("detail")) for r in self.replies()],
+            [
+                ("error", "a", "ofensive_content"),
+                ("error", None, "invalid_format"),
+                ("error", "c", "invalid_format"),
+                ("ack", "d", None),
+            ],
+        )
+
+    async def test_anonymous_socket_cannot_send(self):
+        """Sin usuario autenticado los mensajes se rechazan"""
+        ingest = self.build(sender_id=None)
+        await self.send(ingest, {"client_id": "a", "content": "hola"})
+
+        self.assertEqual(self.replies()[0]["detail"], "not_authenticated")
+        self.service.create_message.assert_not_awaited()
+
+    async def test_backpressure(self):
+        """Con la cola llena submit espera en lugar de acumular"""
+        release = asyncio.Event()
+
+        async def blocked(**kwargs):
+            await release.wait()
+            return await self.create_message(**kwargs)
+
+        self.service.create_message.side_effect = blocked
+        ingest = self.build(sender_id=self.sender_id, max_pending=1)
+        frame = json.dumps({"content": "hola"})
+        await ingest.submit(frame)
+        await asyncio.sleep(0)
+        await ingest.submit(frame)
+
+        pending = asyncio.ensure_future(ingest.submit(frame))
+        await asyncio.sleep(0.01)
+        self.assertFalse(pending.done())
+
+        release.set()
+        await pending
+        await ingest.stop()
+        self.assertEqual(len(self.replies()), 3)
+
+    async def test_throttled_socket_gets_rate_limited(self):
+        """Los mensajes por encima del límite del socket se rechazan sin procesarse"""
+        ingest = self.build(sender_id=self.sender_id, throttle=Throttle(Rate(2, 60)))
+        await self.send(
+            ingest, *({"client_id": str(i), "content": f"m{i}"} for i in range(4))
+        )
+
+        replies = sorted(self.replies(), key=lambda r: r["client_id"])
+        self.assertEqual(
+            [(r["type"], r.get("detail")) for r in replies],
+            [
+                ("ack", None),
+                ("ack", None),
+                ("error", "rate_limited"),
+                ("error", "rate_limited"),
+            ],
+        )
+        self.assertEqual(self.service.create_message.await_count, 2)
+
+    async def test_batch_error_does_not_stop_ingest(self):
+        """Un error fuera de un mensaje se registra y stop() no queda esperando"""
+        self.service.session.close.side_effect = [RuntimeError("db"), None]
+        with self.assertLogs("app.services.message_ingest", "ERROR"):
+            await self.ingest.submit(json.dumps({"client_id": "a", "content": "a"}))
+            await asyncio.sleep(0)
+            await self.ingest.submit(json.dumps({"client_id": "b", "content": "b"}))
+            await asyncio.wait_for(self.ingest.stop(), 1)
+
+        self.assertEqual([r["client_id"] for r in self.replies()], ["a", "b"])
+
+    async def test_group_commit_validates_session_first(self):
+        """Con group commit la sesión se valida antes de procesar en paralelo"""
+        calls = []
+
+        async def get_active(*, session_id):
+            calls.append("get_active")
+            await asyncio.sleep(0)
+            return MagicMock(id=session_id)
+
+        async def create_message(**kwargs):
+            calls.append("create_message")
+            return await self.create_message(**kwargs)
+
+        self.service.writer = MagicMock(enabled=True)
+        self.service.session_service.get_active = AsyncMock(side_effect=get_active)
+        self.service.create_message.side_effect = create_message
+        await self.send(
+            self.ingest, *({"client_id": str(i), "content": f"m{i}"} for i in range(3))
+        )
+
+        self.assertEqual(calls[0], "get_active")
+        self.assertEqual(calls.count("create_message"), 3)
+        self.assertEqual(len(self.replies()), 3)
@@ -0,0 +1,123 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.connection_manager import ConnectionManager
+from app.models.message import Message
+from app.models.session import Session
+from app.models.user import User
+from app.schemas.message import MessageFilters
+from app.services.message_service import MessageService
+
+
+class TestMessageCursorPagination(unittest.IsolatedAsyncioTestCase):
+    """Pruebas de la paginación por keyset (timestamp, id) sobre SQLite"""
+
+    async def asyncSetUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        path = os.path.join(self.tmpdir.name, "messages.db")
+        self.engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        async with self.engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+
+        user = User(email="a@b.com", full_name="A", password=None)
+        self.session = Session(name="A", created_by_id=user.id)
+        other = Session(name="B", created_by_id=user.id)
+        start = datetime(2025, 1, 1)
+        # Grupos de mensajes con el mismo timestamp: el id desempata
+        messages = [
+            Message(
+                content=f"m{i}",
+                session_id=self.session.id,
+                sender_id=user.id,
+                timestamp=start + timedelta(minutes=i // 3),
+            )
+            for i in range(11)
+        ]
+        messages.append(Message(content="otra", session_id=other.id, timestamp=start))
+        async with AsyncSession(self.engine, expire_on_commit=False) as db:
+            db.add_all([user, self.session, other, *messages])
+            await db.commit()
+
+        self.expected = [
+            m.id for m in sorted(messages[:-1], key=lambda m: (m.timestamp, m.id))
+        ]
+
+    async def asyncTearDown(self):
+        await self.engine.dispose()
+        self.tmpdir.cleanup()
+
+    async def page(self, **filters):
+        async with AsyncSession(self.engine) as db:
+            service = MessageService(session=db, manager=ConnectionManager())
+            return await service.message_list(
+                session_id=self.session.id,
+                params=MessageFilters(pagination="cursor", size=2, **filters),
+            )
+
+    async def walk(self, key: str, **filters):
+        """Recorre todas las páginas siguiendo `key` y devuelve los ids."""
+        pages = [await self.page(**filters)]
+        while pages[-1][key]:
+            pages.append(await self.page(cursor=pages[-1][key], **filters))
+        return pages
+
+    async def test_forward_and_back_without_gaps_or_duplicates(self):
+        """Ida y vuelta por cursor: cada mensaje aparece una vez y en orden"""
+        pages = await self.walk("next_cursor")
+        ids = [m.id for page in pages for m in page["items"]]
+        self.assertEqual(ids, self.expected)
+        self.assertEqual(len(pages), 6)
+        self.assertEqual(len(pages[-1]["items"]), 1)
+        self.assertIsNone(pages[0]["prev_cursor"])
+        self.assertEqual(pages[-1]["total"], 11)
+
+        # Desde la última página hacia atrás
+        back = [pages[-1]]
+        while back[-1]["prev_cursor"]:
+            back.append(await self.page(cursor=back[-1]["prev_cursor"]))
+        ids = [m.id for page in reversed(back) for m in page["items"]]
+        self.assertEqual(ids, self.expected)
+
+    async def test_count_racing_with_insert(self):
+        """Una inserción durante el COUNT no deja el total cacheado desfasado"""
+        manager = ConnectionManager()
+        manager.create_session(session=self.session)
+
+        async with AsyncSession(self.engine) as db:
+            service = MessageService(session=db, manager=manager)
+            exec_ = db.exec
+
+            async def exec_with_insert(query):
+                # El COUNT ya leyó 11 filas cuando se confirma otro mensaje
+                result = await exec_(query)
+                async with AsyncSession(self.engine) as other:
+                    other.add(Message(content="m11", session_id=self.session.id))
+                    await other.commit()
+                manager.increment_message_count(self.session.id)
+                return result
+
+            db.exec = exec_with_insert
+            self.assertEqual(
+                await service.count_messages(session_id=self.session.id), 11
+            )
+            db.exec = exec_
+
+            # El 11 no se cacheó: el siguiente total se cuenta de nuevo
+            self.assertIsNone(manager.get_message_count(self.session.id))
+            self.assertEqual(
+                await service.count_messages(session_id=self.session.id), 12
+            )
+            manager.increment_message_count(self.session.id)
+            self.assertEqual(manager.get_message_count(self.session.id), 13)
+
+    async def test_descending(self):
+        """En orden descendente recorre la misma secuencia invertida"""
+        pages = await self.walk("next_cursor", descending="DESC")
+        ids = [m.id for page in pages for m in page["items"]]
+        self.assertEqual(ids, self.expected[::-1])
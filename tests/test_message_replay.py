@@ -0,0 +1,107 @@
+import json
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+from app.core.connection_manager import ConnectionManager
+from app.core.pagination import decode_cursor
+from app.models.message import Message
+from app.models.user import User  # noqa: F401 (registra la relación)
+from app.services.message_replay import MessageReplay, parse_last_seen
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.frames = []
+
+    async def send_text(self, frame: str):
+        self.frames.append(json.loads(frame))
+
+
+class TestMessageReplay(unittest.IsolatedAsyncioTestCase):
+    """Pruebas de la reproducción del historial al reconectar"""
+
+    async def asyncSetUp(self):
+        self.session_id = uuid4()
+        start = datetime(2025, 1, 1)
+        self.messages = [
+            Message(
+                content=f"m{i}",
+                session_id=self.session_id,
+                timestamp=start + timedelta(seconds=i),
+            )
+            for i in range(10)
+        ]
+        self.service = MagicMock(session=AsyncMock())
+        self.service.get_message = AsyncMock(side_effect=self.get_message)
+        self.service.messages_after = AsyncMock(side_effect=self.messages_after)
+        self.websocket = FakeWebSocket()
+        self.writer = MagicMock()
+
+    async def get_message(self, *, session_id, message_id):
+        return next((m for m in self.messages if m.id == message_id), None)
+
+    async def messages_after(self, *, session_id, timestamp, message_id, limit):
+        return [m for m in self.messages if m.timestamp > timestamp][:limit]
+
+    async def replay(self, last_seen, *, limit=100):
+        replay = MessageReplay(
+            service=self.service,
+            manager=ConnectionManager(),
+            websocket=self.websocket,
+            session_id=self.session_id,
+            chunk_size=4,
+            limit=limit,
+            send_timeout=1,
+        )
+        await replay.run(self.writer, last_seen)
+        return replay
+
+    def contents(self):
+        return [[m["content"] for m in f] for f in self.websocket.frames[:-1]]
+
+    async def test_replays_stored_messages_in_chunks(self):
+        """Sin recientes en memoria lee la base de datos por bloques"""
+        replay = await self.replay(self.messages[0].id)
+
+        self.assertEqual(
+            self.contents(),
+            [["m1", "m2", "m3", "m4"], ["m5", "m6", "m7", "m8"], ["m9"]],
+        )
+        self.assertEqual(
+            self.websocket.frames[-1],
+            {"type": "replay_end", "count": 9, "complete": True, "next_cursor": None},
+        )
+        self.writer.release.assert_called_once_with(
+            replayed=replay.replayed, skip={str(self.messages[9].id)}
+        )
+        self.service.session.close.assert_awaited()
+
+    async def test_limit_returns_cursor(self):
+        """Al alcanzar el límite devuelve un cursor para GET /messages"""
+        await self.replay(self.messages[0].timestamp, limit=5)
+
+        end = self.websocket.frames[-1]
+        self.assertEqual(self.contents(), [["m1", "m2", "m3", "m4"], ["m5"]])
+        self.assertEqual((end["count"], end["complete"]), (5, False))
+        _, message_id, _ = decode_cursor(end["next_cursor"])
+        self.assertEqual(message_id, self.messages[5].id)
+
+    async def test_unknown_last_seen(self):
+        """Un id que no pertenece a la sesión responde error y pasa a vivo"""
+        await self.replay(uuid4())
+
+        self.assertEqual(self.websocket.frames[0]["detail"], "last_seen_not_found")
+        self.writer.release.assert_called_once()
+
+    def test_parse_last_seen(self):
+        """Acepta un id o un timestamp ISO 8601, convertido a UTC"""
+        message_id = uuid4()
+        self.assertEqual(parse_last_seen(str(message_id)), message_id)
+        self.assertEqual(
+            parse_last_seen("2025-01-01T03:00:00+02:00"), datetime(2025, 1, 1, 1)
+        )
+        self.assertIsInstance(parse_last_seen("2025-01-01T00:00:00"), datetime)
+        with self.assertRaises(ValueError):
+            parse_last_seen("ayer")
@@ -3,6 +3,7 @@ from unittest.mock import AsyncMock, MagicMock, patch
 from uuid import uuid4
 from fastapi import HTTPException, status
 
+from app.core.pagination import decode_cursor, encode_cursor
 from app.enums.send_types import SenderType
 from app.enums.session_enum import SessionLevelCensorship
 from app.schemas.message import MessageCreate, MessageFilters
@@ -30,9 +31,13 @@ class FakeMessage:
 
 
 class FakeResult:
-    def __init__(self, one_or_none=None, all_data=None):
+    def __init__(self, one_or_none=None, all_data=None, one=None):
         self._one_or_none = one_or_none
         self._all = all_data or []
+        self._one = one
+
+    def one(self):
+        return self._one
 
     def one_or_none(self):
         return self._one_or_none
@@ -42,6 +47,9 @@ class FakeResult:
 
 
 class FakeSelect:
+    def select_from(self, *args, **kwargs):
+        return self
+
     def where(self, *args, **kwargs):
         return self
 
@@ -58,23 +66,36 @@ class FakeSelect:
         return self
 
 
+class FakeRowValue:
+    def __lt__(self, other):
+        return True
+
+    def __gt__(self, other):
+        return True
+
+
 class TestMessageService(unittest.IsolatedAsyncioTestCase):
     """Pruebas unitarias para MessageService"""
 
     async def asyncSetUp(self):
         import app.services.message_service as service_module
 
-        # Patch del modelo Message, select y func
-        service_module.Message = FakeMessage
-        service_module.select = MagicMock(
-            side_effect=lambda *args, **kwargs: FakeSelect()
+        # Patch del modelo Message, select y func (se restauran al terminar)
+        self.module_patcher = patch.multiple(
+            service_module,
+            Message=FakeMessage,
+            select=MagicMock(side_effect=lambda *args, **kwargs: FakeSelect()),
+            func=MagicMock(),
+            tuple_=MagicMock(side_effect=lambda *args: FakeRowValue()),
         )
-        service_module.func = MagicMock()
+        self.module_patcher.start()
 
         # Mock de AsyncSession y ConnectionManager
         self.mock_session = AsyncMock()
         self.mock_manager = MagicMock()
         self.mock_manager.broadcast = AsyncMock()
+        self.mock_manager.broadcast_many = AsyncMock()
+        self.mock_manager.get_message_count.return_value = None
 
         # Instancia del servicio
         self.service = service_module.MessageService(
@@ -87,9 +108,10 @@ class TestMessageService(unittest.IsolatedAsyncioTestCase):
 
     async def asyncTearDown(self):
         self.patcher.stop()
+        self.module_patcher.stop()
 
     def fake_session_data(self, level):
-        return {"data": MagicMock(level_censorship=level)}
+        return MagicMock(level_censorship=level)
 
     async def test_create_message_low_censorship(self):
         """Debe crear mensaje sin censura en level LOW"""
@@ -100,9 +122,9 @@ class TestMessageService(unittest.IsolatedAsyncioTestCase):
             content="Hello world",
             sender_type=SenderType.user,
         )
-        self.mock_manager.active_connections = {
-            session_id: self.fake_session_data(SessionLevelCensorship.low)
-        }
+        self.mock_manager.get_session.return_value = self.fake_session_data(
+            SessionLevelCensorship.low
+        )
         self.mock_session.add = MagicMock()
         self.mock_session.commit = AsyncMock()
         self.mock_session.refresh = AsyncMock()
@@ -114,6 +136,7 @@ class TestMessageService(unittest.IsolatedAsyncioTestCase):
         )
 
         self.mock_session.add.assert_called_once()
+        self.mock_manager.increment_message_count.assert_called_once_with(session_id)
         self.mock_session.commit.assert_awaited()
         self.mock_session.refresh.assert_awaited()
         self.mock_profanity.censor.assert_not_called()
@@ -122,6 +145,75 @@ class TestMessageService(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(result["data"]["content"], "Hello world")
         self.assertEqual(result["data"]["sender"], SenderType.user)
 
+    async def test_create_message_group_commit(self):
+        """Debe delegar la escritura al pipeline de group commit si está activo"""
+        session_id = uuid4()
+        message_data = MessageCreate(
+            session_id=session_id,
+            content="Hello world",
+            sender_type=SenderType.user,
+        )
+        self.mock_manager.get_session.return_value = self.fake_session_data(
+            SessionLevelCensorship.low
+        )
+        writer = MagicMock(enabled=True)
+        writer.submit = AsyncMock(side_effect=lambda message: message)
+        self.service.writer = writer
+
+        result = await self.service.create_message(
+            sender_id="user-id", message_data=message_data
+        )
+
+        writer.submit.assert_awaited_once()
+        self.mock_session.add.assert_not_called()
+        self.mock_session.commit.assert_not_awaited()
+        self.mock_manager.increment_message_count.assert_called_once_with(session_id)
+        self.assertEqual(result["data"]["content"], "Hello world")
+
+    async def test_create_messages_bulk(self):
+        """Debe insertar los válidos en una transacción y reportar cada uno"""
+        high, medium, missing = uuid4(), uuid4(), uuid4()
+        sessions = {
+            high: self.fake_session_data(SessionLevelCensorship.high),
+            medium: self.fake_session_data(SessionLevelCensorship.medium),
+        }
+        self.service.session_service.get_active_many = AsyncMock(return_value=sessions)
+        self.mock_session.add_all = MagicMock()
+        self.mock_profanity.contains_profanity.side_effect = lambda text: "mala" in text
+        self.mock_profanity.censor.side_effect = lambda text: text.replace(
+            "mala", "****"
+        )
+        items = [
+            MessageCreate(session_id=session_id, content=content, sender_type=sender)
+            for session_id, content, sender in (
+                (high, "hola", SenderType.user),
+                (high, "palabra mala", SenderType.user),
+                (medium, "palabra mala", SenderType.system),
+                (missing, "hola", SenderType.system),
+                (medium, "chao", SenderType.system),
+            )
+        ]
+
+        result = await self.service.create_messages(user_id="user-id", items=items)
+
+        self.assertEqual((result["created"], result["rejected"]), (3, 2))
+        self.assertEqual(
+            [(r.index, r.status, r.detail) for r in result["results"]],
+            [
+                (0, "created", None),
+                (1, "rejected", "ofensive_content"),
+                (2, "created", None),
+                (3, "rejected", "session_not_found"),
+                (4, "created", None),
+            ],
+        )
+        self.assertEqual(result["results"][2].content, "palabra ****")
+        saved = self.mock_session.add_all.call_args.args[0]
+        self.assertEqual([m.sender_id for m in saved], ["user-id", None, None])
+        self.mock_session.commit.assert_awaited_once()
+        self.mock_manager.increment_message_count.assert_any_call(medium, 2)
+        self.mock_manager.increment_message_count.assert_any_call(high, 1)
+
     async def test_create_message_medium_censorship(self):
         """Debe censurar el contenido en level MEDIUM"""
         session_id = uuid4()
@@ -131,9 +223,9 @@ class TestMessageService(unittest.IsolatedAsyncioTestCase):
             content="badword",
             sender_type=SenderType.user,
         )
-        self.mock_manager.active_connections = {
-            session_id: self.fake_session_data(SessionLevelCensorship.medium)
-        }
+        self.mock_manager.get_session.return_value = self.fake_session_data(
+            SessionLevelCensorship.medium
+        )
         self.mock_profanity.censor.return_value = "****"
         self.mock_profanity.contains_profanity.return_value = False
 
@@ -154,9 +246,9 @@ class TestMessageService(unittest.IsolatedAsyncioTestCase):
             content="good message",
             sender_type=SenderType.system,
         )
-        self.mock_manager.active_connections = {
-            session_id: self.fake_session_data(SessionLevelCensorship.high)
-        }
+        self.mock_manager.get_session.return_value = self.fake_session_data(
+            SessionLevelCensorship.high
+        )
         self.mock_profanity.contains_profanity.return_value = False
 
         result = await self.service.create_message(
@@ -176,9 +268,9 @@ class TestMessageService(unittest.IsolatedAsyncioTestCase):
             content="badword",
             sender_type=SenderType.user,
         )
-        self.mock_manager.active_connections = {
-            session_id: self.fake_session_data(SessionLevelCensorship.high)
-        }
+        self.mock_manager.get_session.return_value = self.fake_session_data(
+            SessionLevelCensorship.high
+        )
         self.mock_profanity.contains_profanity.return_value = True
 
         with self.assertRaises(HTTPException) as exc:
@@ -189,6 +281,26 @@ class TestMessageService(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(exc.exception.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertEqual(exc.exception.detail, "ofensive_content")
 
+    async def test_create_message_loads_session_on_demand(self):
+        """Si la sesión no está registrada debe cargarla y registrarla"""
+        session_id = uuid4()
+        message_data = MessageCreate(
+            session_id=session_id,
+            content="Hello world",
+            sender_type=SenderType.user,
+        )
+        fake_session = self.fake_session_data(SessionLevelCensorship.low)
+        self.mock_manager.get_session.return_value = None
+        self.mock_session.exec.return_value = FakeResult(one_or_none=fake_session)
+        self.mock_session.add = MagicMock()
+
+        result = await self.service.create_message(
+            sender_id="user-id", message_data=message_data
+        )
+
+        self.mock_manager.create_session.assert_called_once_with(session=fake_session)
+        self.assertEqual(result["data"]["content"], "Hello world")
+
     async def test_create_message_session_not_found(self):
         """Debe lanzar error si la sesión no existe"""
         session_id = uuid4()
@@ -198,7 +310,8 @@ class TestMessageService(unittest.IsolatedAsyncioTestCase):
             sender_type=SenderType.user,
             session_id=session_id,
         )
-        self.mock_manager.active_connections = {}
+        self.mock_manager.get_session.return_value = None
+        self.mock_session.exec.return_value = FakeResult(one_or_none=None)
 
         with self.assertRaises(HTTPException) as exc:
             await self.service.create_message(
@@ -219,12 +332,17 @@ class TestMessageService(unittest.IsolatedAsyncioTestCase):
             FakeMessage(content="M2", sender_type=SenderType.system),
         ]
         self.mock_session.exec.side_effect = [
-            FakeResult(all_data=fake_messages),
+            FakeResult(one=2),
             FakeResult(all_data=fake_messages),
         ]
 
         result = await self.service.message_list(session_id=session_id, params=params)
 
+        self.mock_manager.set_message_count.assert_called_once_with(
+            session_id,
+            2,
+            generation=self.mock_manager.message_count_generation.return_value,
+        )
         self.assertEqual(result["total"], 2)
         self.assertEqual(len(result["items"]), 2)
         self.assertEqual(result["items"][0].content, "M1")
@@ -239,13 +357,82 @@ class TestMessageService(unittest.IsolatedAsyncioTestCase):
         )
         fake_messages = [FakeMessage(content="foo", sender_type=SenderType.user)]
         self.mock_session.exec.side_effect = [
-            FakeResult(all_data=fake_messages),
+            FakeResult(one=1),
             FakeResult(all_data=fake_messages),
         ]
 
         result = await self.service.message_list(session_id=session_id, params=params)
 
+        # Con búsqueda el total se cuenta en SQL y no se cachea
+        self.mock_manager.get_message_count.assert_not_called()
+        self.mock_manager.set_message_count.assert_not_called()
         self.assertEqual(result["total"], 1)
         self.assertEqual(len(result["items"]), 1)
         self.assertEqual(result["items"][0].content, "foo")
         self.assertEqual(result["items"][0].sender_type, SenderType.user)
+
+    async def test_message_list_uses_cached_total(self):
+        """Sin filtros debe usar el contador en memoria y no contar en SQL"""
+        session_id = uuid4()
+        params = MessageFilters(page=1, size=10)
+        fake_messages = [FakeMessage(content="M1")]
+        self.mock_manager.get_message_count.return_value = 42
+        self.mock_session.exec.side_effect = [FakeResult(all_data=fake_messages)]
+
+        result = await self.service.message_list(session_id=session_id, params=params)
+
+        self.assertEqual(result["total"], 42)
+        self.assertEqual(self.mock_session.exec.await_count, 1)
+
+    async def test_message_list_cursor_first_page(self):
+        """Debe paginar por cursor y devolver next_cursor si hay más filas"""
+        session_id = uuid4()
+        params = MessageFilters(pagination="cursor", size=2)
+        fake_messages = [FakeMessage(content=f"M{i}") for i in range(3)]
+        self.mock_session.exec.side_effect = [
+            FakeResult(one=3),
+            FakeResult(all_data=fake_messages),
+        ]
+
+        result = await self.service.message_list(session_id=session_id, params=params)
+
+        self.assertEqual(len(result["items"]), 2)
+        self.assertIsNone(result["prev_cursor"])
+        timestamp, message_id, direction = decode_cursor(result["next_cursor"])
+        self.assertEqual(message_id, fake_messages[1].id)
+        self.assertEqual(timestamp, fake_messages[1].timestamp)
+        self.assertEqual(direction, "next")
+
+    async def test_message_list_cursor_prev_page(self):
+        """Debe invertir la página al retroceder y ofrecer ambos cursores"""
+        session_id = uuid4()
+        anchor = FakeMessage()
+        params = MessageFilters(
+            size=2,
+            cursor=encode_cursor(
+                timestamp=anchor.timestamp, id=anchor.id, direction="prev"
+            ),
+        )
+        fake_messages = [FakeMessage(content=f"M{i}") for i in range(3)]
+        self.mock_session.exec.side_effect = [
+            FakeResult(one=3),
+            FakeResult(all_data=list(fake_messages)),
+        ]
+
+        result = await self.service.message_list(session_id=session_id, params=params)
+
+        self.assertEqual([m.content for m in result["items"]], ["M1", "M0"])
+        self.assertEqual(decode_cursor(result["next_cursor"])[1], fake_messages[0].id)
+        self.assertEqual(decode_cursor(result["prev_cursor"])[1], fake_messages[1].id)
+
+    async def test_message_list_invalid_cursor(self):
+        """Debe rechazar cursores mal formados"""
+        params = MessageFilters(cursor="no-es-un-cursor")
+
+        with self.assertRaises(HTTPException) as exc:
+            await self.service.message_list(session_id=uuid4(), params=params)
+
+        self.assertEqual(
+            exc.exception.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+        self.assertEqual(exc.exception.detail, "invalid_cursor")
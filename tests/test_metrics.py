@@ -0,0 +1,156 @@
+import unittest
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.metrics import (
+    DB_QUERY_DURATION,
+    HTTP_REQUEST_DURATION,
+    Histogram,
+    MetricsMiddleware,
+    Registry,
+    instrument_engine,
+    statement_type,
+)
+from app.routers import metrics as metrics_router
+from app.settings import get_settings
+
+
+class TestRegistry(unittest.TestCase):
+    """Pruebas de las métricas y del formato de texto de Prometheus"""
+
+    def test_histogram_render(self):
+        """Los buckets se exportan acumulados, con +Inf, suma y conteo"""
+        registry = Registry()
+        histogram = registry.histogram("lat", "Latencia.", ("route",), buckets=(0.1, 1))
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe(value, "/a")
+
+        lines = registry.render().splitlines()
+        self.assertEqual(
+            lines,
+            [
+                "# HELP lat Latencia.",
+                "# TYPE lat histogram",
+                'lat_bucket{route="/a",le="0.1"} 2',
+                'lat_bucket{route="/a",le="1"} 3',
+                'lat_bucket{route="/a",le="+Inf"} 4',
+                'lat_sum{route="/a"} 3.65',
+                'lat_count{route="/a"} 4',
+            ],
+        )
+
+    def test_counter_gauge_and_escaping(self):
+        registry = Registry()
+        counter = registry.counter("hits_total", "Hits.", ("path",))
+        counter.inc('/a"b\\')
+        counter.inc('/a"b\\', amount=2)
+        registry.gauge(
+            "conns", "Conexiones.", ("session_id",), collect=lambda: [(("s1",), 3)]
+        )
+        registry.histogram("empty", "Sin etiquetas.").observe(0.2)
+
+        text_ = registry.render()
+        self.assertIn('hits_total{path="/a\\"b\\\\"} 3', text_)
+        self.assertIn('conns{session_id="s1"} 3', text_)
+        self.assertIn('empty_bucket{le="+Inf"} 1', text_)
+        self.assertIn("empty_count 1", text_)
+
+    def test_duplicate_name(self):
+        registry = Registry()
+        registry.counter("x", "x")
+        with self.assertRaises(ValueError):
+            registry.counter("x", "x")
+
+    def test_statement_type(self):
+        self.assertEqual(statement_type("  select * from t"), "SELECT")
+        self.assertEqual(statement_type("INSERT INTO t VALUES (1)"), "INSERT")
+        self.assertEqual(statement_type("PRAGMA journal_mode = WAL"), "OTHER")
+
+
+class TestMetricsMiddleware(unittest.TestCase):
+    """Pruebas del middleware de latencia por ruta"""
+
+    def test_route_template_and_status(self):
+        app = FastAPI()
+        app.add_middleware(MetricsMiddleware)
+
+        @app.get("/items/{item_id}")
+        async def item(item_id: int):
+            return {"id": item_id}
+
+        client = TestClient(app)
+        before = HTTP_REQUEST_DURATION.count("GET", "/items/{item_id}", "200")
+        client.get("/items/1")
+        client.get("/items/2")
+        client.get("/items/x")
+        client.get("/otra")
+
+        self.assertEqual(
+            HTTP_REQUEST_DURATION.count("GET", "/items/{item_id}", "200") - before, 2
+        )
+        self.assertGreaterEqual(
+            HTTP_REQUEST_DURATION.count("GET", "/items/{item_id}", "422"), 1
+        )
+        self.assertGreaterEqual(
+            HTTP_REQUEST_DURATION.count("GET", "unmatched", "404"), 1
+        )
+
+
+class TestMetricsEndpoint(unittest.TestCase):
+    """Pruebas del acceso a /metrics"""
+
+    def client(self, token):
+        app = FastAPI()
+        app.include_router(metrics_router.router)
+        app.dependency_overrides[get_settings] = lambda: SimpleNamespace(
+            METRICS_TOKEN=token
+        )
+        return TestClient(app)
+
+    def test_open_without_token(self):
+        response = self.client(None).get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("session_id", response.text)
+
+    def test_requires_configured_token(self):
+        """Con METRICS_TOKEN solo responde al Bearer correcto"""
+        client = self.client("secreto")
+        for headers in (
+            {},
+            {"Authorization": "Bearer otro"},
+            {"Authorization": "secreto"},
+        ):
+            response = client.get("/metrics", headers=headers)
+            self.assertEqual(response.status_code, 401)
+            self.assertEqual(response.json()["detail"], "invalid_metrics_token")
+
+        response = client.get("/metrics", headers={"Authorization": "Bearer secreto"})
+        self.assertEqual(response.status_code, 200)
+
+
+class TestInstrumentEngine(unittest.IsolatedAsyncioTestCase):
+    """Pruebas de la medición de sentencias SQL"""
+
+    async def test_queries_by_type(self):
+        engine = create_async_engine("sqlite+aiosqlite://")
+        instrument_engine(engine)
+        before = DB_QUERY_DURATION.count("SELECT")
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            await conn.execute(text("SELECT 2"))
+        await engine.dispose()
+
+        self.assertEqual(DB_QUERY_DURATION.count("SELECT") - before, 2)
+
+
+class TestHistogram(unittest.TestCase):
+    def test_count_per_labels(self):
+        histogram = Histogram("h", "h", ("level",))
+        histogram.observe(0.001, "medium")
+        histogram.observe(0.002, "medium")
+        self.assertEqual(histogram.count("medium"), 2)
+        self.assertEqual(histogram.count("high"), 0)
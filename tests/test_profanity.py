@@ -0,0 +1,100 @@
+import os
+import random
+import unittest
+
+from better_profanity import Profanity
+
+from app.core.profanity import ProfanityFilter
+
+BADWORDS_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "app",
+    "profanity_word_list.txt",
+)
+
+LEET = {"a": "@4*", "e": "3*", "i": "1l*", "o": "0@*", "s": "$5", "t": "7", "u": "v*"}
+VOCABULARY = (
+    "hola que tal amigo como estas el la de a y en tu mi madre perro ñoño "
+    "árbol canción 1 ok @ $ * ' \" PUTA Pendejo p*ta m13rda"
+).split()
+SEPARATORS = [" ", "  ", ", ", ". ", "!", "-", "_", " (", ") ", "\n", "..."]
+
+
+def build_corpus(size: int, seed: int = 7) -> list[str]:
+    """Corpus determinista que mezcla texto limpio, groserías y leetspeak."""
+    rnd = random.Random(seed)
+    with open(BADWORDS_PATH, encoding="utf-8") as f:
+        badwords = [w.strip() for w in f if w.strip()]
+
+    def leet(word: str) -> str:
+        return "".join(
+            rnd.choice([c, c.upper(), *LEET.get(c, "")]) if rnd.random() < 0.3 else c
+            for c in word
+        )
+
+    corpus = []
+    for _ in range(size):
+        tokens = []
+        for _ in range(rnd.randint(1, 10)):
+            word = rnd.choice(badwords if rnd.random() < 0.3 else VOCABULARY)
+            tokens.append(leet(word) if rnd.random() < 0.3 else word)
+            tokens.append(rnd.choice(SEPARATORS) if rnd.random() < 0.3 else " ")
+        text = "".join(tokens)
+        corpus.append(text.rstrip() if rnd.random() < 0.5 else text)
+    return corpus
+
+
+class TestProfanityFilter(unittest.TestCase):
+    """Pruebas del filtro compilado contra better_profanity"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.reference = Profanity()
+        cls.reference.load_censor_words_from_file(BADWORDS_PATH)
+        cls.engine = ProfanityFilter()
+        cls.engine.load_censor_words_from_file(BADWORDS_PATH)
+
+    def test_censor_single_word(self):
+        """Debe censurar palabras sueltas y conservar los separadores"""
+        self.assertEqual(self.engine.censor("eres un pendejo!"), "eres un ****!")
+
+    def test_censor_leetspeak_and_case(self):
+        """Debe reconocer sustituciones y mayúsculas"""
+        self.assertEqual(self.engine.censor("M13RDA total"), "**** total")
+
+    def test_censor_phrase(self):
+        """Debe censurar frases de varias palabras como un solo bloque"""
+        self.assertEqual(self.engine.censor("eso, hijo de puta."), "eso, ****.")
+
+    def test_clean_text_untouched(self):
+        """No debe modificar texto limpio"""
+        text = "hola, ¿cómo estás?"
+        self.assertEqual(self.engine.censor(text), text)
+        self.assertFalse(self.engine.contains_profanity(text))
+
+    def test_empty_wordlist(self):
+        """Sin lista cargada no debe censurar nada"""
+        self.assertEqual(ProfanityFilter().censor("mierda"), "mierda")
+
+    def test_transitions_bounded_by_alphabet(self):
+        """Caracteres ajenos a la lista no agregan transiciones al autómata"""
+        engine = ProfanityFilter(words=["puta", "hijo de puta"])
+        engine.censor("puta hijo de puta")
+        before = sum(len(t) for t in engine._transitions)
+
+        for start in range(0x4E00, 0x4E00 + 20000, 200):
+            engine.censor(" ".join(chr(c) * 3 for c in range(start, start + 200)))
+        engine.censor("p" + "".join(chr(c) for c in range(0x0400, 0x0500)))
+
+        self.assertEqual(sum(len(t) for t in engine._transitions), before)
+        self.assertEqual(engine.censor("pvt@ 漢字"), "**** 漢字")
+
+    def test_golden_corpus(self):
+        """Debe coincidir con better_profanity en el corpus de referencia"""
+        for text in build_corpus(1000):
+            with self.subTest(text=text):
+                self.assertEqual(self.engine.censor(text), self.reference.censor(text))
+                self.assertEqual(
+                    self.engine.contains_profanity(text),
+                    self.reference.contains_profanity(text),
+                )
@@ -0,0 +1,87 @@
+import unittest
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.metrics import DB_QUERIES_PER_REQUEST, instrument_engine
+from app.core.query_stats import (
+    QueryMonitor,
+    QueryStatsMiddleware,
+    redact,
+    statement_shape,
+)
+
+
+class TestQueryStats(unittest.IsolatedAsyncioTestCase):
+    """Pruebas de la instrumentación SQL por petición"""
+
+    async def asyncSetUp(self):
+        self.engine = create_async_engine("sqlite+aiosqlite://")
+        self.monitor = QueryMonitor()
+        self.monitor.configure(slow_threshold=60, n_plus_one_threshold=3)
+        instrument_engine(self.engine, on_query=self.monitor.record)
+
+        self.app = FastAPI()
+        self.app.add_middleware(QueryStatsMiddleware, monitor=self.monitor)
+
+        @self.app.get("/items/{n}")
+        async def items(n: int):
+            async with self.engine.connect() as conn:
+                for i in range(n):
+                    await conn.execute(text("SELECT :i"), {"i": i})
+            return {"n": n}
+
+        self.client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=self.app), base_url="http://test"
+        )
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+        await self.engine.dispose()
+
+    async def test_server_timing_counts_request_queries(self):
+        """La cabecera Server-Timing trae las consultas de la petición"""
+        before = DB_QUERIES_PER_REQUEST.count("GET", "/items/{n}")
+        response = await self.client.get("/items/2")
+        self.assertRegex(
+            response.headers["server-timing"], r'^db;dur=\d+\.\d{2};desc="2 queries"$'
+        )
+        response = await self.client.get("/items/0")
+        self.assertEqual(
+            response.headers["server-timing"], 'db;dur=0.00;desc="0 queries"'
+        )
+        self.assertEqual(DB_QUERIES_PER_REQUEST.count("GET", "/items/{n}") - before, 2)
+
+    async def test_n_plus_one_warning(self):
+        """Una misma sentencia repetida en la petición genera un aviso"""
+        with self.assertLogs("app.core.query_stats", "WARNING") as logs:
+            await self.client.get("/items/3")
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn(
+            "Posible N+1 en GET /items/{n}: 3 ejecuciones de SELECT ?", logs.output[0]
+        )
+
+        with self.assertNoLogs("app.core.query_stats", "WARNING"):
+            await self.client.get("/items/2")
+
+    async def test_slow_query_redacts_parameters(self):
+        """Las consultas lentas se registran sin los valores de los parámetros"""
+        self.monitor.configure(slow_threshold=0, n_plus_one_threshold=100)
+        with self.assertLogs("app.core.query_stats", "WARNING") as logs:
+            async with self.engine.connect() as conn:
+                await conn.execute(text("SELECT :secreto"), {"secreto": "clave-123"})
+        self.assertIn("Consulta lenta", logs.output[0])
+        self.assertIn("parámetros=['str']", logs.output[0])
+        self.assertNotIn("clave-123", logs.output[0])
+
+    def test_statement_shape_and_redact(self):
+        self.assertEqual(
+            statement_shape("SELECT *\n  FROM t WHERE id IN (?, ?, ?)"),
+            statement_shape("SELECT * FROM t WHERE id IN (?, ?)"),
+        )
+        self.assertEqual(redact({"a": 1, "b": "x"}), {"a": "int", "b": "str"})
+        self.assertEqual(
+            redact([(1, "x"), (2, "y")], executemany=True), "2 x ['int', 'str']"
+        )
@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.revocation import RevocationIndex
+from app.models.revoked_token import RevokedToken
+
+
+class TestRevocationIndex(unittest.IsolatedAsyncioTestCase):
+    """Pruebas del índice en memoria de tokens revocados"""
+
+    async def asyncSetUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        path = os.path.join(self.tmpdir.name, "tokens.db")
+        self.engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        async with self.engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+
+        now = datetime.utcnow()
+        await self.insert(
+            RevokedToken(jti="vigente", exp=now + timedelta(minutes=10)),
+            RevokedToken(jti="vencido", exp=now - timedelta(minutes=1)),
+            RevokedToken(jti="antiguo", revoked_at=now - timedelta(hours=1)),
+        )
+
+        self.index = RevocationIndex()
+        await self.index.start(
+            self.engine,
+            token_lifetime=timedelta(minutes=30),
+            sync_interval=60,
+            prune_interval=60,
+        )
+
+    async def asyncTearDown(self):
+        await self.index.stop()
+        await self.engine.dispose()
+        self.tmpdir.cleanup()
+
+    async def insert(self, *tokens):
+        async with AsyncSession(self.engine) as session:
+            session.add_all(tokens)
+            await session.commit()
+
+    async def stored_jtis(self):
+        async with AsyncSession(self.engine) as session:
+            return set((await session.exec(select(RevokedToken.jti))).all())
+
+    async def test_start_loads_and_prunes(self):
+        """Debe cargar las revocaciones vigentes y purgar las vencidas"""
+        self.assertTrue(self.index.is_revoked("vigente"))
+        self.assertFalse(self.index.is_revoked("vencido"))
+        self.assertFalse(self.index.is_revoked("antiguo"))
+        self.assertEqual(await self.stored_jtis(), {"vigente"})
+
+    async def test_add(self):
+        """Una revocación local se ve de inmediato"""
+        self.index.add("nuevo", datetime.utcnow() + timedelta(minutes=5))
+        self.assertTrue(self.index.is_revoked("nuevo"))
+        self.assertFalse(self.index.is_revoked("otro"))
+
+    async def test_sync_reads_other_workers(self):
+        """sync debe incorporar las revocaciones hechas por otro proceso"""
+        await self.insert(
+            RevokedToken(jti="remoto", exp=datetime.utcnow() + timedelta(minutes=5))
+        )
+        self.assertFalse(self.index.is_revoked("remoto"))
+
+        await self.index.sync()
+        self.assertTrue(self.index.is_revoked("remoto"))
+
+    async def test_prune_memory(self):
+        """prune debe descartar del índice los tokens vencidos"""
+        self.index.add("corto", datetime.utcnow() - timedelta(seconds=1))
+        await self.index.prune()
+
+        self.assertFalse(self.index.is_revoked("corto"))
+        self.assertEqual(len(self.index), 1)
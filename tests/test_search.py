@@ -0,0 +1,88 @@
+import unittest
+from unittest.mock import MagicMock
+from uuid import uuid4
+
+from sqlalchemy import create_engine
+from sqlmodel import Session as DBSession, SQLModel, select
+
+from app.core.search import MessageSearchIndex, build_match_query
+from app.models.message import Message
+from app.models.session import Session
+from app.models.user import User
+
+
+class TestBuildMatchQuery(unittest.TestCase):
+    """Pruebas de la traducción de búsquedas a consultas FTS5"""
+
+    def test_prefix_terms(self):
+        """Cada término debe ir entre comillas y como prefijo"""
+        self.assertEqual(
+            build_match_query("Hola Mun"), 'content:"hola"* content:"mun"*'
+        )
+
+    def test_operators_are_escaped(self):
+        """La sintaxis FTS5 del usuario no debe interpretarse"""
+        self.assertEqual(
+            build_match_query('a" OR b*'), 'content:"a"* content:"or"* content:"b"*'
+        )
+
+    def test_no_terms(self):
+        """Sin términos no hay consulta"""
+        self.assertIsNone(build_match_query("¡¿?!"))
+
+
+class TestMessageSearchIndex(unittest.TestCase):
+    """Pruebas del índice FTS5 sobre SQLite en memoria"""
+
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        SQLModel.metadata.create_all(self.engine)
+        self.index = MessageSearchIndex()
+
+        self.user = User(email="a@b.com", full_name="A", password=None)
+        self.session_a = Session(name="A", created_by_id=self.user.id)
+        self.session_b = Session(name="B", created_by_id=self.user.id)
+        with DBSession(self.engine, expire_on_commit=False) as db:
+            db.add_all([self.user, self.session_a, self.session_b])
+            db.add(Message(content="mensaje previo", session_id=self.session_a.id))
+            db.commit()
+
+        with self.engine.begin() as conn:
+            self.index.setup(conn)
+
+    def search(self, session_id, term):
+        query = select(Message).where(Message.session_id == session_id)
+        query = self.index.filter(
+            query,
+            message_id_column=Message.id,
+            session_id=session_id,
+            match=build_match_query(term),
+        ).order_by(self.index.rank())
+        with DBSession(self.engine, expire_on_commit=False) as db:
+            return [m.content for m in db.exec(query).all()]
+
+    def test_backfill_existing_messages(self):
+        """Debe indexar los mensajes existentes al crear la tabla"""
+        self.assertTrue(self.index.enabled)
+        self.assertEqual(self.search(self.session_a.id, "previo"), ["mensaje previo"])
+
+    def test_sync_on_insert_scoped_by_session(self):
+        """Debe indexar inserciones y respetar la sesión"""
+        with DBSession(self.engine, expire_on_commit=False) as db:
+            db.add(Message(content="Canción nueva", session_id=self.session_a.id))
+            db.add(Message(content="canción ajena", session_id=self.session_b.id))
+            db.commit()
+
+        self.assertEqual(self.search(self.session_a.id, "cancion"), ["Canción nueva"])
+        self.assertEqual(self.search(self.session_a.id, "can nu"), ["Canción nueva"])
+        self.assertEqual(self.search(uuid4(), "cancion"), [])
+
+    def test_disabled_without_sqlite(self):
+        """En motores sin FTS5 debe quedar deshabilitado"""
+        conn = MagicMock()
+        conn.dialect.name = "postgresql"
+
+        self.index.setup(conn)
+
+        self.assertFalse(self.index.enabled)
+        conn.execute.assert_not_called()
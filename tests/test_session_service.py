@@ -1,5 +1,5 @@
 import unittest
-from unittest.mock import AsyncMock, MagicMock
+from unittest.mock import AsyncMock, MagicMock, patch
 from uuid import uuid4
 from fastapi import HTTPException, status
 from sqlalchemy.exc import IntegrityError
@@ -29,11 +29,15 @@ class TestSessionService(unittest.IsolatedAsyncioTestCase):
             self.created_by_id = kwargs.get("created_by_id", uuid4())
 
     class FakeResult:
-        """Fake de Result para simular .one_or_none() y .all()"""
+        """Fake de Result para simular .one_or_none(), .one() y .all()"""
 
-        def __init__(self, one_or_none=None, all_data=None):
+        def __init__(self, one_or_none=None, all_data=None, one=None):
             self._one_or_none = one_or_none
             self._all = all_data or []
+            self._one = one
+
+        def one(self):
+            return self._one
 
         def one_or_none(self):
             return self._one_or_none
@@ -44,6 +48,9 @@ class TestSessionService(unittest.IsolatedAsyncioTestCase):
     class FakeSelect:
         """Fake que imita el query builder de SQLAlchemy"""
 
+        def select_from(self, *args, **kwargs):
+            return self
+
         def where(self, *args, **kwargs):
             return self
 
@@ -97,7 +104,9 @@ class TestSessionService(unittest.IsolatedAsyncioTestCase):
 
         self.assertEqual(result.name, "Test Session")
         self.assertEqual(result.created_by_id, user_id)
-        self.mock_manager.create_session.assert_called_once()
+        self.mock_manager.create_session.assert_called_once_with(
+            session=result, message_count=0
+        )
 
     async def test_create_session_integrity_error(self):
         """Debe lanzar HTTPException si el nombre ya existe"""
@@ -153,7 +162,7 @@ class TestSessionService(unittest.IsolatedAsyncioTestCase):
         ]
 
         self.mock_session.exec.side_effect = [
-            self.FakeResult(all_data=fake_sessions),  # total
+            self.FakeResult(one=2),  # total
             self.FakeResult(all_data=fake_sessions),  # query paginada
         ]
 
@@ -162,3 +171,41 @@ class TestSessionService(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(result["total"], 2)
         self.assertEqual(len(result["items"]), 2)
         self.assertEqual(result["items"][0].name, "S1")
+
+    async def test_get_active_from_registry(self):
+        """Si la sesión está registrada no debe consultar la base de datos"""
+        fake = self.FakeSession(id=uuid4(), name="Registrada")
+        self.mock_manager.get_session.return_value = fake
+
+        result = await self.service.get_active(session_id=fake.id)
+
+        self.assertIs(result, fake)
+        self.mock_session.exec.assert_not_awaited()
+
+    async def test_get_active_loads_and_registers(self):
+        """Si no está registrada debe cargarla y registrarla"""
+        fake = self.FakeSession(id=uuid4(), name="Cargada")
+        self.mock_manager.get_session.return_value = None
+        self.mock_session.exec.return_value = self.FakeResult(one_or_none=fake)
+
+        result = await self.service.get_active(session_id=fake.id)
+
+        self.assertIs(result, fake)
+        self.mock_manager.create_session.assert_called_once_with(session=fake)
+
+    async def test_get_active_many(self):
+        """Debe cargar con una sola consulta las sesiones no registradas"""
+        registered = self.FakeSession(id=uuid4(), name="Registrada")
+        loaded = self.FakeSession(id=uuid4(), name="Cargada")
+        self.mock_manager.get_session.side_effect = {registered.id: registered}.get
+        self.mock_session.exec.return_value = self.FakeResult(all_data=[loaded])
+
+        # La columna fake admite el filtro IN
+        with patch.object(self.FakeSession, "id", MagicMock()):
+            result = await self.service.get_active_many(
+                session_ids=[registered.id, loaded.id, uuid4(), registered.id]
+            )
+
+        self.assertEqual(result, {registered.id: registered, loaded.id: loaded})
+        self.mock_session.exec.assert_awaited_once()
+        self.mock_manager.create_session.assert_called_once_with(session=loaded)
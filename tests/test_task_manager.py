@@ -0,0 +1,57 @@
+import asyncio
+import multiprocessing
+import os
+import signal
+import time
+import unittest
+
+from app.core.task_manager import TaskManager, TaskManagerOverloaded
+
+
+class TestTaskManagerCpuPool(unittest.IsolatedAsyncioTestCase):
+    """Pruebas del pool de procesos acotado de TaskManager"""
+
+    async def asyncSetUp(self):
+        self.manager = TaskManager()
+        self.manager.configure(cpu_workers=1, cpu_queue_limit=1)
+
+    async def asyncTearDown(self):
+        self.manager.shutdown()
+
+    async def test_run_cpu(self):
+        """Debe devolver el resultado calculado en otro proceso"""
+        self.assertEqual(await self.manager.run_cpu(pow, 2, 10), 1024)
+        self.assertEqual(self.manager.stats()["cpu_pending"], 0)
+
+    async def test_overload_rejected(self):
+        """Con la cola llena debe rechazar de inmediato"""
+        running = asyncio.ensure_future(self.manager.run_cpu(time.sleep, 0.5))
+        await asyncio.sleep(0)
+
+        start = time.perf_counter()
+        with self.assertRaises(TaskManagerOverloaded):
+            await self.manager.run_cpu(pow, 2, 10)
+        self.assertLess(time.perf_counter() - start, 0.1)
+
+        await running
+        self.assertEqual(await self.manager.run_cpu(pow, 2, 3), 8)
+
+    async def test_dead_worker_replaces_the_pool(self):
+        """Si muere un proceso del pool, se responde 503 y se levanta otro pool"""
+        self.manager.configure(cpu_workers=1, cpu_queue_limit=2)
+        running = asyncio.ensure_future(self.manager.run_cpu(time.sleep, 5))
+        while not multiprocessing.active_children():
+            await asyncio.sleep(0.01)
+        # El pool arranca sus procesos de a uno: se mata el que corre el trabajo
+        await asyncio.sleep(0.2)
+        broken = self.manager.cpu_executor
+        for process in multiprocessing.active_children():
+            os.kill(process.pid, signal.SIGKILL)
+
+        with self.assertRaises(TaskManagerOverloaded):
+            await running
+        self.assertIsNone(self.manager.cpu_executor)
+        self.assertEqual(self.manager.stats()["cpu_pending"], 0)
+
+        self.assertEqual(await self.manager.run_cpu(pow, 2, 10), 1024)
+        self.assertIsNot(self.manager.cpu_executor, broken)
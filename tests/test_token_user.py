@@ -0,0 +1,150 @@
+import os
+import unittest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite://")
+os.environ.setdefault("JWT_SECRET", "secret")
+
+import httpx  # noqa: E402
+import jwt  # noqa: E402
+from fastapi import Depends, FastAPI  # noqa: E402
+
+from app.core.revocation import RevocationIndex  # noqa: E402
+from app.core.user_cache import UserCache  # noqa: E402
+from app.dependencies import (  # noqa: E402
+    get_current_admin_user,
+    get_token_control_service,
+    get_token_user,
+    get_user_cache,
+    get_user_service,
+)
+from app.enums.user_role import UserRole  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.schemas.user import TokenUser  # noqa: E402
+from app.services.token_control_service import TokenControlService  # noqa: E402
+from app.settings import get_settings  # noqa: E402
+
+
+class TestTokenUser(unittest.TestCase):
+    """Pruebas de la identidad firmada en el access token"""
+
+    def test_claims_round_trip(self):
+        """Los claims del token reconstruyen la misma identidad"""
+        user = TokenUser(id=uuid4(), role=UserRole.admin, is_active=True)
+        claims = user.claims()
+        self.assertEqual(claims, {"sub": str(user.id), "role": "admin", "active": True})
+
+        decoded = TokenUser(
+            id=claims["sub"], role=claims["role"], is_active=claims["active"]
+        )
+        self.assertEqual(decoded, user)
+
+    def test_from_user_without_role(self):
+        """Los usuarios anteriores a la columna role (NULL) son user"""
+        row = SimpleNamespace(id=uuid4(), role=None, is_active=False)
+        user = TokenUser.from_user(row)
+        self.assertEqual(user.role, UserRole.user)
+        self.assertFalse(user.is_active)
+
+
+class TestTokenAuthorization(unittest.IsolatedAsyncioTestCase):
+    """Pruebas de get_token_user y get_current_admin_user"""
+
+    async def asyncSetUp(self):
+        self.settings = get_settings()
+        self.user = User(email="a@b.com", full_name="A", password=None)
+        self.user_service = MagicMock(get_by_id=AsyncMock(return_value=self.user))
+        self.index = RevocationIndex()
+
+        app = FastAPI()
+
+        @app.get("/me")
+        async def me(user: TokenUser = Depends(get_token_user)):
+            return {"id": str(user.id), "role": user.role.value}
+
+        @app.get("/admin")
+        async def admin(user: TokenUser = Depends(get_current_admin_user)):
+            return {"id": str(user.id)}
+
+        app.dependency_overrides.update(
+            {
+                get_user_service: lambda: self.user_service,
+                get_token_control_service: lambda: TokenControlService(
+                    session=MagicMock(), index=self.index
+                ),
+                get_user_cache: lambda: UserCache(max_size=0),
+            }
+        )
+        self.client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        )
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    def token(self, *, age: float = 0, jti: str = "jti", **claims) -> str:
+        issued = datetime.now(timezone.utc) - timedelta(seconds=age)
+        payload = {
+            "sub": str(self.user.id),
+            "role": "user",
+            "active": True,
+            "iat": issued,
+            "exp": issued + timedelta(hours=1),
+            "jti": jti,
+            **claims,
+        }
+        payload = {key: value for key, value in payload.items() if value is not None}
+        return jwt.encode(
+            payload, self.settings.jwt_secret, algorithm=self.settings.jwt_algorithm
+        )
+
+    async def get(self, path: str, token: str) -> httpx.Response:
+        return await self.client.get(path, headers={"Authorization": f"Bearer {token}"})
+
+    async def test_fresh_claims_skip_the_database(self):
+        """Con claims recientes no se carga el usuario"""
+        response = await self.get("/me", self.token(role="admin"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"id": str(self.user.id), "role": "admin"})
+        self.user_service.get_by_id.assert_not_awaited()
+
+    async def test_stale_or_roleless_tokens_load_the_user(self):
+        """Claims vencidos o tokens sin rol se revalidan con el usuario"""
+        stale = self.token(role="admin", age=self.settings.JWT_CLAIMS_MAX_AGE + 60)
+        # El rol firmado ya no vale: manda el de la base de datos
+        response = await self.get("/admin", stale)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.user_service.get_by_id.await_count, 1)
+
+        response = await self.get("/me", self.token(role=None, active=None))
+        self.assertEqual(response.json()["role"], "user")
+        self.assertEqual(self.user_service.get_by_id.await_count, 2)
+
+    async def test_inactive_user_is_forbidden(self):
+        response = await self.get("/me", self.token(active=False))
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json()["detail"], "inactive_user")
+
+        self.user.is_active = False
+        response = await self.get("/me", self.token(role=None))
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json()["detail"], "inactive_user")
+
+    async def test_revoked_token_with_fresh_claims(self):
+        """Un token revocado se rechaza aunque sus claims sean recientes"""
+        self.index.add("revocado", None)
+        response = await self.get("/me", self.token(jti="revocado"))
+        self.assertEqual(response.status_code, 401)
+        self.user_service.get_by_id.assert_not_awaited()
+
+    async def test_admin_dependency(self):
+        """Solo un token con rol admin pasa get_current_admin_user"""
+        response = await self.get("/admin", self.token())
+        self.assertEqual(response.status_code, 403)
+
+        response = await self.get("/admin", self.token(role="admin"))
+        self.assertEqual(response.status_code, 200)
+        self.user_service.get_by_id.assert_not_awaited()
@@ -0,0 +1,74 @@
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlmodel import Session as DBSession, SQLModel
+
+from app.core.user_cache import UserCache, user_cache
+from app.models.user import User
+
+
+def make_user(email="a@b.com") -> User:
+    return User(email=email, full_name="A", password=None)
+
+
+class TestUserCache(unittest.TestCase):
+    """Pruebas de la caché de usuarios autenticados"""
+
+    def setUp(self):
+        self.cache = UserCache(max_size=2, ttl=10)
+
+    def test_hit_and_miss(self):
+        """Debe contar aciertos y fallos"""
+        user = make_user()
+        self.assertIsNone(self.cache.get(user.id))
+        self.cache.set(user)
+
+        self.assertIs(self.cache.get(user.id), user)
+        self.assertEqual(self.cache.stats(), {"size": 1, "hits": 1, "misses": 1})
+
+    def test_expired_entry(self):
+        """Una entrada vencida cuenta como fallo y se descarta"""
+        user = make_user()
+        with patch("app.core.user_cache.time.monotonic", return_value=100):
+            self.cache.set(user)
+        with patch("app.core.user_cache.time.monotonic", return_value=110):
+            self.assertIsNone(self.cache.get(user.id))
+
+        self.assertEqual(self.cache.stats()["size"], 0)
+
+    def test_lru_eviction(self):
+        """Al superar el tamaño se descarta el usado hace más tiempo"""
+        first, second, third = make_user("1@b.com"), make_user("2@b.com"), make_user()
+        self.cache.set(first)
+        self.cache.set(second)
+        self.cache.get(first.id)
+        self.cache.set(third)
+
+        self.assertIs(self.cache.get(first.id), first)
+        self.assertIsNone(self.cache.get(second.id))
+        self.assertIs(self.cache.get(third.id), third)
+
+    def test_disabled(self):
+        """Con tamaño cero no debe guardar nada"""
+        self.cache.configure(max_size=0, ttl=10)
+        user = make_user()
+        self.cache.set(user)
+        self.assertIsNone(self.cache.get(user.id))
+
+    def test_update_invalidates(self):
+        """Modificar el usuario por el ORM debe invalidar su entrada"""
+        engine = create_engine("sqlite://")
+        SQLModel.metadata.create_all(engine)
+        user = make_user()
+        with DBSession(engine, expire_on_commit=False) as db:
+            db.add(user)
+            db.commit()
+            user_cache.set(user)
+
+            user.is_active = False
+            db.add(user)
+            db.commit()
+
+        self.assertIsNone(user_cache.get(user.id))
+        user_cache.clear()
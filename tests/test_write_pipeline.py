@@ -0,0 +1,98 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from uuid import uuid4
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.write_pipeline import GroupCommitWriter
+from app.models.message import Message
+from app.models.session import Session
+from app.models.user import User
+
+
+class TestGroupCommitWriter(unittest.IsolatedAsyncioTestCase):
+    """Pruebas del pipeline de group commit sobre SQLite en archivo"""
+
+    async def asyncSetUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        path = os.path.join(self.tmpdir.name, "messages.db")
+        self.engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        async with self.engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+
+        self.user = User(email="a@b.com", full_name="A", password=None)
+        self.session = Session(name="A", created_by_id=self.user.id)
+        async with AsyncSession(self.engine, expire_on_commit=False) as db:
+            db.add_all([self.user, self.session])
+            await db.commit()
+
+        self.writer = GroupCommitWriter()
+        await self.writer.start(self.engine, max_batch=50, max_delay=0.05)
+
+    async def asyncTearDown(self):
+        await self.writer.stop()
+        await self.engine.dispose()
+        self.tmpdir.cleanup()
+
+    def message(self, content="hola", **kwargs):
+        kwargs.setdefault("session_id", self.session.id)
+        return Message(content=content, **kwargs)
+
+    async def count_messages(self) -> int:
+        async with AsyncSession(self.engine) as db:
+            return (await db.exec(select(func.count()).select_from(Message))).one()
+
+    async def test_concurrent_messages_share_commit(self):
+        """Los mensajes concurrentes deben confirmarse en un único lote"""
+        with patch.object(self.writer, "_commit", wraps=self.writer._commit) as commit:
+            results = await asyncio.gather(
+                *(self.writer.submit(self.message(f"m{i}")) for i in range(20))
+            )
+
+        self.assertEqual(commit.await_count, 1)
+        self.assertEqual([m.content for m in results], [f"m{i}" for i in range(20)])
+        self.assertEqual(await self.count_messages(), 20)
+
+    async def test_batch_limit(self):
+        """Un lote no debe superar max_batch filas"""
+        with patch.object(self.writer, "_commit", wraps=self.writer._commit) as commit:
+            await asyncio.gather(
+                *(self.writer.submit(self.message()) for i in range(120))
+            )
+
+        self.assertTrue(all(len(call.args[0]) <= 50 for call in commit.await_args_list))
+        self.assertEqual(await self.count_messages(), 120)
+
+    async def test_failing_row_is_isolated(self):
+        """Una fila inválida solo debe fallar su propia petición"""
+        duplicated = uuid4()
+        async with AsyncSession(self.engine) as db:
+            db.add(self.message(id=duplicated))
+            await db.commit()
+
+        results = await asyncio.gather(
+            self.writer.submit(self.message("ok 1")),
+            self.writer.submit(self.message("duplicado", id=duplicated)),
+            self.writer.submit(self.message("ok 2")),
+            return_exceptions=True,
+        )
+
+        self.assertEqual(results[0].content, "ok 1")
+        self.assertIsInstance(results[1], Exception)
+        self.assertEqual(results[2].content, "ok 2")
+        self.assertEqual(await self.count_messages(), 3)
+
+    async def test_stop_flushes_pending(self):
+        """stop debe escribir los mensajes que siguen en cola"""
+        pending = asyncio.ensure_future(self.writer.submit(self.message()))
+        await asyncio.sleep(0)
+        await self.writer.stop()
+
+        self.assertEqual((await pending).content, "hola")
+        self.assertFalse(self.writer.enabled)
+        self.assertEqual(await self.count_messages(), 1)